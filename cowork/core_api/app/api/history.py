@@ -5,8 +5,11 @@ from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
+from app.api.memory import TaskSummaryCreate, stage_task_summary
+from app.api.messages import MessageCreate, build_chat_message
 from app.auth import get_current_user
 from app.db import get_session
+from app.internal_auth import require_internal_key
 from app.models import ChatHistory
 
 router = APIRouter(prefix="/chat", tags=["history"])
@@ -40,6 +43,12 @@ class ChatHistoryUpdate(BaseModel):
     project_id: str | None = None
 
 
+class ChatHistoryFinalize(BaseModel):
+    history: ChatHistoryUpdate
+    summary: TaskSummaryCreate | None = None
+    message: MessageCreate | None = None
+
+
 class ChatHistoryOut(BaseModel):
     id: int
     task_id: str
@@ -81,6 +90,12 @@ class GroupedHistoryOut(BaseModel):
     total_tokens: int
 
 
+def _apply_history_update(record: ChatHistory, update: ChatHistoryUpdate, now: datetime) -> None:
+    for key, value in update.model_dump(exclude_unset=True).items():
+        setattr(record, key, value)
+    record.updated_at = now
+
+
 @router.post("/history", response_model=ChatHistoryOut)
 def create_history(
     request: ChatHistoryCreate,
@@ -249,11 +264,37 @@ def update_history(
     ).first()
     if not record:
         raise HTTPException(status_code=404, detail="History not found")
-    update_data = request.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(record, key, value)
-    record.updated_at = datetime.now(timezone.utc)
+    _apply_history_update(record, request, datetime.now(timezone.utc))
+    session.add(record)
+    session.commit()
+    session.refresh(record)
+    return ChatHistoryOut(**record.__dict__)
+
+
+@router.post(
+    "/history/{history_id}/finalize",
+    response_model=ChatHistoryOut,
+    dependencies=[Depends(require_internal_key)],
+)
+def finalize_history(
+    history_id: int,
+    request: ChatHistoryFinalize,
+    user=Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> ChatHistoryOut:
+    record = session.exec(
+        select(ChatHistory).where(ChatHistory.id == history_id, ChatHistory.user_id == user.id)
+    ).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="History not found")
+    now = datetime.now(timezone.utc)
+    _apply_history_update(record, request.history, now)
     session.add(record)
+    if request.summary is not None:
+        stage_task_summary(session, user.id, request.summary, now)
+    if request.message is not None:
+        session.add(build_chat_message(user.id, request.message))
+
     session.commit()
     session.refresh(record)
     return ChatHistoryOut(**record.__dict__)
@@ -52,6 +52,10 @@ class MemoryNoteCreate(BaseModel):
     expires_at: datetime | None = None
 
 
+class MemoryNoteBatchCreate(BaseModel):
+    notes: list[MemoryNoteCreate] = Field(default_factory=list, max_length=100)
+
+
 class MemoryNoteUpdate(BaseModel):
     category: str | None = None
     content: str | None = None
@@ -164,30 +168,41 @@ def get_task_summary(
     return TaskSummaryOut(**record.__dict__)
 
 
-@router.put("/task-summary", response_model=TaskSummaryOut)
-def upsert_task_summary(
+def stage_task_summary(
+    session: Session,
+    user_id: int,
     request: TaskSummaryCreate,
-    user=Depends(get_current_user),
-    session: Session = Depends(get_session),
-) -> TaskSummaryOut:
+    now: datetime | None = None,
+) -> TaskSummary:
+    """Add the upserted summary to the session without committing."""
     record = session.exec(
         select(TaskSummary).where(
-            TaskSummary.user_id == user.id,
+            TaskSummary.user_id == user_id,
             TaskSummary.task_id == request.task_id,
         )
     ).first()
     if record:
         record.summary = request.summary
         record.project_id = request.project_id or record.project_id
-        record.updated_at = datetime.now(timezone.utc)
+        record.updated_at = now or datetime.now(timezone.utc)
     else:
         record = TaskSummary(
-            user_id=user.id,
+            user_id=user_id,
             project_id=request.project_id,
             task_id=request.task_id,
             summary=request.summary,
         )
     session.add(record)
+    return record
+
+
+@router.put("/task-summary", response_model=TaskSummaryOut)
+def upsert_task_summary(
+    request: TaskSummaryCreate,
+    user=Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> TaskSummaryOut:
+    record = stage_task_summary(session, user.id, request)
     session.commit()
     session.refresh(record)
     return TaskSummaryOut(**record.__dict__)
@@ -248,6 +263,36 @@ def create_memory_note(
     return MemoryNoteOut(**record.__dict__)
 
 
+@router.post("/notes/batch", response_model=list[MemoryNoteOut])
+def create_memory_notes_batch(
+    request: MemoryNoteBatchCreate,
+    user=Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> list[MemoryNoteOut]:
+    records = [
+        MemoryNote(
+            user_id=user.id,
+            project_id=note.project_id,
+            task_id=note.task_id,
+            category=note.category,
+            content=note.content,
+            pinned=note.pinned,
+            confidence=note.confidence,
+            provenance=note.provenance,
+            auto_generated=note.auto_generated,
+            expires_at=note.expires_at,
+        )
+        for note in request.notes
+    ]
+    if not records:
+        return []
+    session.add_all(records)
+    session.commit()
+    for record in records:
+        session.refresh(record)
+    return [MemoryNoteOut(**record.__dict__) for record in records]
+
+
 @router.put("/notes/{note_id}", response_model=MemoryNoteOut)
 def update_memory_note(
     note_id: int,
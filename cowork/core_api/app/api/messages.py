@@ -33,14 +33,9 @@ class MessageOut(BaseModel):
     created_at: datetime
 
 
-@router.post("/messages", response_model=MessageOut, dependencies=[Depends(require_internal_key)])
-def create_message(
-    request: MessageCreate,
-    user=Depends(get_current_user),
-    session: Session = Depends(get_session),
-) -> MessageOut:
-    record = ChatMessage(
-        user_id=user.id,
+def build_chat_message(user_id: int, request: MessageCreate) -> ChatMessage:
+    return ChatMessage(
+        user_id=user_id,
         project_id=request.project_id,
         task_id=request.task_id,
         role=request.role,
@@ -48,6 +43,15 @@ def create_message(
         message_type=request.message_type or "message",
         meta=request.metadata,
     )
+
+
+@router.post("/messages", response_model=MessageOut, dependencies=[Depends(require_internal_key)])
+def create_message(
+    request: MessageCreate,
+    user=Depends(get_current_user),
+    session: Session = Depends(get_session),
+) -> MessageOut:
+    record = build_chat_message(user.id, request)
     session.add(record)
     session.commit()
     session.refresh(record)
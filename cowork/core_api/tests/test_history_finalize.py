@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def test_finalize_history_applies_history_summary_and_message(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    created = client.post(
+        "/chat/history",
+        headers=auth_headers,
+        json={"task_id": "task-final", "project_id": "project-final", "question": "Wrap it up"},
+    )
+    assert created.status_code == 200
+    history_id = created.json()["id"]
+
+    response = client.post(
+        f"/chat/history/{history_id}/finalize",
+        headers=auth_headers,
+        json={
+            "history": {"status": 2, "tokens": 42, "summary": "Wrapped"},
+            "summary": {"task_id": "task-final", "project_id": "project-final", "summary": "All done"},
+            "message": {
+                "project_id": "project-final",
+                "task_id": "task-final",
+                "role": "assistant",
+                "content": "All done",
+                "message_type": "task_result",
+            },
+        },
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["status"] == 2
+    assert payload["tokens"] == 42
+
+    summary = client.get("/memory/task-summary?task_id=task-final", headers=auth_headers)
+    assert summary.status_code == 200
+    assert summary.json()["summary"] == "All done"
+
+    messages = client.get("/chat/messages?task_id=task-final", headers=auth_headers)
+    assert messages.status_code == 200
+    assert [item["message_type"] for item in messages.json()] == ["task_result"]
+
+
+def test_finalize_history_returns_404_for_unknown_history(
+    client: TestClient,
+    auth_headers: dict[str, str],
+) -> None:
+    response = client.post(
+        "/chat/history/9999/finalize",
+        headers=auth_headers,
+        json={"history": {"status": 3}},
+    )
+
+    assert response.status_code == 404
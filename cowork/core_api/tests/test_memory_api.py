@@ -166,3 +166,25 @@ def test_memory_notes_exclude_expired_by_default(client: TestClient, auth_header
     )
     assert stats.status_code == 200
     assert stats.json()["note_count"] == 1
+
+
+def test_memory_notes_batch_create(client: TestClient, auth_headers: dict[str, str]) -> None:
+    project_id = "proj-memory-batch"
+
+    created = client.post(
+        "/memory/notes/batch",
+        headers=auth_headers,
+        json={
+            "notes": [
+                {"project_id": project_id, "category": "tech_stack", "content": "Uses Postgres"},
+                {"project_id": project_id, "category": "preferences", "content": "Prefers dark mode"},
+            ]
+        },
+    )
+    assert created.status_code == 200
+    assert [item["content"] for item in created.json()] == ["Uses Postgres", "Prefers dark mode"]
+    assert all(item["id"] for item in created.json())
+
+    notes_list = client.get(f"/memory/notes?project_id={project_id}", headers=auth_headers)
+    assert notes_list.status_code == 200
+    assert {item["content"] for item in notes_list.json()} == {"Uses Postgres", "Prefers dark mode"}
@@ -401,9 +401,13 @@ function normalizeSubtaskStatus(
 
 function handleSubTasks(taskId: string, data: SubTasksData): void {
   const store = useChatStore.getState()
+  // Partial plans arrive while decomposition is still streaming
+  const isFinal = data.is_final !== false
 
   // Clear streaming decompose text
-  store.clearStreamingDecomposeText(taskId)
+  if (isFinal) {
+    store.clearStreamingDecomposeText(taskId)
+  }
 
   // Set subtasks
   if (Array.isArray(data.sub_tasks)) {
@@ -423,6 +427,8 @@ function handleSubTasks(taskId: string, data: SubTasksData): void {
     )
   }
 
+  if (!isFinal) return
+
   addProgressStepFromEvent(taskId, 'to_sub_tasks', 'completed', {
     count: data.sub_tasks?.length,
     sub_tasks: data.sub_tasks,
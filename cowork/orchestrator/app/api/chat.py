@@ -1,5 +1,4 @@
 import asyncio
-import json
 import uuid
 from typing import Literal
 
@@ -12,6 +11,7 @@ from app.config import settings
 from app.runtime.actions import ActionImprove, ActionStop, AgentSpec, TaskStatus
 from app.runtime.config_helpers import _is_permission_approved
 from app.runtime.engine import run_task_loop
+from app.runtime.fast_json import json_dumps_bytes
 from app.runtime.manager import get, get_or_create, remove
 from app.runtime.tool_context import current_request_id
 from shared.observability import REQUEST_ID_HEADER
@@ -51,7 +51,7 @@ class AttachmentPayload(BaseModel):
     url: str | None = None
 
 
-def format_sse(event: StepEventModel) -> str:
+def format_sse(event: StepEventModel) -> bytes:
     payload = {
         "task_id": event.task_id,
         "step": event.step,
@@ -61,7 +61,7 @@ def format_sse(event: StepEventModel) -> str:
         "request_id": event.request_id,
         "contract_version": event.contract_version,
     }
-    return f"data: {json.dumps(payload)}\n\n"
+    return b"data: " + json_dumps_bytes(payload) + b"\n\n"
 
 
 def _request_id_from_headers(request: Request) -> str:
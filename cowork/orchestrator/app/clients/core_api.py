@@ -10,6 +10,7 @@ import httpx
 from pydantic import BaseModel, Field
 
 from app.config import settings
+from app.runtime.fast_json import json_dumps_bytes
 from app.runtime.tool_context import current_request_id
 from shared.observability import REQUEST_ID_HEADER
 
@@ -159,6 +160,10 @@ async def _request_with_retry(
     json_payload: dict[str, Any] | None = None,
 ) -> httpx.Response:
     client = _get_client()
+    content: bytes | None = None
+    if json_payload is not None:
+        content = json_dumps_bytes(json_payload)
+        headers = {**headers, "Content-Type": "application/json"}
     last_exc: Exception | None = None
     for attempt in range(1, _MAX_RETRIES + 1):
         try:
@@ -167,7 +172,7 @@ async def _request_with_retry(
                 url,
                 headers=headers,
                 params=params,
-                json=json_payload,
+                content=content,
             )
             response.raise_for_status()
             return response
@@ -453,6 +458,34 @@ async def create_memory_note(
         return None
 
 
+async def create_memory_notes_batch(
+    auth_header: str | None,
+    payloads: list[dict[str, Any]],
+) -> list[MemoryNote]:
+    if not auth_header or not payloads:
+        return []
+    base_url = settings.core_api_url.rstrip("/")
+    if not base_url:
+        return []
+    headers = _build_headers(auth_header)
+    try:
+        resp = await _request_with_retry(
+            "POST",
+            f"{base_url}/memory/notes/batch",
+            headers=headers,
+            json_payload={"notes": payloads},
+        )
+        return [MemoryNote(**item) for item in resp.json()]
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code not in {404, 405}:
+            return []
+    except httpx.HTTPError:
+        return []
+    # Older core-api without the batch route: fall back to concurrent single writes.
+    created = await asyncio.gather(*(create_memory_note(auth_header, payload) for payload in payloads))
+    return [note for note in created if note is not None]
+
+
 async def fetch_thread_summary(
     auth_header: str | None,
     project_id: str,
@@ -568,3 +601,71 @@ async def update_history(
         )
     except httpx.HTTPError:
         return
+
+
+async def _write_task_results_separately(
+    auth_header: str,
+    *,
+    history_id: int | None,
+    history_patch: dict[str, Any],
+    task_id: str,
+    project_id: str | None,
+    summary: str | None,
+    message: dict[str, Any] | None,
+) -> None:
+    writes = []
+    if history_id is not None:
+        writes.append(update_history(auth_header, history_id, history_patch))
+    if summary:
+        writes.append(upsert_task_summary(auth_header, task_id, summary, project_id=project_id))
+    if message is not None:
+        writes.append(create_message(auth_header, message))
+    if writes:
+        await asyncio.gather(*writes)
+
+
+async def finalize_task(
+    auth_header: str | None,
+    *,
+    history_id: int | None,
+    history_patch: dict[str, Any],
+    task_id: str,
+    project_id: str | None = None,
+    summary: str | None = None,
+    message: dict[str, Any] | None = None,
+) -> None:
+    """Apply the end-of-task history patch, task summary and result message in one round trip."""
+    if not auth_header:
+        return
+    base_url = settings.core_api_url.rstrip("/")
+    if not base_url:
+        return
+    writes: dict[str, Any] = {
+        "history_id": history_id,
+        "history_patch": history_patch,
+        "task_id": task_id,
+        "project_id": project_id,
+        "summary": summary,
+        "message": message,
+    }
+    if history_id is None:
+        # Without a history row there is nothing to batch against; send the remaining writes concurrently.
+        await _write_task_results_separately(auth_header, **writes)
+        return
+    headers = _build_headers(auth_header)
+    payload: dict[str, Any] = {"history": history_patch}
+    if summary:
+        payload["summary"] = {"task_id": task_id, "project_id": project_id, "summary": summary}
+    if message is not None:
+        payload["message"] = message
+    try:
+        await _request_with_retry(
+            "POST",
+            f"{base_url}/chat/history/{history_id}/finalize",
+            headers=headers,
+            json_payload=payload,
+        )
+    except httpx.HTTPError:
+        # Losing the task result is worse than a rare duplicate, so retry through the individual endpoints.
+        logger.warning("core_api_finalize_fallback", extra={"history_id": history_id, "task_id": task_id})
+        await _write_task_results_separately(auth_header, **writes)
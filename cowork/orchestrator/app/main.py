@@ -43,6 +43,12 @@ def _maybe_install_deps() -> None:
 @app.on_event("shutdown")
 async def _close_http_clients() -> None:
     from app.clients.core_api import close_client
+    from app.runtime.llm_client import close_client as close_llm_client
+    from app.runtime.manager import flush_pending_writes
+    from app.runtime.mcp_config import close_mcp_toolkits
     from app.runtime.sync import close_client as close_sync_client
+    await flush_pending_writes()
     await close_client()
     await close_sync_client()
+    await close_llm_client()
+    await close_mcp_toolkits()
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import json
 from typing import Any, Iterable
 
 from camel.agents import ChatAgent
-from camel.models import ModelFactory
+from camel.models import BaseModelBackend, ModelFactory
 from camel.societies.workforce.prompts import PROCESS_TASK_PROMPT
 from camel.societies.workforce.single_agent_worker import SingleAgentWorker as BaseSingleAgentWorker
 from camel.societies.workforce.task_channel import TaskChannel
@@ -299,6 +300,7 @@ def _build_agent(
     stream: bool = False,
     tools: list | None = None,
     extra_params: dict[str, Any] | None = None,
+    model_cache: dict[str, BaseModelBackend] | None = None,
 ) -> ChatAgent:
     model_config: dict[str, Any] = {}
     if stream:
@@ -316,14 +318,20 @@ def _build_agent(
         if model_config is None:
             model_config = {}
         model_config.update(extra_params)
-    model = ModelFactory.create(
-        model_platform=provider.provider_name,
-        model_type=provider.model_type,
-        api_key=provider.api_key,
-        url=_resolve_model_url(provider),
-        timeout=60,
-        model_config_dict=model_config,
-    )
+    # Agents with an identical model config share one backend: one set of SDK clients, one token counter.
+    cache_key = json.dumps(model_config, sort_keys=True, default=str)
+    model = model_cache.get(cache_key) if model_cache is not None else None
+    if model is None:
+        model = ModelFactory.create(
+            model_platform=provider.provider_name,
+            model_type=provider.model_type,
+            api_key=provider.api_key,
+            url=_resolve_model_url(provider),
+            timeout=60,
+            model_config_dict=model_config,
+        )
+        if model_cache is not None:
+            model_cache[cache_key] = model
     agent = CoworkChatAgent(
         system_message=system_prompt,
         model=model,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import re
 import threading
@@ -127,6 +128,11 @@ def _candidate_paths_from_message(message: str) -> list[str]:
     return candidates
 
 
+def artifact_id_digest(*parts: str) -> str:
+    # hash() is salted per process; the same inputs must give the same id in every worker and after restarts.
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
 def _extract_file_artifacts(task_id: str, data: dict) -> list[dict[str, Any]]:
     message = data.get("message")
     if not isinstance(message, str) or not message.strip():
@@ -161,7 +167,7 @@ def _extract_file_artifacts(task_id: str, data: dict) -> list[dict[str, Any]]:
         )
         artifact_payloads.append(
             {
-                "id": f"artifact-file-{abs(hash((task_id, path_key, int(now * 1000))))}",
+                "id": f"artifact-file-{artifact_id_digest(task_id, path_key, str(int(now * 1000)))}",
                 "type": artifact_type,
                 "name": resolved.name,
                 "content_url": content_url or str(resolved),
@@ -12,8 +12,8 @@ from app.clients.core_api import (
     fetch_provider,
     fetch_provider_features,
     fetch_skills,
+    finalize_task,
     update_history,
-    upsert_task_summary,
 )
 from app.runtime.actions import ActionType, TaskStatus
 from app.runtime.agents import CoworkWorkforce, _build_agent  # noqa: F401 - compatibility
@@ -35,6 +35,7 @@ from app.runtime.llm_client import collect_chat_completion, stream_chat  # noqa:
 from app.runtime.memory import (
     _build_memory_governance_policy,
     _build_context,
+    _build_message_payload,
     _compact_context,
     _context_budget_snapshot,
     _generate_global_memory_notes,
@@ -47,9 +48,10 @@ from app.runtime.memory import (
 )
 from app.runtime.mcp_config import _build_mcp_config, _load_mcp_tools  # noqa: F401 - compatibility
 from app.runtime.skill_catalog_matching import (
-    catalog_skill_matches_request,
+    enabled_skill_ids,
     extensions_for_skill_detection,
     filter_enabled_runtime_skills,
+    match_catalog_skills,
 )
 from app.runtime.skill_engine import get_runtime_skill_engine, resolve_validation_failure_reason
 from app.runtime.skills import (
@@ -61,14 +63,8 @@ from app.runtime.skills import (
     skill_ids,
     skill_names,
 )
-from app.runtime.stop_reasons import (
-    StopReason,
-    build_completed_end,
-    build_error_end,
-    build_error_event,
-    build_stopped_end,
-)
-from app.runtime.streaming import EventStream, TokenTracker, _emit
+from app.runtime.stop_reasons import StopReason, build_completed_end, build_stopped_end
+from app.runtime.streaming import EventStream, TokenTracker, _emit, _emit_failure, _EventClock, current_event_clock
 from app.runtime.task_analysis import (
     _build_native_search_params,
     _detect_custom_runtime_skills,
@@ -89,6 +85,10 @@ from shared.schemas import StepEvent as StepEventModel
 logger = logging.getLogger(__name__)
 
 async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
+    # Hot names used by the per-chunk streaming loop, bound once as locals.
+    emit = _emit
+    streaming_step = StepEvent.streaming
+    streaming_value = StepEvent.streaming.value
     while True:
         try:
             action = await task_lock.get()
@@ -96,6 +96,7 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
             break
 
         if action.type == ActionType.improve:
+            current_event_clock.set(_EventClock())
             current_auth_token.set(action.auth_token)
             current_project_id.set(action.project_id)
             current_request_id.set(action.request_id)
@@ -112,12 +113,14 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                     "model_type": action.model_type,
                 },
             )
-            task_lock.stop_requested = False
+            task_lock.clear_stop()
             task_lock.status = TaskStatus.processing
             task_lock.current_task_id = action.task_id
             _cleanup_artifact_cache(action.task_id)
-            await _hydrate_conversation_history(task_lock, action.auth_token, action.project_id)
-            await _hydrate_thread_summary(task_lock, action.auth_token, action.project_id)
+            await asyncio.gather(
+                _hydrate_conversation_history(task_lock, action.auth_token, action.project_id),
+                _hydrate_thread_summary(task_lock, action.auth_token, action.project_id),
+            )
 
             provider: ProviderConfig | None = None
             if action.api_key and action.model_type:
@@ -138,22 +141,14 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                 )
 
             if not provider or not provider.api_key or not provider.model_type:
-                yield _emit(
-                    action.task_id,
-                    StepEvent.error,
-                    build_error_event(
-                        "No provider configured",
-                        stop_reason=StopReason.provider_not_configured.value,
-                    ),
-                )
-                yield _emit(
+                error_event, end_event = _emit_failure(
                     action.task_id,
-                    StepEvent.end,
-                    build_error_end(
-                        StopReason.provider_not_configured.value,
-                        "No provider configured",
-                    ),
+                    StopReason.provider_not_configured,
+                    "No provider configured",
+                    "No provider configured",
                 )
+                yield error_event
+                yield end_event
                 task_lock.status = TaskStatus.done
                 continue
 
@@ -265,13 +260,15 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                 except Exception as exc:
                     logger.warning("Context compaction failed: %s", exc)
 
-            await _hydrate_task_summary(task_lock, action.auth_token, action.task_id)
-            await _hydrate_memory_notes(
-                task_lock,
-                action.auth_token,
-                action.project_id,
-                include_global=memory_generate_enabled,
-                policy=memory_policy,
+            await asyncio.gather(
+                _hydrate_task_summary(task_lock, action.auth_token, action.task_id),
+                _hydrate_memory_notes(
+                    task_lock,
+                    action.auth_token,
+                    action.project_id,
+                    include_global=memory_generate_enabled,
+                    policy=memory_policy,
+                ),
             )
 
             context_budget = _context_budget_snapshot(
@@ -331,16 +328,17 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
             skill_engine = get_runtime_skill_engine()
             skill_catalog = await fetch_skills(action.auth_token)
             enabled_catalog_skills = [entry for entry in (skill_catalog or []) if entry.enabled]
-            detection_extensions = extensions_for_skill_detection(action.question, attachments)
-            detected_skills = detect_runtime_skills(action.question, attachments)
-            custom_skill_candidates = [
-                entry
-                for entry in enabled_catalog_skills
-                if entry.source == "custom"
-                and catalog_skill_matches_request(entry, action.question, detection_extensions)
-            ]
+            question_text = action.question or ""
+            detection_extensions = extensions_for_skill_detection(question_text, attachments)
+            detected_skills = detect_runtime_skills(question_text, attachments)
+            custom_skill_candidates = match_catalog_skills(
+                question_text,
+                [entry for entry in enabled_catalog_skills if entry.source == "custom"],
+                detection_extensions,
+                question_lower=question_text.lower(),
+            )
             custom_detected_skills = _detect_custom_runtime_skills(
-                action.question,
+                question_text,
                 detection_extensions,
                 custom_skill_candidates,
             )
@@ -356,6 +354,7 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
             active_skills = filter_enabled_runtime_skills(
                 detected_skills,
                 skill_catalog,
+                enabled_ids=enabled_skill_ids(enabled_catalog_skills),
             )
             skill_run_state = skill_engine.prepare_plan(
                 task_id=action.task_id,
@@ -456,6 +455,13 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                             "Provide a direct, helpful answer to this simple question."
                         )
                     messages = [{"role": "user", "content": prompt}]
+                    task_id = action.task_id
+                    append_part = content_parts.append
+                    on_skill_step = (
+                        skill_engine.on_step_event
+                        if skill_run_state and skill_run_state.active_skills
+                        else None
+                    )
                     async for chunk, usage_update in stream_chat(
                         provider,
                         messages,
@@ -464,31 +470,25 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                         if task_lock.stop_requested:
                             break
                         if chunk:
-                            content_parts.append(chunk)
-                            yield _emit(action.task_id, StepEvent.streaming, {"chunk": chunk})
-                            if skill_run_state and skill_run_state.active_skills:
-                                skill_engine.on_step_event(skill_run_state, StepEvent.streaming.value, {"chunk": chunk})
+                            append_part(chunk)
+                            yield emit(task_id, streaming_step, {"chunk": chunk})
+                            if on_skill_step is not None:
+                                on_skill_step(skill_run_state, streaming_value, {"chunk": chunk})
                         if usage_update:
                             usage = usage_update
                 except Exception as exc:
-                    yield _emit(
+                    error_event, end_event = _emit_failure(
                         action.task_id,
-                        StepEvent.error,
-                        build_error_event(
-                            str(exc),
-                            stop_reason=StopReason.model_call_failed.value,
-                        ),
-                    )
-                    yield _emit(
-                        action.task_id,
-                        StepEvent.end,
-                        build_error_end(
-                            StopReason.model_call_failed.value,
-                            "Model call failed",
-                        ),
+                        StopReason.model_call_failed,
+                        str(exc),
+                        "Model call failed",
                     )
+                    yield error_event
+                    yield end_event
                     if history_id is not None:
-                        await update_history(action.auth_token, history_id, {"status": 3})
+                        task_lock.add_pending_write(
+                            asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                        )
                     task_lock.status = TaskStatus.done
                     continue
 
@@ -504,81 +504,71 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                         build_stopped_end(StopReason.user_stop.value),
                     )
                     if history_id is not None:
-                        await update_history(action.auth_token, history_id, {"status": 3})
+                        task_lock.add_pending_write(
+                            asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                        )
                     task_lock.status = TaskStatus.stopped
                     continue
 
                 result_text = "".join(content_parts).strip()
                 total_tokens += _usage_total(usage)
-                if history_id is not None:
-                    await update_history(action.auth_token, history_id, {"tokens": total_tokens, "status": 2})
 
                 if result_text:
                     task_lock.last_task_summary = result_text
-                    await upsert_task_summary(
-                        action.auth_token,
-                        action.task_id,
-                        result_text,
-                        project_id=action.project_id,
-                    )
 
                 if skill_run_state and skill_run_state.active_skills:
                     skill_engine.on_step_event(skill_run_state, StepEvent.end.value, {"result": result_text})
-                    validation = skill_engine.validate_outputs(
+                    validation = await asyncio.to_thread(
+                        skill_engine.validate_outputs,
                         run_state=skill_run_state,
                         workdir=workdir,
                         transcript=result_text,
                     )
                     if not validation.success:
-                        repair = skill_engine.repair_or_fail(
+                        repair = await asyncio.to_thread(
+                            skill_engine.repair_or_fail,
                             run_state=skill_run_state,
                             validation=validation,
                             workdir=workdir,
+                            persist=False,
                         )
+                        skill_engine.persist_repaired_artifacts(skill_run_state.task_id, repair.artifacts)
                         for artifact in repair.artifacts:
                             yield _emit(action.task_id, StepEvent.artifact, artifact)
                             skill_engine.on_step_event(skill_run_state, StepEvent.artifact.value, artifact)
                         if not repair.success:
                             reason = resolve_validation_failure_reason(validation)
-                            yield _emit(
+                            error_event, end_event = _emit_failure(
                                 action.task_id,
-                                StepEvent.error,
-                                build_error_event(
-                                    reason,
-                                    stop_reason=StopReason.skill_validation_failed.value,
-                                    error_type="validation_error",
-                                    extra={
-                                        "skill_id": skill_run_state.active_skills[0].id,
-                                        "skill_version": skill_run_state.active_skills[0].version,
-                                        "skill_stage": "validation_failed",
-                                        "validation": {
-                                            "success": validation.success,
-                                            "issues": validation.issues,
-                                            "expected_contracts": validation.expected_contracts,
-                                        },
+                                StopReason.skill_validation_failed,
+                                reason,
+                                reason,
+                                error_type="validation_error",
+                                extra={
+                                    "skill_id": skill_run_state.active_skills[0].id,
+                                    "skill_version": skill_run_state.active_skills[0].version,
+                                    "skill_stage": "validation_failed",
+                                    "validation": {
+                                        "success": validation.success,
+                                        "issues": validation.issues,
+                                        "expected_contracts": validation.expected_contracts,
                                     },
-                                ),
+                                },
                             )
-                            yield _emit(
-                                action.task_id,
-                                StepEvent.end,
-                                build_error_end(
-                                    StopReason.skill_validation_failed.value,
-                                    reason,
-                                    extra={
-                                        "skill_id": skill_run_state.active_skills[0].id,
-                                        "skill_version": skill_run_state.active_skills[0].version,
-                                        "skill_stage": "validation_failed",
-                                        "validation": {
-                                            "success": validation.success,
-                                            "issues": validation.issues,
-                                            "expected_contracts": validation.expected_contracts,
-                                        },
-                                    },
-                                ),
+                            yield error_event
+                            yield end_event
+                            task_lock.add_pending_write(
+                                asyncio.create_task(
+                                    finalize_task(
+                                        action.auth_token,
+                                        history_id=history_id,
+                                        history_patch={"status": 3},
+                                        task_id=action.task_id,
+                                        project_id=action.project_id,
+                                        summary=result_text,
+                                    )
+                                )
                             )
-                            if history_id is not None:
-                                await update_history(action.auth_token, history_id, {"status": 3})
                             task_lock.status = TaskStatus.done
                             continue
 
@@ -588,13 +578,20 @@ async def run_task_loop(task_lock: TaskLock) -> AsyncIterator[StepEventModel]:
                     build_completed_end(result_text, usage=usage or {}),
                 )
                 task_lock.add_conversation("assistant", result_text)
-                await _persist_message(
+                await finalize_task(
                     action.auth_token,
-                    action.project_id,
-                    action.task_id,
-                    "assistant",
-                    result_text,
-                    "assistant",
+                    history_id=history_id,
+                    history_patch={"tokens": total_tokens, "status": 2},
+                    task_id=action.task_id,
+                    project_id=action.project_id,
+                    summary=result_text,
+                    message=_build_message_payload(
+                        action.project_id,
+                        action.task_id,
+                        "assistant",
+                        result_text,
+                        "assistant",
+                    ),
                 )
                 if memory_generate_enabled:
                     task_lock.add_background_task(
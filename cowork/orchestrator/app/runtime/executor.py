@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import io
+import logging
 import platform
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
 from typing import Any
 
 from camel.toolkits.mcp_toolkit import MCPToolkit
 from camel.tasks.task import Task
 
-from app.clients.core_api import ProviderConfig, update_history, upsert_task_summary
+from app.clients.core_api import ProviderConfig, finalize_task, update_history, upsert_task_summary
 from app.runtime.actions import TaskStatus
 from app.runtime.agents import CoworkWorkforce, _build_agent
 from app.runtime.config_helpers import (
@@ -20,54 +24,47 @@ from app.runtime.config_helpers import (
 )
 from app.runtime.context import _load_tool_env, _parse_summary, _resolve_workdir
 from app.runtime.events import StepEvent
-from app.runtime.memory import _generate_global_memory_notes, _persist_message
-from app.runtime.mcp_config import _load_mcp_tools
+from app.runtime.memory import (
+    _build_message_payload,
+    _generate_global_memory_notes,
+    _prepare_global_memory_extraction,
+)
+from app.runtime.mcp_config import _load_mcp_tools, release_mcp_toolkit
+from app.runtime.plan_cache import lookup_plan, plan_cache_enabled, serialize_plan, store_plan
 from app.runtime.skill_engine import (
     SkillRunState,
     get_runtime_skill_engine,
     resolve_validation_failure_reason,
 )
 from app.runtime.skills import RuntimeSkill, apply_runtime_skills, build_runtime_skill_context
-from app.runtime.streaming import EventStream, TokenTracker
+from app.runtime.streaming import ChunkCoalescer, EventStream, TokenTracker
 from app.runtime.task_analysis import _ensure_tool, _merge_agent_specs, _strip_search_tools
 from app.runtime.task_lock import TaskLock
-from app.runtime.stop_reasons import (
-    StopReason,
-    build_completed_end,
-    build_error_end,
-    build_error_event,
-    build_stopped_end,
-)
+from app.runtime.stop_reasons import StopReason, build_completed_end, build_stopped_end
 from app.runtime.tool_catalog import select_tools_for_turn
 from app.runtime.toolkits.camel_tools import build_agent_tools
 from app.runtime.tracing import _trace_log
 from app.runtime.workforce import (
+    IncrementalSubtaskParser,
     build_default_agents,
     build_decomposition_prompt,
     build_results_summary_prompt,
     build_summary_prompt,
-    parse_subtasks,
 )
 from app.runtime.llm_client import collect_chat_completion, stream_chat
 
+logger = logging.getLogger(__name__)
 
-def _build_global_base_context(working_directory: str, project_name: str) -> str:
-    os_info = f"{platform.system()} {platform.release()} ({platform.machine()})"
-    current_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    return f"""<operating_environment>
-- **System**: {os_info}
-- **Working Directory**: `{working_directory}`.
-  - ALL file operations must happen inside this directory.
-  - Use absolute paths for precision.
-- **Date**: {current_date}
-</operating_environment>
+# Host facts are fixed for the process lifetime; read them once instead of per task.
+_OS_INFO = f"{platform.system()} {platform.release()} ({platform.machine()})"
+# Below this rough size (chars / 4) the concatenated sub-task results are shown as-is
+# instead of spending another streaming LLM round trip on a summary.
+_RESULTS_SUMMARY_MIN_TOKENS = 800
 
-<memory_protocol>
-- **User Context**: You have access to `GLOBAL_USER_CONTEXT`. Respect the user's stated preferences (tech stack, tone, workflow) found there.
-- **Project Context**: You are working within project `{project_name}`.
-</memory_protocol>
 
-<execution_philosophy>
+# Project- and turn-independent guidance. It follows the agent persona so the system prompt keeps
+# a stable prefix across projects and days, which is what provider prompt caching keys on.
+_GLOBAL_BASE_RULES = """<execution_philosophy>
 - **Bias for Action**: Do not just suggest code; write it. Do not just suggest a search; perform it.
 - **Artifacts over Chat**: Whenever possible, produce tangible outputs (files, code, reports) rather than just long chat messages.
 - **Tool Discipline**: Never guess tool parameters. If a path or ID is missing, verify it first using `ls` or `search`.
@@ -83,6 +80,81 @@ def _build_global_base_context(working_directory: str, project_name: str) -> str
 """
 
 
+def _build_environment_context(working_directory: str, project_name: str) -> str:
+    day_ordinal = datetime.now(timezone.utc).date().toordinal()
+    return _render_environment_context(working_directory, project_name, day_ordinal)
+
+
+@lru_cache(maxsize=256)
+def _render_environment_context(working_directory: str, project_name: str, day_ordinal: int) -> str:
+    current_date = date.fromordinal(day_ordinal).isoformat()
+    return f"""<operating_environment>
+- **System**: {_OS_INFO}
+- **Working Directory**: `{working_directory}`.
+  - ALL file operations must happen inside this directory.
+  - Use absolute paths for precision.
+- **Date**: {current_date}
+</operating_environment>
+
+<memory_protocol>
+- **User Context**: You have access to `GLOBAL_USER_CONTEXT`. Respect the user's stated preferences (tech stack, tone, workflow) found there.
+- **Project Context**: You are working within project `{project_name}`.
+</memory_protocol>
+
+"""
+
+
+def _compose_agent_system_prompt(persona: str, environment_context: str) -> str:
+    """Order the system prompt from most to least stable: persona, shared rules, then per-turn context."""
+    return f"{persona.rstrip()}\n\n{_GLOBAL_BASE_RULES}{environment_context}"
+
+
+async def _prepare_tool_runtime(
+    auth_token: str | None,
+    project_id: str,
+) -> tuple[Path, dict[str, str | None], MCPToolkit | None, list]:
+    workdir, tool_env = await asyncio.gather(
+        asyncio.to_thread(_resolve_workdir, project_id),
+        _load_tool_env(auth_token),
+    )
+    tool_env["CAMEL_WORKDIR"] = str(workdir)
+    env_snapshot = _apply_env_overrides(tool_env)
+    try:
+        mcp_toolkit, mcp_tools = await _load_mcp_tools(auth_token)
+    except BaseException:
+        _restore_env(env_snapshot)
+        raise
+    return workdir, env_snapshot, mcp_toolkit, mcp_tools
+
+
+async def _extract_global_memory(
+    task_lock: TaskLock,
+    provider: ProviderConfig,
+    auth_token: str | None,
+    task_id: str,
+    memory_policy: dict[str, object] | None,
+    prefetch_task: asyncio.Task,
+) -> None:
+    # The conversation now ends with this task's result, so the one extraction call sees the whole exchange.
+    try:
+        extraction = await prefetch_task
+    except Exception:
+        logger.warning("memory_prefetch_failed task_id=%s", task_id, exc_info=True)
+        return
+    if extraction is None:
+        return
+    try:
+        await _generate_global_memory_notes(
+            task_lock,
+            provider,
+            auth_token,
+            policy=memory_policy,
+            extraction=extraction,
+        )
+    except Exception:
+        logger.warning("global_memory_generation_failed task_id=%s", task_id, exc_info=True)
+
+
 async def _run_camel_complex(
     task_lock: TaskLock,
     action,
@@ -102,6 +174,14 @@ async def _run_camel_complex(
     env_snapshot: dict[str, str | None] | None = None
     mcp_toolkit: MCPToolkit | None = None
     skill_engine = get_runtime_skill_engine()
+    # Workdir, tool env and MCP connection do not depend on the plan; overlap them with the LLM calls.
+    tool_runtime_task = asyncio.create_task(_prepare_tool_runtime(action.auth_token, action.project_id))
+    # Fetch existing global notes alongside the LLM calls; extraction itself runs once the result exists.
+    memory_prefetch_task = (
+        asyncio.create_task(_prepare_global_memory_extraction(task_lock, action.auth_token, memory_policy))
+        if memory_generate_enabled
+        else None
+    )
     try:
         if skill_run_state and skill_run_state.active_skills:
             if skill_run_state.query_plan:
@@ -124,68 +204,99 @@ async def _run_camel_complex(
                     "skills": [skill.id for skill in skill_run_state.active_skills],
                 },
             )
-        decompose_parts: list[str] = []
-        decompose_usage: dict | None = None
-        decompose_prompt = build_decomposition_prompt(action.question, context)
-        decompose_messages = [
-            {"role": "system", "content": "You are a task planner. Return only valid JSON."},
-            {"role": "user", "content": decompose_prompt},
-        ]
-        try:
-            async for chunk, usage_update in stream_chat(
-                provider,
-                decompose_messages,
-                extra_params=extra_params,
-            ):
-                if task_lock.stop_requested:
-                    break
-                if chunk:
-                    decompose_parts.append(chunk)
-                    event_stream.emit(
-                        StepEvent.decompose_text,
-                        {
-                            "project_id": action.project_id,
-                            "task_id": action.task_id,
-                            "content": chunk,
-                        },
-                    )
-                if usage_update:
-                    decompose_usage = usage_update
-        except Exception as exc:
+        use_plan_cache = plan_cache_enabled()
+        cached_plan = lookup_plan(action.question, action.project_id, action.task_id) if use_plan_cache else None
+        if cached_plan is not None:
+            task_nodes = cached_plan
             event_stream.emit(
-                StepEvent.error,
-                build_error_event(
-                    str(exc),
-                    stop_reason=StopReason.decomposition_failed.value,
-                ),
+                StepEvent.decompose_text,
+                {
+                    "project_id": action.project_id,
+                    "task_id": action.task_id,
+                    "content": serialize_plan(cached_plan),
+                },
             )
-            event_stream.emit(
-                StepEvent.end,
-                build_error_end(
-                    StopReason.decomposition_failed.value,
-                    "Decomposition failed",
-                ),
+        else:
+            decompose_buf = io.StringIO()
+            decompose_usage: dict | None = None
+            decompose_coalescer = ChunkCoalescer(
+                lambda text: event_stream.emit(
+                    StepEvent.decompose_text,
+                    {
+                        "project_id": action.project_id,
+                        "task_id": action.task_id,
+                        "content": text,
+                    },
+                )
             )
-            if history_id is not None:
-                await update_history(action.auth_token, history_id, {"status": 3})
-            task_lock.status = TaskStatus.done
-            return
+            decompose_instructions, decompose_request = build_decomposition_prompt(action.question, context)
+            decompose_messages = [
+                {
+                    "role": "system",
+                    "content": f"You are a task planner. Return only valid JSON.\n\n{decompose_instructions}",
+                },
+                {"role": "user", "content": decompose_request},
+            ]
+            subtask_parser = IncrementalSubtaskParser(action.task_id)
+            try:
+                async for chunk, usage_update in stream_chat(
+                    provider,
+                    decompose_messages,
+                    extra_params=extra_params,
+                ):
+                    if task_lock.stop_requested:
+                        break
+                    if chunk:
+                        decompose_buf.write(chunk)
+                        decompose_coalescer.add(chunk)
+                        new_nodes = subtask_parser.feed(chunk)
+                        if new_nodes:
+                            # Surface sub-tasks as soon as their JSON objects close instead of at stream end.
+                            decompose_coalescer.flush()
+                            event_stream.emit(
+                                StepEvent.to_sub_tasks,
+                                {
+                                    "project_id": action.project_id,
+                                    "task_id": action.task_id,
+                                    "sub_tasks": [node.to_dict() for node in subtask_parser.tasks],
+                                    "delta_sub_tasks": [node.to_dict() for node in new_nodes],
+                                    "is_final": False,
+                                },
+                            )
+                    if usage_update:
+                        decompose_usage = usage_update
+            except Exception as exc:
+                decompose_coalescer.flush()
+                event_stream.emit_failure(
+                    StopReason.decomposition_failed,
+                    str(exc),
+                    "Decomposition failed",
+                )
+                if history_id is not None:
+                    task_lock.add_pending_write(
+                        asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                    )
+                task_lock.status = TaskStatus.done
+                return
+            decompose_coalescer.flush()
 
-        token_tracker.add(decompose_usage)
+            token_tracker.add(decompose_usage)
 
-        if task_lock.stop_requested:
-            event_stream.emit(StepEvent.turn_cancelled, {"reason": "user_stop"})
-            event_stream.emit(
-                StepEvent.end,
-                build_stopped_end(StopReason.user_stop.value),
-            )
-            if history_id is not None:
-                await update_history(action.auth_token, history_id, {"status": 3})
-            task_lock.status = TaskStatus.stopped
-            return
+            if task_lock.stop_requested:
+                event_stream.emit(StepEvent.turn_cancelled, {"reason": "user_stop"})
+                event_stream.emit(
+                    StepEvent.end,
+                    build_stopped_end(StopReason.user_stop.value),
+                )
+                if history_id is not None:
+                    task_lock.add_pending_write(
+                        asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                    )
+                task_lock.status = TaskStatus.stopped
+                return
 
-        raw_decomposition = "".join(decompose_parts).strip()
-        task_nodes = parse_subtasks(raw_decomposition, action.task_id)
+            raw_decomposition = decompose_buf.getvalue().strip()
+            task_nodes = subtask_parser.finalize(raw_decomposition)
 
         summary_prompt = build_summary_prompt(action.question, task_nodes)
         summary_text, summary_usage = await collect_chat_completion(
@@ -209,28 +320,28 @@ async def _run_camel_complex(
                 project_id=action.project_id,
             )
 
+        sub_task_dicts = [task.to_dict() for task in task_nodes]
         payload = {
             "project_id": action.project_id,
             "task_id": action.task_id,
-            "sub_tasks": [task.to_dict() for task in task_nodes],
-            "delta_sub_tasks": [task.to_dict() for task in task_nodes],
+            "sub_tasks": sub_task_dicts,
+            "delta_sub_tasks": sub_task_dicts,
             "is_final": True,
             "summary_task": summary_text or summary or "",
         }
         event_stream.emit(StepEvent.to_sub_tasks, payload)
 
-        workdir = _resolve_workdir(action.project_id)
-        tool_env = await _load_tool_env(action.auth_token)
-        tool_env["CAMEL_WORKDIR"] = str(workdir)
-        env_snapshot = _apply_env_overrides(tool_env)
-        mcp_toolkit, mcp_tools = await _load_mcp_tools(action.auth_token)
+        workdir, env_snapshot, mcp_toolkit, mcp_tools = await tool_runtime_task
+        # Per-user setting applied by the env overrides above, so read it for every task.
         memory_search_enabled = _env_flag("MEMORY_SEARCH_PAST_CHATS", default=True)
 
+        model_cache: dict[str, Any] = {}
         coordinator_agent = _build_agent(
             provider,
             "You are a coordinating agent that routes work to specialists. Keep decisions concise.",
             str(uuid.uuid4()),
             extra_params=extra_params if native_search_enabled else None,
+            model_cache=model_cache,
         )
         coordinator_agent.agent_name = "coordinator_agent"
         task_agent = _build_agent(
@@ -239,6 +350,7 @@ async def _run_camel_complex(
             str(uuid.uuid4()),
             stream=True,
             extra_params=extra_params if native_search_enabled else None,
+            model_cache=model_cache,
         )
         task_agent.agent_name = "task_agent"
 
@@ -272,10 +384,10 @@ async def _run_camel_complex(
                 active_skills,
                 blocked_tools=blocked_skill_tools,
             )
-        global_base_context = _build_global_base_context(str(workdir), action.project_id)
+        environment_context = _build_environment_context(str(workdir), action.project_id)
         skill_context = build_runtime_skill_context(active_skills)
         if skill_context:
-            global_base_context = f"{global_base_context}{skill_context}"
+            environment_context = f"{environment_context}{skill_context}"
         search_backend = "exa" if search_enabled and not native_search_enabled else None
 
         async def _approval_callback(**payload: Any) -> bool:
@@ -315,13 +427,13 @@ async def _run_camel_complex(
                 search_backend=search_backend,
                 approval_callback=_approval_callback,
             )
-            full_system_prompt = global_base_context + spec.system_prompt
             agent = _build_agent(
                 provider,
-                full_system_prompt,
+                _compose_agent_system_prompt(spec.system_prompt, environment_context),
                 spec.agent_id,
                 tools=tools,
                 extra_params=extra_params if native_search_enabled else None,
+                model_cache=model_cache,
             )
             agent.agent_name = spec.name
             workforce.add_single_agent_worker(spec.description, agent, tool_selection.selected)
@@ -338,11 +450,13 @@ async def _run_camel_complex(
 
         run_task = asyncio.create_task(workforce.start_with_subtasks(camel_subtasks))
         task_lock.add_background_task(run_task)
-        while not run_task.done():
-            if task_lock.stop_requested:
+        stop_wait = asyncio.create_task(task_lock.stop_event.wait())
+        try:
+            done, _ = await asyncio.wait({run_task, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+            if stop_wait in done:
                 workforce.stop_gracefully()
-                break
-            await asyncio.sleep(0.5)
+        finally:
+            stop_wait.cancel()
         await run_task
 
         if task_lock.stop_requested:
@@ -352,7 +466,9 @@ async def _run_camel_complex(
                 build_stopped_end(StopReason.user_stop.value),
             )
             if history_id is not None:
-                await update_history(action.auth_token, history_id, {"status": 3})
+                task_lock.add_pending_write(
+                    asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                )
             task_lock.status = TaskStatus.stopped
             return
 
@@ -366,10 +482,12 @@ async def _run_camel_complex(
         ).strip()
         summary_result = ""
         summary_streamed = False
-        if len(camel_subtasks) > 1:
+        needs_summary = len(camel_subtasks) > 1 and len(final_result) // 4 > _RESULTS_SUMMARY_MIN_TOKENS
+        if needs_summary:
             results_prompt = build_results_summary_prompt(action.question, task_nodes)
             results_usage: dict | None = None
-            summary_parts: list[str] = []
+            summary_buf = io.StringIO()
+            summary_coalescer = ChunkCoalescer(lambda text: event_stream.emit(StepEvent.streaming, {"chunk": text}))
             try:
                 async for chunk, usage_update in stream_chat(
                     provider,
@@ -384,29 +502,24 @@ async def _run_camel_complex(
                         break
                     if chunk:
                         summary_streamed = True
-                        summary_parts.append(chunk)
-                        event_stream.emit(StepEvent.streaming, {"chunk": chunk})
+                        summary_buf.write(chunk)
+                        summary_coalescer.add(chunk)
                     if usage_update:
                         results_usage = usage_update
             except Exception as exc:
-                event_stream.emit(
-                    StepEvent.error,
-                    build_error_event(
-                        str(exc),
-                        stop_reason=StopReason.result_summary_failed.value,
-                    ),
-                )
-                event_stream.emit(
-                    StepEvent.end,
-                    build_error_end(
-                        StopReason.result_summary_failed.value,
-                        "Result summary failed",
-                    ),
+                summary_coalescer.flush()
+                event_stream.emit_failure(
+                    StopReason.result_summary_failed,
+                    str(exc),
+                    "Result summary failed",
                 )
                 if history_id is not None:
-                    await update_history(action.auth_token, history_id, {"status": 3})
+                    task_lock.add_pending_write(
+                        asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                    )
                 task_lock.status = TaskStatus.done
                 return
+            summary_coalescer.flush()
 
             if task_lock.stop_requested:
                 event_stream.emit(StepEvent.turn_cancelled, {"reason": "user_stop"})
@@ -415,22 +528,20 @@ async def _run_camel_complex(
                     build_stopped_end(StopReason.user_stop.value),
                 )
                 if history_id is not None:
-                    await update_history(action.auth_token, history_id, {"status": 3})
+                    task_lock.add_pending_write(
+                        asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+                    )
                 task_lock.status = TaskStatus.stopped
                 return
 
             token_tracker.add(results_usage)
-            summary_result = "".join(summary_parts).strip()
+            summary_result = summary_buf.getvalue().strip()
             if summary_result:
                 final_result = summary_result
+        final_task_summary: str | None = None
         if not task_lock.last_task_summary and final_result:
             task_lock.last_task_summary = final_result
-            await upsert_task_summary(
-                action.auth_token,
-                action.task_id,
-                final_result,
-                project_id=action.project_id,
-            )
+            final_task_summary = final_result
 
         if not final_result:
             final_result = "Task completed."
@@ -439,7 +550,8 @@ async def _run_camel_complex(
             event_stream.emit(StepEvent.streaming, {"chunk": final_result})
 
         if skill_run_state and skill_run_state.active_skills:
-            validation = skill_engine.validate_outputs(
+            validation = await asyncio.to_thread(
+                skill_engine.validate_outputs,
                 run_state=skill_run_state,
                 workdir=workdir,
                 transcript=final_result,
@@ -485,11 +597,14 @@ async def _run_camel_complex(
                         },
                     },
                 )
-                repair = skill_engine.repair_or_fail(
+                repair = await asyncio.to_thread(
+                    skill_engine.repair_or_fail,
                     run_state=skill_run_state,
                     validation=validation,
                     workdir=workdir,
+                    persist=False,
                 )
+                skill_engine.persist_repaired_artifacts(skill_run_state.task_id, repair.artifacts)
                 for artifact in repair.artifacts:
                     event_stream.emit(StepEvent.artifact, artifact)
                 _trace_log(
@@ -503,104 +618,99 @@ async def _run_camel_complex(
                 )
                 if not repair.success:
                     reason = resolve_validation_failure_reason(validation)
-                    event_stream.emit(
-                        StepEvent.error,
-                        build_error_event(
-                            reason,
-                            stop_reason=StopReason.skill_validation_failed.value,
-                            error_type="validation_error",
-                            extra={
-                                "skill_id": primary_skill.id,
-                                "skill_version": primary_skill.version,
-                                "skill_stage": "validation_failed",
-                                "validation": {
-                                    "success": validation.success,
-                                    "issues": validation.issues,
-                                    "expected_contracts": validation.expected_contracts,
-                                },
+                    event_stream.emit_failure(
+                        StopReason.skill_validation_failed,
+                        reason,
+                        reason,
+                        error_type="validation_error",
+                        extra={
+                            "skill_id": primary_skill.id,
+                            "skill_version": primary_skill.version,
+                            "skill_stage": "validation_failed",
+                            "validation": {
+                                "success": validation.success,
+                                "issues": validation.issues,
+                                "expected_contracts": validation.expected_contracts,
                             },
-                        ),
+                        },
                     )
-                    event_stream.emit(
-                        StepEvent.end,
-                        build_error_end(
-                            StopReason.skill_validation_failed.value,
-                            reason,
-                            extra={
-                                "skill_id": primary_skill.id,
-                                "skill_version": primary_skill.version,
-                                "skill_stage": "validation_failed",
-                                "validation": {
-                                    "success": validation.success,
-                                    "issues": validation.issues,
-                                    "expected_contracts": validation.expected_contracts,
-                                },
-                            },
-                        ),
+                    task_lock.add_pending_write(
+                        asyncio.create_task(
+                            finalize_task(
+                                action.auth_token,
+                                history_id=history_id,
+                                history_patch={"status": 3},
+                                task_id=action.task_id,
+                                project_id=action.project_id,
+                                summary=final_task_summary,
+                            )
+                        )
                     )
-                    if history_id is not None:
-                        await update_history(action.auth_token, history_id, {"status": 3})
                     task_lock.status = TaskStatus.done
                     return
 
-        if history_id is not None:
-            await update_history(
-                action.auth_token,
-                history_id,
-                {
-                    "tokens": token_tracker.total_tokens,
-                    "status": 2,
-                    "summary": summary,
-                    "project_name": project_name,
-                },
-            )
-
         event_stream.emit(StepEvent.end, build_completed_end(final_result))
         task_lock.add_conversation("assistant", final_result)
-        await _persist_message(
+        await finalize_task(
             action.auth_token,
-            action.project_id,
-            action.task_id,
-            "assistant",
-            final_result,
-            "task_result",
+            history_id=history_id,
+            history_patch={
+                "tokens": token_tracker.total_tokens,
+                "status": 2,
+                "summary": summary,
+                "project_name": project_name,
+            },
+            task_id=action.task_id,
+            project_id=action.project_id,
+            summary=final_task_summary,
+            message=_build_message_payload(
+                action.project_id,
+                action.task_id,
+                "assistant",
+                final_result,
+                "task_result",
+            ),
         )
-        if memory_generate_enabled:
-            task_lock.add_background_task(
-                asyncio.create_task(
-                    _generate_global_memory_notes(
-                        task_lock,
-                        provider,
-                        action.auth_token,
-                        policy=memory_policy,
-                    )
-                )
+        if memory_prefetch_task is not None:
+            await _extract_global_memory(
+                task_lock, provider, action.auth_token, action.task_id, memory_policy, memory_prefetch_task
             )
+            memory_prefetch_task = None
+        if use_plan_cache and cached_plan is None:
+            store_plan(action.question, action.project_id, task_nodes)
         task_lock.status = TaskStatus.done
     except Exception as exc:
-        event_stream.emit(
-            StepEvent.error,
-            build_error_event(
-                str(exc),
-                stop_reason=StopReason.workforce_execution_failed.value,
-            ),
-        )
-        event_stream.emit(
-            StepEvent.end,
-            build_error_end(
-                StopReason.workforce_execution_failed.value,
-                "Workforce execution failed",
-            ),
+        event_stream.emit_failure(
+            StopReason.workforce_execution_failed,
+            str(exc),
+            "Workforce execution failed",
         )
         if history_id is not None:
-            await update_history(action.auth_token, history_id, {"status": 3})
+            task_lock.add_pending_write(
+                asyncio.create_task(update_history(action.auth_token, history_id, {"status": 3}))
+            )
         task_lock.status = TaskStatus.done
     finally:
-        if mcp_toolkit is not None:
+        if memory_prefetch_task is not None:
+            if not memory_prefetch_task.done():
+                memory_prefetch_task.cancel()
             try:
-                await mcp_toolkit.disconnect()
+                await memory_prefetch_task
+            except asyncio.CancelledError:
+                pass
             except Exception:
+                logger.warning("memory_prefetch_failed task_id=%s", action.task_id, exc_info=True)
+        if env_snapshot is None:
+            if not tool_runtime_task.done():
+                tool_runtime_task.cancel()
+            try:
+                _, env_snapshot, mcp_toolkit, _ = await tool_runtime_task
+            except asyncio.CancelledError:
                 pass
+            except Exception:
+                logger.warning("tool_runtime_setup_failed task_id=%s", action.task_id, exc_info=True)
+        if mcp_toolkit is not None:
+            await release_mcp_toolkit(mcp_toolkit)
         if env_snapshot is not None:
             _restore_env(env_snapshot)
         task_lock.workforce = None
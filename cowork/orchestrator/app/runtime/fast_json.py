@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+def json_loads(data: bytes | bytearray | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_bytes(value: Any, *, sort_keys: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, falling back to stdlib json for types orjson rejects."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(value, option=option)
+        except TypeError:
+            pass
+    return json.dumps(value, ensure_ascii=False, sort_keys=sort_keys).encode("utf-8")
@@ -4,27 +4,20 @@ from pathlib import Path
 import re
 
 
-_STOPWORDS = {
-    "a",
-    "an",
-    "and",
-    "the",
-    "to",
-    "for",
-    "of",
-    "on",
-    "in",
-    "with",
-    "from",
-    "by",
-}
+_STOPWORDS = frozenset({"a", "an", "and", "the", "to", "for", "of", "on", "in", "with", "from", "by"})
+_UPPER_ACRONYMS = frozenset({"ai", "ml", "nlp", "rag", "pdf", "docx"})
+_SUGGEST_UPPER_ACRONYMS = frozenset({"ai", "rag", "nlp"})
+_EXPLICIT_FILENAME_PATTERN = re.compile(r"([A-Za-z0-9 _.-]+\.[A-Za-z0-9]{1,8})")
+_CAMEL_CASE_PATTERN = re.compile(r"[a-z][A-Z]")
+_FILENAME_SEPARATOR_PATTERN = re.compile(r"[\s_\-]+")
+_WORD_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+")
 
 
 def extract_explicit_filenames(question: str) -> set[str]:
     if not question:
         return set()
     candidates = set()
-    for match in re.finditer(r"([A-Za-z0-9 _.-]+\.[A-Za-z0-9]{1,8})", question):
+    for match in _EXPLICIT_FILENAME_PATTERN.finditer(question):
         filename = match.group(1).strip().strip('"`')
         if "/" in filename or "\\" in filename:
             filename = Path(filename).name
@@ -33,11 +26,20 @@ def extract_explicit_filenames(question: str) -> set[str]:
     return candidates
 
 
+def lowercase_suffix(value: str) -> str:
+    # Same result as Path(value).suffix.lower() without building a PurePath.
+    name = value.rstrip("/").rpartition("/")[2]
+    index = name.rfind(".")
+    if 0 < index < len(name) - 1:
+        return name[index:].lower()
+    return ""
+
+
 def is_machine_style_filename(filename: str) -> bool:
     stem = Path(filename).stem
     if not stem:
         return False
-    return "_" in stem or bool(re.search(r"[a-z][A-Z]", stem))
+    return "_" in stem or bool(_CAMEL_CASE_PATTERN.search(stem))
 
 
 def humanize_filename(filename: str) -> str:
@@ -47,16 +49,15 @@ def humanize_filename(filename: str) -> str:
     if not stem:
         return filename
 
-    normalized = stem.replace("_", " ").replace("-", " ")
-    normalized = re.sub(r"\s+", " ", normalized).strip()
-    if not normalized:
-        normalized = "Output"
+    tokens = [token for token in _FILENAME_SEPARATOR_PATTERN.split(stem) if token]
+    if not tokens:
+        tokens = ["Output"]
 
     words = []
-    for token in normalized.split(" "):
+    for token in tokens:
         if token.isupper() and len(token) <= 5:
             words.append(token)
-        elif token.lower() in {"ai", "ml", "nlp", "rag", "pdf", "docx"}:
+        elif token.lower() in _UPPER_ACRONYMS:
             words.append(token.upper())
         else:
             words.append(token.capitalize())
@@ -68,16 +69,20 @@ def suggest_filename(question: str, extension: str, fallback_stem: str = "Output
     if not extension.startswith("."):
         extension = f".{extension}"
 
-    tokens = [
-        token
-        for token in re.findall(r"[A-Za-z0-9]+", question or "")
-        if token.lower() not in _STOPWORDS
-    ]
-    stem_tokens = tokens[:6]
+    stem_tokens: list[str] = []
+    for match in _WORD_TOKEN_PATTERN.finditer(question or ""):
+        token = match.group()
+        lowered = token.lower()
+        if lowered in _STOPWORDS:
+            continue
+        stem_tokens.append(token.upper() if lowered in _SUGGEST_UPPER_ACRONYMS else token.capitalize())
+        if len(stem_tokens) == 6:
+            break
     if not stem_tokens:
-        stem_tokens = [fallback_stem]
-    stem = " ".join(token.upper() if token.lower() in {"ai", "rag", "nlp"} else token.capitalize() for token in stem_tokens)
-    return f"{stem}{extension}"
+        stem_tokens = [
+            fallback_stem.upper() if fallback_stem.lower() in _SUGGEST_UPPER_ACRONYMS else fallback_stem.capitalize()
+        ]
+    return f"{' '.join(stem_tokens)}{extension}"
 
 
 def normalize_filename_for_output(filename: str, explicit_names: set[str]) -> str:
@@ -1,20 +1,36 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import io
+import logging
 import math
 import os
+import random
 import re
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Any, AsyncIterator, Callable
 
 import httpx
 
 from app.clients.core_api import ProviderConfig
+from app.runtime.fast_json import json_dumps_bytes, json_loads
 
 try:
     import tiktoken
 except ImportError:  # pragma: no cover
     tiktoken = None  # type: ignore[assignment]
 
+try:
+    import h2  # noqa: F401 - enables httpx HTTP/2 support when installed
+except ImportError:  # pragma: no cover
+    _HTTP2_AVAILABLE = False
+else:
+    _HTTP2_AVAILABLE = True
+
+logger = logging.getLogger(__name__)
 
 _OPENAI_COMPAT_DEFAULTS: dict[str, str] = {
     "openai": "https://api.openai.com/v1",
@@ -37,14 +53,121 @@ _OPENAI_COMPAT_REQUIRES_ENDPOINT = {
     "openai-compatible-api",
 }
 _ANTHROPIC_NAMES = {"anthropic", "claude"}
-_STREAM_OPTIONS_RETRY_HINTS = ("stream_options", "include_usage")
+_STREAM_OPTIONS_RETRY_HINT_RE = re.compile(rb"stream_options|include_usage", re.IGNORECASE)
 _DEFAULT_TOKEN_ENCODING = "cl100k_base"
 _TOKENIZER_CACHE: dict[str, Any] = {}
 _TOKEN_SPLIT_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
 _DEFAULT_ESTIMATE_HEADROOM = 1.08
 _ANTHROPIC_ESTIMATE_HEADROOM = 1.12
+# SSE payloads at least this large are decoded in a worker thread so one oversized
+# event does not stall every other stream sharing the loop.
+_THREAD_DECODE_BYTES = 16384
+_RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+_MAX_UPSTREAM_RETRIES = 4
+_MAX_RETRY_SLEEP_SECONDS = 30.0
+_RESPONSE_CACHE_TTL_SECONDS = 600.0
+_RESPONSE_CACHE_MAX_ENTRIES = 256
+_RESPONSE_REPLAY_CHUNK_CHARS = 64
+_response_cache: dict[bytes, tuple[float, tuple[str, dict[str, Any] | None]]] = {}
+_llm_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _llm_client
+    if _llm_client is None or _llm_client.is_closed:
+        _llm_client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=64),
+        )
+    return _llm_client
+
+
+async def close_client() -> None:
+    """Call on app shutdown to close the shared LLM httpx client."""
+    global _llm_client
+    if _llm_client is not None and not _llm_client.is_closed:
+        await _llm_client.aclose()
+        _llm_client = None
+
+
+# Header maps are shared between requests for the same key; callers must not mutate them.
+@lru_cache(maxsize=256)
+def _openai_headers(api_key: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+
+@lru_cache(maxsize=256)
+def _anthropic_headers(api_key: str) -> dict[str, str]:
+    return {"x-api-key": api_key, "anthropic-version": "2023-06-01", "Content-Type": "application/json"}
+
+
+@lru_cache(maxsize=256)
+def _gemini_headers(api_key: str) -> dict[str, str]:
+    return {"x-goog-api-key": api_key, "Content-Type": "application/json"}
 
 
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+@asynccontextmanager
+async def _post_stream(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: dict[str, Any],
+    headers: dict[str, str],
+    max_retries: int = _MAX_UPSTREAM_RETRIES,
+) -> AsyncIterator[httpx.Response]:
+    """POST with a streamed response, backing off on throttling and transient upstream errors."""
+    # Serialize once up front; retries resend the same bytes.
+    body = json_dumps_bytes(payload)
+    attempt = 0
+    while True:
+        request = client.build_request("POST", url, content=body, headers=headers)
+        response = await client.send(request, stream=True)
+        if response.status_code not in _RETRYABLE_STATUS_CODES or attempt >= max_retries:
+            break
+        retry_after = _retry_after_seconds(response)
+        await response.aclose()
+        sleep_s = min(
+            retry_after if retry_after is not None else (2**attempt) * 0.5 + random.random(),
+            _MAX_RETRY_SLEEP_SECONDS,
+        )
+        logger.warning(
+            "llm_upstream_retry",
+            extra={"url": url, "status": response.status_code, "attempt": attempt + 1, "sleep_s": round(sleep_s, 3)},
+        )
+        attempt += 1
+        await asyncio.sleep(sleep_s)
+    try:
+        yield response
+    finally:
+        await response.aclose()
+
+
+async def _iter_sse_data(byte_stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield the payload of each SSE ``data:`` line, splitting raw bytes on newlines."""
+    buffer = bytearray()
+    async for chunk in byte_stream:
+        buffer += chunk
+        start = 0
+        while (newline := buffer.find(b"\n", start)) != -1:
+            if buffer.startswith(b"data:", start, newline):
+                yield bytes(buffer[start + 5 : newline]).strip()
+            start = newline + 1
+        del buffer[:start]
+    if buffer.startswith(b"data:"):
+        yield bytes(buffer[5:]).strip()
+
+
+@lru_cache(maxsize=512)
 def _normalize_provider_name(name: str | None) -> str:
     if not name:
         return ""
@@ -187,10 +310,11 @@ def estimate_text_tokens(
     return max(1, int(math.ceil(base_count * multiplier)))
 
 
-def _resolve_openai_base(provider: ProviderConfig) -> str:
-    if provider.endpoint_url:
-        return provider.endpoint_url
-    normalized = _normalize_provider_name(provider.provider_name)
+@lru_cache(maxsize=512)
+def _resolve_openai_base(endpoint_url: str | None, provider_name: str | None) -> str:
+    if endpoint_url:
+        return endpoint_url
+    normalized = _normalize_provider_name(provider_name)
     if normalized in _OPENAI_COMPAT_DEFAULTS:
         return _OPENAI_COMPAT_DEFAULTS[normalized]
     if normalized in _OPENAI_COMPAT_REQUIRES_ENDPOINT:
@@ -198,6 +322,7 @@ def _resolve_openai_base(provider: ProviderConfig) -> str:
     return "https://api.openai.com/v1"
 
 
+@lru_cache(maxsize=512)
 def _resolve_openai_url(endpoint_url: str | None) -> str:
     if not endpoint_url:
         return "https://api.openai.com/v1/chat/completions"
@@ -211,6 +336,7 @@ def _resolve_openai_url(endpoint_url: str | None) -> str:
     return f"{base}/v1/chat/completions"
 
 
+@lru_cache(maxsize=512)
 def _resolve_anthropic_url(endpoint_url: str | None) -> str:
     if not endpoint_url:
         return "https://api.anthropic.com/v1/messages"
@@ -222,9 +348,8 @@ def _resolve_anthropic_url(endpoint_url: str | None) -> str:
     return f"{base}/v1/messages"
 
 
-def _should_retry_without_stream_options(error_text: str) -> bool:
-    lowered = error_text.lower()
-    return any(hint in lowered for hint in _STREAM_OPTIONS_RETRY_HINTS)
+def _should_retry_without_stream_options(error_body: bytes) -> bool:
+    return _STREAM_OPTIONS_RETRY_HINT_RE.search(error_body) is not None
 
 
 def _merge_extra_params(
@@ -242,13 +367,24 @@ def _merge_extra_params(
     return payload
 
 
-def _messages_to_text(messages: list[dict[str, str]]) -> str:
-    parts: list[str] = []
-    for message in messages:
-        role = message.get("role") or "user"
-        content = message.get("content") or ""
-        parts.append(f"{role}: {content}")
-    return "\n".join(parts).strip()
+def _messages_to_responses_input(messages: list[dict[str, str]]) -> list[dict[str, str]]:
+    # Responses accepts chat-style messages with plain-string content for every role.
+    return [
+        {"role": message.get("role") or "user", "content": message.get("content") or ""} for message in messages
+    ]
+
+
+def _split_anthropic_system(
+    messages: list[dict[str, str]],
+) -> tuple[list[dict[str, Any]] | None, list[dict[str, str]]]:
+    # Anthropic takes system text as a top-level field; marking it ephemeral lets the
+    # static instructions at the front of the prompt be served from the prompt cache.
+    system_parts = [message.get("content") or "" for message in messages if message.get("role") == "system"]
+    chat_messages = [message for message in messages if message.get("role") != "system"]
+    system_text = "\n\n".join(part for part in system_parts if part).strip()
+    if not system_text:
+        return None, chat_messages
+    return [{"type": "text", "text": system_text, "cache_control": {"type": "ephemeral"}}], chat_messages
 
 
 def _messages_to_gemini_contents(messages: list[dict[str, str]]) -> list[dict[str, Any]]:
@@ -265,7 +401,8 @@ def _messages_to_gemini_contents(messages: list[dict[str, str]]) -> list[dict[st
     if system_parts:
         system_text = "\n".join(system_parts).strip()
         if contents and contents[0]["role"] == "user":
-            contents[0]["parts"][0]["text"] = f"{system_text}\n\n{contents[0]['parts'][0]['text']}"
+            first_parts = contents[0]["parts"]
+            first_parts[0] = {"text": "\n\n".join((system_text, first_parts[0]["text"]))}
         else:
             contents.insert(0, {"role": "user", "parts": [{"text": system_text}]})
     return contents
@@ -282,6 +419,7 @@ def _should_use_openai_responses(extra_params: dict[str, Any] | None) -> bool:
     return False
 
 
+@lru_cache(maxsize=512)
 def _resolve_openai_responses_url(endpoint_url: str | None) -> str:
     if not endpoint_url:
         return "https://api.openai.com/v1/responses"
@@ -293,17 +431,19 @@ def _resolve_openai_responses_url(endpoint_url: str | None) -> str:
     return f"{base}/v1/responses"
 
 
+@lru_cache(maxsize=512)
 def _resolve_gemini_url(endpoint_url: str | None, model_type: str) -> str:
+    method = ":streamGenerateContent?alt=sse"
     if not endpoint_url:
-        return f"https://generativelanguage.googleapis.com/v1beta/models/{model_type}:generateContent"
+        return f"https://generativelanguage.googleapis.com/v1beta/models/{model_type}{method}"
     base = endpoint_url.rstrip("/")
+    if ":streamGenerateContent" in base:
+        return base if "alt=sse" in base else f"{base}{'&' if '?' in base else '?'}alt=sse"
     if ":generateContent" in base:
-        return base
-    if base.endswith("/v1beta"):
-        return f"{base}/models/{model_type}:generateContent"
+        return base.replace(":generateContent", method, 1)
     if base.endswith("/models"):
-        return f"{base}/{model_type}:generateContent"
-    return f"{base}/models/{model_type}:generateContent"
+        return f"{base}/{model_type}{method}"
+    return f"{base}/models/{model_type}{method}"
 
 
 def _extract_openai_responses_stream_text(event: dict[str, Any]) -> str | None:
@@ -379,20 +519,31 @@ def _extract_gemini_usage(payload: dict[str, Any]) -> dict[str, Any] | None:
     }
 
 
+def _probe_openai_content_shape(choice: dict[str, Any]) -> tuple[str | None, str | None]:
+    content = (choice.get("delta") or {}).get("content")
+    if content:
+        return "delta", content
+    content = choice.get("text")
+    if content:
+        return "text", content
+    content = (choice.get("message") or {}).get("content")
+    if content:
+        return "message", content
+    return None, None
+
+
 async def stream_openai_chat(
     provider: ProviderConfig,
     messages: list[dict[str, str]],
     temperature: float = 0.2,
     extra_params: dict[str, Any] | None = None,
+    stream_usage: bool = False,
 ) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
-    base = _resolve_openai_base(provider)
+    base = _resolve_openai_base(provider.endpoint_url, provider.provider_name)
     if not base:
         raise RuntimeError("Endpoint URL required for OpenAI-compatible provider")
     url = _resolve_openai_url(base)
-    headers = {
-        "Authorization": f"Bearer {provider.api_key}",
-        "Content-Type": "application/json",
-    }
+    headers = _openai_headers(provider.api_key)
     payload: dict[str, Any] = {
         "model": provider.model_type,
         "messages": messages,
@@ -401,41 +552,96 @@ async def stream_openai_chat(
         "stream_options": {"include_usage": True},
     }
     payload = _merge_extra_params(payload, extra_params)
-    async with httpx.AsyncClient(timeout=60) as client:
-        for attempt in range(2):
-            async with client.stream("POST", url, json=payload, headers=headers) as response:
-                if response.status_code >= 400:
-                    body = await response.aread()
-                    text = body.decode("utf-8", "ignore")
-                    if attempt == 0 and _should_retry_without_stream_options(text):
-                        payload = {key: value for key, value in payload.items() if key != "stream_options"}
-                        continue
-                    response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if not line:
-                        continue
-                    if not line.startswith("data:"):
-                        continue
-                    data = line.split(":", 1)[1].strip()
-                    if data == "[DONE]":
-                        return
-                    event = json.loads(data)
-                    if event.get("error"):
-                        raise RuntimeError(event["error"].get("message", "LLM error"))
-                    choices = event.get("choices") or []
-                    if choices:
-                        delta = choices[0].get("delta") or {}
-                        content = delta.get("content")
-                        if not content:
-                            content = choices[0].get("text")
-                        if not content:
-                            content = (choices[0].get("message") or {}).get("content")
-                        if content:
-                            yield content, None
-                    usage = event.get("usage")
-                    if usage:
+    client = _get_client()
+    # Endpoints stick to one chunk shape, so the fallback chain only runs until it finds text.
+    content_shape: str | None = None
+    # Providers may repeat cumulative usage; by default only the final figure is yielded.
+    last_usage: dict[str, Any] | None = None
+    for attempt in range(2):
+        async with _post_stream(client, url, payload, headers) as response:
+            if response.status_code >= 400:
+                body = await response.aread()
+                if attempt == 0 and _should_retry_without_stream_options(body):
+                    payload = {key: value for key, value in payload.items() if key != "stream_options"}
+                    continue
+                response.raise_for_status()
+            async for data in _iter_sse_data(response.aiter_bytes()):
+                if data == b"[DONE]":
+                    break
+                if not data:
+                    continue
+                event = (
+                    json_loads(data) if len(data) < _THREAD_DECODE_BYTES else await asyncio.to_thread(json_loads, data)
+                )
+                if event.get("error"):
+                    raise RuntimeError(event["error"].get("message", "LLM error"))
+                choices = event.get("choices") or []
+                if choices:
+                    choice = choices[0]
+                    if content_shape is None:
+                        content_shape, content = _probe_openai_content_shape(choice)
+                    elif content_shape == "delta":
+                        content = (choice.get("delta") or {}).get("content")
+                    elif content_shape == "text":
+                        content = choice.get("text")
+                    else:
+                        content = (choice.get("message") or {}).get("content")
+                    if content:
+                        yield content, None
+                usage = event.get("usage")
+                if usage:
+                    if stream_usage:
                         yield None, usage
-                return
+                    else:
+                        last_usage = usage
+            if last_usage is not None:
+                yield None, last_usage
+            return
+
+
+# Each handler maps an Anthropic stream event to (text, input_tokens, output_tokens).
+_AnthropicEventResult = tuple[str | None, int | None, int | None]
+
+
+def _anthropic_error(event: dict[str, Any]) -> _AnthropicEventResult:
+    error_detail = event.get("error") or {}
+    raise RuntimeError(error_detail.get("message", "LLM error"))
+
+
+def _anthropic_message_start(event: dict[str, Any]) -> _AnthropicEventResult:
+    usage = (event.get("message") or {}).get("usage") or {}
+    return None, usage.get("input_tokens"), None
+
+
+def _anthropic_content_block_start(event: dict[str, Any]) -> _AnthropicEventResult:
+    return (event.get("content_block") or {}).get("text"), None, None
+
+
+def _anthropic_content_block_delta(event: dict[str, Any]) -> _AnthropicEventResult:
+    return (event.get("delta") or {}).get("text"), None, None
+
+
+def _anthropic_message_delta(event: dict[str, Any]) -> _AnthropicEventResult:
+    return None, None, (event.get("usage") or {}).get("output_tokens")
+
+
+def _anthropic_usage(input_tokens: int | None, output_tokens: int | None) -> dict[str, int]:
+    prompt_tokens = int(input_tokens or 0)
+    completion_tokens = int(output_tokens or 0)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+_ANTHROPIC_EVENT_HANDLERS: dict[str, Callable[[dict[str, Any]], _AnthropicEventResult]] = {
+    "error": _anthropic_error,
+    "message_start": _anthropic_message_start,
+    "content_block_start": _anthropic_content_block_start,
+    "content_block_delta": _anthropic_content_block_delta,
+    "message_delta": _anthropic_message_delta,
+}
 
 
 async def stream_anthropic_chat(
@@ -444,65 +650,44 @@ async def stream_anthropic_chat(
     temperature: float = 0.2,
     max_tokens: int = 1024,
     extra_params: dict[str, Any] | None = None,
+    stream_usage: bool = False,
 ) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
     url = _resolve_anthropic_url(provider.endpoint_url)
-    headers = {
-        "x-api-key": provider.api_key,
-        "anthropic-version": "2023-06-01",
-        "Content-Type": "application/json",
-    }
+    headers = _anthropic_headers(provider.api_key)
+    system_blocks, chat_messages = _split_anthropic_system(messages)
     payload: dict[str, Any] = {
         "model": provider.model_type,
-        "messages": messages,
+        "messages": chat_messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
         "stream": True,
     }
+    if system_blocks:
+        payload["system"] = system_blocks
     input_tokens: int | None = None
     output_tokens: int | None = None
     payload = _merge_extra_params(payload, extra_params)
-    async with httpx.AsyncClient(timeout=60) as client:
-        async with client.stream("POST", url, json=payload, headers=headers) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if not line:
-                    continue
-                if not line.startswith("data:"):
-                    continue
-                data = line.split(":", 1)[1].strip()
-                if not data or data == "[DONE]":
-                    continue
-                event = json.loads(data)
-                if event.get("type") == "error":
-                    error_detail = event.get("error") or {}
-                    raise RuntimeError(error_detail.get("message", "LLM error"))
-                event_type = event.get("type")
-                if event_type == "message_start":
-                    usage = (event.get("message") or {}).get("usage") or {}
-                    input_tokens = usage.get("input_tokens")
-                elif event_type == "content_block_start":
-                    content_block = event.get("content_block") or {}
-                    text = content_block.get("text")
-                    if text:
-                        yield text, None
-                elif event_type == "content_block_delta":
-                    delta = event.get("delta") or {}
-                    text = delta.get("text")
-                    if not text and delta.get("type") == "text_delta":
-                        text = delta.get("text")
-                    if text:
-                        yield text, None
-                elif event_type == "message_delta":
-                    usage = event.get("usage") or {}
-                    output_tokens = usage.get("output_tokens", output_tokens)
-                    if output_tokens is not None:
-                        prompt_tokens = int(input_tokens or 0)
-                        completion_tokens = int(output_tokens or 0)
-                        yield None, {
-                            "prompt_tokens": prompt_tokens,
-                            "completion_tokens": completion_tokens,
-                            "total_tokens": prompt_tokens + completion_tokens,
-                        }
+    client = _get_client()
+    async with _post_stream(client, url, payload, headers) as response:
+        response.raise_for_status()
+        async for data in _iter_sse_data(response.aiter_bytes()):
+            if not data or data == b"[DONE]":
+                continue
+            event = json_loads(data) if len(data) < _THREAD_DECODE_BYTES else await asyncio.to_thread(json_loads, data)
+            handler = _ANTHROPIC_EVENT_HANDLERS.get(event.get("type"))
+            if handler is None:
+                continue
+            text, event_input_tokens, event_output_tokens = handler(event)
+            if text:
+                yield text, None
+            if event_input_tokens is not None:
+                input_tokens = event_input_tokens
+            if event_output_tokens is not None:
+                output_tokens = event_output_tokens
+                if stream_usage:
+                    yield None, _anthropic_usage(input_tokens, output_tokens)
+    if output_tokens is not None and not stream_usage:
+        yield None, _anthropic_usage(input_tokens, output_tokens)
 
 
 async def stream_openai_responses(
@@ -510,44 +695,45 @@ async def stream_openai_responses(
     messages: list[dict[str, str]],
     temperature: float = 0.2,
     extra_params: dict[str, Any] | None = None,
+    stream_usage: bool = False,
 ) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
-    base = _resolve_openai_base(provider)
+    base = _resolve_openai_base(provider.endpoint_url, provider.provider_name)
     if not base:
         raise RuntimeError("Endpoint URL required for OpenAI-compatible provider")
     url = _resolve_openai_responses_url(base)
-    headers = {
-        "Authorization": f"Bearer {provider.api_key}",
-        "Content-Type": "application/json",
-    }
+    headers = _openai_headers(provider.api_key)
     payload: dict[str, Any] = {
         "model": provider.model_type,
-        "input": _messages_to_text(messages),
+        "input": _messages_to_responses_input(messages),
         "temperature": temperature,
         "stream": True,
     }
     payload = _merge_extra_params(payload, extra_params, protected_keys={"model", "input"})
     payload["stream"] = True
-    async with httpx.AsyncClient(timeout=60) as client:
-        async with client.stream("POST", url, json=payload, headers=headers) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if not line or not line.startswith("data:"):
-                    continue
-                data = line.split(":", 1)[1].strip()
-                if not data or data == "[DONE]":
-                    continue
-                event = json.loads(data)
-                event_type = event.get("type")
-                if event_type in {"error", "response.failed"}:
-                    error_detail = event.get("error") or {}
-                    message = error_detail.get("message") if isinstance(error_detail, dict) else None
-                    raise RuntimeError(message or "LLM error")
-                text = _extract_openai_responses_stream_text(event)
-                if text:
-                    yield text, None
-                usage = _extract_openai_responses_stream_usage(event)
-                if usage:
+    client = _get_client()
+    last_usage: dict[str, Any] | None = None
+    async with _post_stream(client, url, payload, headers) as response:
+        response.raise_for_status()
+        async for data in _iter_sse_data(response.aiter_bytes()):
+            if not data or data == b"[DONE]":
+                continue
+            event = json_loads(data) if len(data) < _THREAD_DECODE_BYTES else await asyncio.to_thread(json_loads, data)
+            event_type = event.get("type")
+            if event_type in {"error", "response.failed"}:
+                error_detail = event.get("error") or {}
+                message = error_detail.get("message") if isinstance(error_detail, dict) else None
+                raise RuntimeError(message or "LLM error")
+            text = _extract_openai_responses_stream_text(event)
+            if text:
+                yield text, None
+            usage = _extract_openai_responses_stream_usage(event)
+            if usage:
+                if stream_usage:
                     yield None, usage
+                else:
+                    last_usage = usage
+    if last_usage is not None:
+        yield None, last_usage
 
 
 async def stream_gemini_chat(
@@ -557,24 +743,82 @@ async def stream_gemini_chat(
     extra_params: dict[str, Any] | None = None,
 ) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
     url = _resolve_gemini_url(provider.endpoint_url, provider.model_type)
-    headers = {
-        "x-goog-api-key": provider.api_key,
-        "Content-Type": "application/json",
-    }
+    headers = _gemini_headers(provider.api_key)
     payload: dict[str, Any] = {"contents": _messages_to_gemini_contents(messages)}
     if temperature is not None:
         payload["generationConfig"] = {"temperature": temperature}
     payload = _merge_extra_params(payload, extra_params, protected_keys={"contents"})
-    async with httpx.AsyncClient(timeout=60) as client:
-        response = await client.post(url, json=payload, headers=headers)
+    client = _get_client()
+    usage: dict[str, Any] | None = None
+    async with _post_stream(client, url, payload, headers) as response:
         response.raise_for_status()
-        data = response.json()
-    text = _extract_gemini_text(data)
-    usage = _extract_gemini_usage(data)
-    if text:
-        yield text, usage
-    else:
-        yield "", usage
+        async for data in _iter_sse_data(response.aiter_bytes()):
+            if not data:
+                continue
+            event = json_loads(data) if len(data) < _THREAD_DECODE_BYTES else await asyncio.to_thread(json_loads, data)
+            if event.get("error"):
+                raise RuntimeError((event["error"] or {}).get("message", "LLM error"))
+            text = _extract_gemini_text(event)
+            if text:
+                yield text, None
+            # usageMetadata is cumulative, so only the last one matters.
+            usage = _extract_gemini_usage(event) or usage
+    if usage is not None:
+        yield None, usage
+
+
+async def _batch_text(
+    source: AsyncIterator[tuple[str | None, dict[str, Any] | None]],
+    max_chars: int = 256,
+    max_delay: float = 0.02,
+) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
+    # Bounds are checked as chunks arrive rather than with wait_for: cancelling a pending
+    # __anext__ would close the provider generator mid-stream.
+    buf: list[str] = []
+    buf_len = 0
+    started = 0.0
+    async for chunk, usage in source:
+        if chunk:
+            if not buf:
+                started = time.monotonic()
+            buf.append(chunk)
+            buf_len += len(chunk)
+            if buf_len >= max_chars or time.monotonic() - started >= max_delay:
+                yield "".join(buf), None
+                buf.clear()
+                buf_len = 0
+        if usage:
+            if buf:
+                yield "".join(buf), None
+                buf.clear()
+                buf_len = 0
+            yield None, usage
+    if buf:
+        yield "".join(buf), None
+
+
+_STREAM_DISPATCH: dict[str, Callable[..., AsyncIterator[tuple[str | None, dict[str, Any] | None]]]] = {
+    "anthropic": stream_anthropic_chat,
+    "claude": stream_anthropic_chat,
+    "gemini": stream_gemini_chat,
+    "google": stream_gemini_chat,
+}
+
+
+def _provider_stream(
+    provider: ProviderConfig,
+    messages: list[dict[str, str]],
+    temperature: float,
+    extra_params: dict[str, Any] | None,
+) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
+    normalized = _normalize_provider_name(provider.provider_name)
+    stream_fn = _STREAM_DISPATCH.get(normalized)
+    if stream_fn is None:
+        if normalized == "openai" and _should_use_openai_responses(extra_params):
+            stream_fn = stream_openai_responses
+        else:
+            stream_fn = stream_openai_chat
+    return stream_fn(provider, messages, temperature=temperature, extra_params=extra_params)
 
 
 async def stream_chat(
@@ -582,52 +826,76 @@ async def stream_chat(
     messages: list[dict[str, str]],
     temperature: float = 0.2,
     extra_params: dict[str, Any] | None = None,
+    coalesce: bool = True,
 ) -> AsyncIterator[tuple[str | None, dict[str, Any] | None]]:
-    normalized = _normalize_provider_name(provider.provider_name)
-    if normalized in _ANTHROPIC_NAMES:
-        async for chunk, usage in stream_anthropic_chat(
-            provider,
-            messages,
-            temperature=temperature,
-            extra_params=extra_params,
-        ):
-            yield chunk, usage
-        return
-    if normalized in {"gemini", "google"}:
-        async for chunk, usage in stream_gemini_chat(
-            provider,
-            messages,
-            temperature=temperature,
-            extra_params=extra_params,
-        ):
-            yield chunk, usage
-        return
-    if normalized == "openai" and _should_use_openai_responses(extra_params):
-        async for chunk, usage in stream_openai_responses(
-            provider,
-            messages,
-            temperature=temperature,
-            extra_params=extra_params,
-        ):
-            yield chunk, usage
-        return
-    async for chunk, usage in stream_openai_chat(
-        provider,
-        messages,
-        temperature=temperature,
-        extra_params=extra_params,
-    ):
+    source = _provider_stream(provider, messages, temperature, extra_params)
+    if coalesce:
+        source = _batch_text(source)
+    async for chunk, usage in source:
         yield chunk, usage
 
 
+def _response_cache_key(
+    provider: ProviderConfig,
+    messages: list[dict[str, str]],
+    temperature: float,
+    extra_params: dict[str, Any] | None,
+) -> bytes:
+    # The API key scopes entries to one credential, so a completion is never served to another tenant.
+    # Only the digest is kept as the cache key.
+    material = json_dumps_bytes(
+        [
+            provider.provider_name,
+            provider.endpoint_url,
+            provider.api_key,
+            provider.model_type,
+            temperature,
+            messages,
+            extra_params,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.blake2b(material, digest_size=32).digest()
+
+
+def _response_cache_get(key: bytes) -> tuple[str, dict[str, Any] | None] | None:
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, result = entry
+    if time.monotonic() - stored_at >= _RESPONSE_CACHE_TTL_SECONDS:
+        _response_cache.pop(key, None)
+        return None
+    return result
+
+
+def _response_cache_put(key: bytes, result: tuple[str, dict[str, Any] | None]) -> None:
+    if len(_response_cache) >= _RESPONSE_CACHE_MAX_ENTRIES:
+        # Dicts keep insertion order, so the first key is the oldest entry.
+        _response_cache.pop(next(iter(_response_cache)), None)
+    _response_cache[key] = (time.monotonic(), result)
+
+
 async def collect_chat_completion(
     provider: ProviderConfig,
     messages: list[dict[str, str]],
     temperature: float = 0.2,
     on_chunk: Callable[[str], None] | None = None,
     extra_params: dict[str, Any] | None = None,
+    enable_cache: bool = False,
 ) -> tuple[str, dict[str, Any] | None]:
-    content_parts: list[str] = []
+    cache_key: bytes | None = None
+    if enable_cache:
+        cache_key = _response_cache_key(provider, messages, temperature, extra_params)
+        cached = _response_cache_get(cache_key)
+        if cached is not None:
+            text, _ = cached
+            if on_chunk:
+                for start in range(0, len(text), _RESPONSE_REPLAY_CHUNK_CHARS):
+                    on_chunk(text[start : start + _RESPONSE_REPLAY_CHUNK_CHARS])
+            # A replay spends no tokens, so it reports no usage for callers that total it.
+            return text, None
+    content_buf = io.StringIO()
     usage: dict[str, Any] | None = None
     async for chunk, usage_update in stream_chat(
         provider,
@@ -636,9 +904,12 @@ async def collect_chat_completion(
         extra_params=extra_params,
     ):
         if chunk:
-            content_parts.append(chunk)
+            content_buf.write(chunk)
             if on_chunk:
                 on_chunk(chunk)
         if usage_update:
             usage = usage_update
-    return "".join(content_parts).strip(), usage
+    result = content_buf.getvalue().strip(), usage
+    if cache_key is not None and result[0]:
+        _response_cache_put(cache_key, result)
+    return result
@@ -1,33 +1,60 @@
+import asyncio
 import threading
+from dataclasses import dataclass, field
 
 from app.runtime.task_lock import TaskLock
 
-_locks: dict[str, TaskLock] = {}
-_remembered_approvals_by_project: dict[str, set[str]] = {}
-_lock = threading.Lock()
+_STRIPES = 32
+
+
+@dataclass
+class _Shard:
+    locks: dict[str, TaskLock] = field(default_factory=dict)
+    remembered_approvals_by_project: dict[str, set[str]] = field(default_factory=dict)
+    mutex: threading.Lock = field(default_factory=threading.Lock)
+
+
+_shards = [_Shard() for _ in range(_STRIPES)]
+
+
+def _shard_for(project_id: str) -> _Shard:
+    return _shards[hash(project_id) % _STRIPES]
 
 
 def get_or_create(project_id: str) -> TaskLock:
-    with _lock:
-        if project_id not in _locks:
-            remembered = set(_remembered_approvals_by_project.get(project_id, set()))
-            _locks[project_id] = TaskLock(
+    shard = _shard_for(project_id)
+    existing = shard.locks.get(project_id)
+    if existing is not None:
+        return existing
+    with shard.mutex:
+        if project_id not in shard.locks:
+            remembered = set(shard.remembered_approvals_by_project.get(project_id, set()))
+            shard.locks[project_id] = TaskLock(
                 project_id=project_id,
                 remembered_approvals=remembered,
             )
-        return _locks[project_id]
+        return shard.locks[project_id]
 
 
 def get(project_id: str) -> TaskLock | None:
-    return _locks.get(project_id)
+    return _shard_for(project_id).locks.get(project_id)
 
 
 def remove(project_id: str) -> None:
-    with _lock:
-        lock = _locks.pop(project_id, None)
+    shard = _shard_for(project_id)
+    with shard.mutex:
+        lock = shard.locks.pop(project_id, None)
         if not lock:
             return
         if lock.remembered_approvals:
-            _remembered_approvals_by_project[project_id] = set(lock.remembered_approvals)
+            shard.remembered_approvals_by_project[project_id] = set(lock.remembered_approvals)
         else:
-            _remembered_approvals_by_project.pop(project_id, None)
+            shard.remembered_approvals_by_project.pop(project_id, None)
+
+
+async def flush_pending_writes() -> None:
+    locks: list[TaskLock] = []
+    for shard in _shards:
+        with shard.mutex:
+            locks.extend(shard.locks.values())
+    await asyncio.gather(*(lock.flush_pending_writes() for lock in locks))
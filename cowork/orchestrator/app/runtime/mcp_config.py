@@ -1,17 +1,42 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
 import logging
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
 from camel.toolkits.mcp_toolkit import MCPToolkit
 
 from app.clients.core_api import fetch_mcp_users
 from app.runtime.context import _sanitize_identifier
+from app.runtime.fast_json import json_dumps_bytes, json_loads
 
 
 logger = logging.getLogger(__name__)
 
+_CONFIG_CACHE_MAX_ENTRIES = 128
+_TOOLKIT_TTL_SECONDS = 900.0
+_config_cache: dict[bytes, dict[str, dict]] = {}
+
+
+@dataclass
+class _ToolkitEntry:
+    toolkit: MCPToolkit
+    tools: list
+    connected_at: float
+    leases: int = 0
+    evicted: bool = False
+
+
+_toolkit_cache: dict[tuple[str, bytes], _ToolkitEntry] = {}
+# Every entry that still owns a live connection, including ones evicted while leased.
+_live_toolkits: dict[int, _ToolkitEntry] = {}
+# One connect per key: concurrent cold misses share it instead of each spawning MCP servers.
+_toolkit_connects: dict[tuple[str, bytes], asyncio.Future[_ToolkitEntry | None]] = {}
+_sweep_tasks: set[asyncio.Task] = set()
+
 
 def _normalize_mcp_args(value) -> list[str] | None:
     if value is None:
@@ -20,8 +45,8 @@ def _normalize_mcp_args(value) -> list[str] | None:
         return [str(item) for item in value]
     if isinstance(value, str):
         try:
-            parsed = json.loads(value)
-        except json.JSONDecodeError:
+            parsed = json_loads(value)
+        except ValueError:
             return None
         if isinstance(parsed, list):
             return [str(item) for item in parsed]
@@ -62,17 +87,123 @@ def _build_mcp_config(mcp_users: list[dict[str, object]]) -> dict[str, dict]:
     return {"mcpServers": servers}
 
 
-async def _load_mcp_tools(
-    auth_token: str | None,
-) -> tuple[MCPToolkit | None, list]:
-    mcp_users = await fetch_mcp_users(auth_token)
-    config = _build_mcp_config(mcp_users)
-    if not config.get("mcpServers"):
-        return None, []
+def _config_digest(mcp_users: list[dict[str, object]]) -> bytes:
+    return hashlib.blake2b(json_dumps_bytes(mcp_users, sort_keys=True), digest_size=16).digest()
+
+
+def _cached_mcp_config(digest: bytes, mcp_users: list[dict[str, object]]) -> dict[str, dict]:
+    config = _config_cache.get(digest)
+    if config is None:
+        if len(_config_cache) >= _CONFIG_CACHE_MAX_ENTRIES:
+            _config_cache.pop(next(iter(_config_cache)), None)
+        config = _config_cache[digest] = _build_mcp_config(mcp_users)
+    return config
+
+
+async def _disconnect_quietly(toolkit: MCPToolkit) -> None:
+    try:
+        await toolkit.disconnect()
+    except Exception:
+        # A failed disconnect can leave MCP server subprocesses running; surface it.
+        logger.warning("mcp_toolkit_disconnect_failed", exc_info=True)
+
+
+def _is_fresh(entry: _ToolkitEntry) -> bool:
+    return entry.toolkit.is_connected and time.monotonic() - entry.connected_at < _TOOLKIT_TTL_SECONDS
+
+
+def _evict(key: tuple[str, bytes], entry: _ToolkitEntry) -> MCPToolkit | None:
+    """Drop a cache entry; returns its toolkit when nothing holds a lease on it and it should be disconnected."""
+    if _toolkit_cache.get(key) is entry:
+        _toolkit_cache.pop(key, None)
+    entry.evicted = True
+    if entry.leases == 0:
+        _live_toolkits.pop(id(entry.toolkit), None)
+        return entry.toolkit
+    return None
+
+
+def _evict_expired_toolkits() -> list[MCPToolkit]:
+    idle: list[MCPToolkit] = []
+    for key, entry in list(_toolkit_cache.items()):
+        if not _is_fresh(entry) and (toolkit := _evict(key, entry)) is not None:
+            idle.append(toolkit)
+    return idle
+
+
+async def _disconnect_all(toolkits: list[MCPToolkit]) -> None:
+    for toolkit in toolkits:
+        await _disconnect_quietly(toolkit)
+
+
+def _sweep_expired_toolkits() -> None:
+    idle = _evict_expired_toolkits()
+    if idle:
+        task = asyncio.ensure_future(_disconnect_all(idle))
+        _sweep_tasks.add(task)
+        task.add_done_callback(_sweep_tasks.discard)
+
+
+async def _connect_toolkit(key: tuple[str, bytes], config: dict[str, dict]) -> _ToolkitEntry | None:
     try:
         toolkit = MCPToolkit(config_dict=config, timeout=180)
         await toolkit.connect()
-        return toolkit, toolkit.get_tools()
+        tools = toolkit.get_tools()
     except Exception as exc:
         logger.warning("MCP toolkit unavailable: %s", exc)
+        return None
+    entry = _ToolkitEntry(toolkit=toolkit, tools=tools, connected_at=time.monotonic())
+    _toolkit_cache[key] = entry
+    _live_toolkits[id(toolkit)] = entry
+    return entry
+
+
+async def _load_mcp_tools(
+    auth_token: str | None,
+) -> tuple[MCPToolkit | None, list]:
+    """Return a connected toolkit for the user's MCP servers; hand it back with release_mcp_toolkit."""
+    mcp_users = await fetch_mcp_users(auth_token)
+    digest = _config_digest(mcp_users)
+    config = _cached_mcp_config(digest, mcp_users)
+    if not config.get("mcpServers"):
         return None, []
+    await _disconnect_all(_evict_expired_toolkits())
+    key = (auth_token or "", digest)
+    entry = _toolkit_cache.get(key)
+    if entry is None:
+        pending = _toolkit_connects.get(key)
+        if pending is None:
+            pending = _toolkit_connects[key] = asyncio.ensure_future(_connect_toolkit(key, config))
+            pending.add_done_callback(
+                lambda done, key=key: _toolkit_connects.pop(key) if _toolkit_connects.get(key) is done else None
+            )
+        entry = await asyncio.shield(pending)
+        if entry is None:
+            return None, []
+    entry.leases += 1
+    return entry.toolkit, entry.tools
+
+
+async def release_mcp_toolkit(toolkit: MCPToolkit) -> None:
+    """Give back a toolkit from _load_mcp_tools, disconnecting it once it is evicted and unused."""
+    entry = _live_toolkits.get(id(toolkit))
+    if entry is None:
+        await _disconnect_quietly(toolkit)
+        return
+    entry.leases = max(entry.leases - 1, 0)
+    if entry.evicted and entry.leases == 0:
+        _live_toolkits.pop(id(toolkit), None)
+        await _disconnect_quietly(toolkit)
+    elif entry.leases == 0:
+        # Idle toolkits keep their MCP servers running; reap them once the TTL runs out even if no request comes.
+        remaining = entry.connected_at + _TOOLKIT_TTL_SECONDS - time.monotonic()
+        asyncio.get_running_loop().call_later(max(remaining, 0.0), _sweep_expired_toolkits)
+    await _disconnect_all(_evict_expired_toolkits())
+
+
+async def close_mcp_toolkits() -> None:
+    entries = list(_live_toolkits.values())
+    _toolkit_cache.clear()
+    _live_toolkits.clear()
+    for entry in entries:
+        await _disconnect_quietly(entry.toolkit)
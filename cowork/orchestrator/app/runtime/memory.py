@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
 import os
 import re
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import TypeVar
 
 from app.clients.core_api import (
     ProviderConfig,
-    create_memory_note,
+    create_memory_notes_batch,
     create_message,
     fetch_memory_notes,
     fetch_messages,
@@ -15,18 +20,23 @@ from app.clients.core_api import (
     fetch_thread_summary,
     upsert_thread_summary,
 )
+from app.runtime.fast_json import json_loads
 from app.runtime.llm_client import collect_chat_completion, estimate_text_tokens
 from app.runtime.task_lock import TaskLock
 
 
+_T = TypeVar("_T")
+_inflight: dict[tuple[str | int, ...], asyncio.Future] = {}
 _COMPACTION_KEEP_LAST = 12
 GLOBAL_USER_CONTEXT = "GLOBAL_USER_CONTEXT"
-GLOBAL_MEMORY_CATEGORIES = {
-    "work_context",
-    "personal_context",
-    "tech_stack",
-    "preferences",
-}
+GLOBAL_MEMORY_CATEGORIES = frozenset(
+    {
+        "work_context",
+        "personal_context",
+        "tech_stack",
+        "preferences",
+    }
+)
 _MAX_SECTION_CHARS = 1200
 _MAX_NOTE_COUNT_PER_SECTION = 20
 _MAX_HISTORY_TURNS = 24
@@ -37,6 +47,7 @@ _DEFAULT_MAX_CONTEXT_TOKENS = 25000
 _MIN_COMPACTION_SUMMARY_CHARS = 90
 _STALE_EDIT_KEEP_RECENT = 8
 _INTENT_CRITICAL_LIMIT = 4
+_TOKEN_COUNT_CACHE_MAX_ENTRIES = 512
 _INTENT_CRITICAL_MIN_OVERLAP = 2
 _COMPACTION_INTENT_PRESERVE_LIMIT = 2
 _LOW_VALUE_TOOL_OUTPUT_MIN_CHARS = 300
@@ -293,15 +304,15 @@ def _usage_total(usage: dict | None) -> int:
     return int(usage.get("total_tokens") or 0)
 
 
-def _append_memory_notes(lines: list[str], title: str, notes: list[dict[str, object]]) -> None:
+def _memory_note_lines(title: str, notes: list[dict[str, object]]) -> Iterator[str]:
     if not notes:
         return
-    lines.append(title)
-    pinned = [note for note in notes if note.get("pinned")]
-    other = [note for note in notes if not note.get("pinned")]
+    yield title
+    pinned = (note for note in notes if note.get("pinned"))
+    other = (note for note in notes if not note.get("pinned"))
     budget = _MAX_SECTION_CHARS
     rendered = 0
-    for note in pinned + other:
+    for note in chain(pinned, other):
         if rendered >= _MAX_NOTE_COUNT_PER_SECTION or budget <= 0:
             break
         content = note.get("content", "")
@@ -312,8 +323,8 @@ def _append_memory_notes(lines: list[str], title: str, notes: list[dict[str, obj
             text = text[: max(0, budget - 3)].rstrip() + "..."
         budget -= len(text)
         rendered += 1
-        lines.append(f"- ({label}) {text}")
-    lines.append("")
+        yield f"- ({label}) {text}"
+    yield ""
 
 
 def _trim_text(value: str, limit: int = _MAX_SECTION_CHARS) -> str:
@@ -448,6 +459,24 @@ def _select_history_window(history: list[dict[str, str]]) -> list[dict[str, str]
     return _dedupe_history(users + intent + recent)
 
 
+def _context_lines(task_lock: TaskLock) -> Iterator[str]:
+    if task_lock.thread_summary:
+        yield from ("=== Thread Summary ===", _trim_text(task_lock.thread_summary), "")
+    if task_lock.last_task_summary:
+        yield from ("=== Task Summary ===", _trim_text(task_lock.last_task_summary), "")
+    yield from _memory_note_lines("=== User Preferences ===", task_lock.global_memory_notes)
+    yield from _memory_note_lines("=== Project Context ===", task_lock.memory_notes)
+    if not task_lock.conversation_history:
+        return
+    yield "=== Previous Conversation ==="
+    for entry in _select_history_window(task_lock.conversation_history):
+        role = entry.get("role") or "assistant"
+        content = _trim_text(str(entry.get("content") or ""), limit=1000)
+        yield f"{'Assistant' if role == 'assistant' else role}: {content}"
+    # Trailing empty entry gives the final newline without a second concatenation.
+    yield ""
+
+
 def _build_context(task_lock: TaskLock) -> str:
     if (
         not task_lock.conversation_history
@@ -457,36 +486,11 @@ def _build_context(task_lock: TaskLock) -> str:
         and not task_lock.global_memory_notes
     ):
         return ""
-    lines: list[str] = []
-    if task_lock.thread_summary:
-        lines.extend(
-            [
-                "=== Thread Summary ===",
-                _trim_text(task_lock.thread_summary),
-                "",
-            ]
-        )
-    if task_lock.last_task_summary:
-        lines.extend(
-            [
-                "=== Task Summary ===",
-                _trim_text(task_lock.last_task_summary),
-                "",
-            ]
-        )
-    _append_memory_notes(lines, "=== User Preferences ===", task_lock.global_memory_notes)
-    _append_memory_notes(lines, "=== Project Context ===", task_lock.memory_notes)
+    # Lines are produced lazily and joined once; callers should join, not +=, the result.
+    context = "\n".join(_context_lines(task_lock))
     if not task_lock.conversation_history:
-        return "\n".join(lines).strip() + "\n"
-    lines.append("=== Previous Conversation ===")
-    for entry in _select_history_window(task_lock.conversation_history):
-        role = entry.get("role") or "assistant"
-        content = _trim_text(str(entry.get("content") or ""), limit=1000)
-        if role == "assistant":
-            lines.append(f"Assistant: {content}")
-        else:
-            lines.append(f"{role}: {content}")
-    return "\n".join(lines) + "\n"
+        return context.strip() + "\n"
+    return context
 
 
 def _conversation_length(task_lock: TaskLock) -> int:
@@ -531,47 +535,39 @@ def _context_token_thresholds() -> tuple[int, int]:
     return compaction_trigger_tokens, max_context_tokens
 
 
+# Keyed on a digest so the cache never pins the (possibly large) history and note texts it has counted.
+_token_count_cache: dict[tuple[bytes, str | None, str | None], int] = {}
+
+
+def _cached_text_tokens(text: str, model_name: str | None, provider_name: str | None) -> int:
+    # History entries and notes are re-counted on every budget snapshot; most are unchanged.
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    key = (digest, model_name, provider_name)
+    cached = _token_count_cache.get(key)
+    if cached is not None:
+        return cached
+    tokens = estimate_text_tokens(text, model_name=model_name, provider_name=provider_name)
+    if len(_token_count_cache) >= _TOKEN_COUNT_CACHE_MAX_ENTRIES:
+        _token_count_cache.pop(next(iter(_token_count_cache)), None)
+    _token_count_cache[key] = tokens
+    return tokens
+
+
 def _conversation_tokens(
     task_lock: TaskLock,
     *,
     model_name: str | None = None,
     provider_name: str | None = None,
 ) -> int:
-    total_tokens = 0
+    texts: list[str] = []
     if task_lock.thread_summary:
-        total_tokens += estimate_text_tokens(
-            task_lock.thread_summary,
-            model_name=model_name,
-            provider_name=provider_name,
-        )
+        texts.append(task_lock.thread_summary)
     if task_lock.last_task_summary:
-        total_tokens += estimate_text_tokens(
-            task_lock.last_task_summary,
-            model_name=model_name,
-            provider_name=provider_name,
-        )
-    for note in task_lock.memory_notes:
-        content = note.get("content", "")
-        total_tokens += estimate_text_tokens(
-            str(content),
-            model_name=model_name,
-            provider_name=provider_name,
-        )
-    for note in task_lock.global_memory_notes:
-        content = note.get("content", "")
-        total_tokens += estimate_text_tokens(
-            str(content),
-            model_name=model_name,
-            provider_name=provider_name,
-        )
-    for entry in task_lock.conversation_history:
-        content = entry.get("content", "")
-        total_tokens += estimate_text_tokens(
-            str(content),
-            model_name=model_name,
-            provider_name=provider_name,
-        )
-    return total_tokens
+        texts.append(task_lock.last_task_summary)
+    texts.extend(str(note.get("content", "")) for note in task_lock.memory_notes)
+    texts.extend(str(note.get("content", "")) for note in task_lock.global_memory_notes)
+    texts.extend(str(entry.get("content", "")) for entry in task_lock.conversation_history)
+    return sum(_cached_text_tokens(text, model_name, provider_name) for text in texts)
 
 
 def _context_budget_snapshot(
@@ -653,21 +649,45 @@ async def _hydrate_memory_notes(
     effective_policy = _coerce_memory_policy(policy)
     allowed_categories = set(effective_policy["allowed_categories"])
     min_read_confidence = float(effective_policy["min_read_confidence"])
-    notes = await fetch_memory_notes(auth_token, project_id)
+    if include_global:
+        notes, global_notes = await asyncio.gather(
+            fetch_memory_notes(auth_token, project_id),
+            fetch_memory_notes(auth_token, GLOBAL_USER_CONTEXT),
+        )
+    else:
+        notes, global_notes = await fetch_memory_notes(auth_token, project_id), []
     task_lock.memory_notes = _apply_memory_read_policy(
         [note.model_dump() for note in notes],
         allowed_categories=allowed_categories,
         min_auto_confidence=min_read_confidence,
     )
-    if include_global:
-        global_notes = await fetch_memory_notes(auth_token, GLOBAL_USER_CONTEXT)
-        task_lock.global_memory_notes = _apply_memory_read_policy(
-            [note.model_dump() for note in global_notes],
-            allowed_categories=allowed_categories,
-            min_auto_confidence=min_read_confidence,
-        )
-    else:
-        task_lock.global_memory_notes = []
+    global_dump = [note.model_dump() for note in global_notes]
+    task_lock.global_memory_snapshot = global_dump if include_global else None
+    task_lock.global_memory_notes = _apply_memory_read_policy(
+        global_dump,
+        allowed_categories=allowed_categories,
+        min_auto_confidence=min_read_confidence,
+    )
+
+
+def _render_history(history: list[dict[str, str]]) -> str:
+    return "\n".join(f"{entry.get('role') or 'assistant'}: {entry.get('content') or ''}" for entry in history)
+
+
+async def _single_flight(key: tuple[str | int, ...], factory: Callable[[], Awaitable[_T]]) -> _T:
+    # Overlapping turns share one in-flight LLM call instead of each starting their own.
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[key] = task
+
+        def _forget(done: asyncio.Future) -> None:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+        task.add_done_callback(_forget)
+    # Shielded so one cancelled waiter does not cancel the call for the others.
+    return await asyncio.shield(task)
 
 
 async def _compact_context(
@@ -675,24 +695,36 @@ async def _compact_context(
     provider: ProviderConfig,
     auth_token: str | None,
     project_id: str,
+) -> bool:
+    return await _single_flight(
+        (project_id, "compact"),
+        lambda: _run_compaction(task_lock, provider, auth_token, project_id),
+    )
+
+
+async def _run_compaction(
+    task_lock: TaskLock,
+    provider: ProviderConfig,
+    auth_token: str | None,
+    project_id: str,
 ) -> bool:
     if not task_lock.conversation_history:
         return False
     edited_history = _apply_context_edit_policy(task_lock.conversation_history)
     if not edited_history:
         return False
-    history_lines = []
-    for entry in edited_history:
-        role = entry.get("role") or "assistant"
-        content = entry.get("content") or ""
-        history_lines.append(f"{role}: {content}")
-    history_text = "\n".join(history_lines)
+    # Only messages added since the last compaction need summarizing; the rest is in thread_summary.
+    cursor = min(task_lock.summary_cursor, len(task_lock.conversation_history)) if task_lock.thread_summary else 0
+    new_entries = _apply_context_edit_policy(task_lock.conversation_history[cursor:])
+    if not new_entries:
+        return False
+    history_text = _render_history(new_entries)
     prompt = f"""Summarize the conversation for long-term memory.
 
 Existing summary (if any):
 {task_lock.thread_summary or "None"}
 
-Conversation:
+New messages since that summary:
 {history_text}
 
 Return a concise summary with sections:
@@ -720,51 +752,151 @@ Return a concise summary with sections:
     task_lock.thread_summary = summary_text
     await upsert_thread_summary(auth_token, project_id, summary_text)
     task_lock.conversation_history = _compaction_retained_history(edited_history)
+    task_lock.summary_cursor = len(task_lock.conversation_history)
     return True
 
 
-async def _generate_global_memory_notes(
+@dataclass(frozen=True)
+class _MemoryExtraction:
+    existing_text: str
+    existing_contents: frozenset[str]
+    allowed_categories: frozenset[str]
+    min_auto_confidence: float
+    retention_days: int
+    max_auto_notes_per_run: int
+
+
+async def _prepare_global_memory_extraction(
     task_lock: TaskLock,
-    provider: ProviderConfig,
     auth_token: str | None,
     policy: dict[str, object] | None = None,
-) -> None:
+) -> _MemoryExtraction | None:
     if not auth_token or not task_lock.conversation_history:
-        return
+        return None
     effective_policy = _coerce_memory_policy(policy)
     if not bool(effective_policy.get("auto_write_enabled", True)):
-        return
-    allowed_categories = set(effective_policy["allowed_categories"])
-    min_auto_confidence = float(effective_policy["min_auto_confidence"])
-    retention_days = int(effective_policy["retention_days"])
-    max_auto_notes_per_run = int(effective_policy["max_auto_notes_per_run"])
-    existing_notes = await fetch_memory_notes(auth_token, GLOBAL_USER_CONTEXT)
-    existing_dump = [note.model_dump() for note in existing_notes]
-    existing_contents = {
+        return None
+    # Hydration already loaded the global notes this turn; only fetch when it did not.
+    existing_dump = task_lock.global_memory_snapshot
+    if existing_dump is None:
+        existing_notes = await fetch_memory_notes(auth_token, GLOBAL_USER_CONTEXT)
+        existing_dump = task_lock.global_memory_snapshot = [note.model_dump() for note in existing_notes]
+    existing_contents = frozenset(
         str(note.get("content", "")).strip().lower()
         for note in existing_dump
         if note.get("content")
-    }
+    )
     existing_text = "\n".join(
         f"- ({note.get('category', 'note')}) {note.get('content', '')}"
         for note in existing_dump
         if note.get("content")
     ) or "None"
-    history_lines = []
-    for entry in task_lock.conversation_history:
-        role = entry.get("role") or "assistant"
-        content = entry.get("content") or ""
-        history_lines.append(f"{role}: {content}")
-    history_text = "\n".join(history_lines)
-    allowed_categories_text = ", ".join(sorted(allowed_categories))
+    return _MemoryExtraction(
+        existing_text=existing_text,
+        existing_contents=existing_contents,
+        allowed_categories=frozenset(effective_policy["allowed_categories"]),
+        min_auto_confidence=float(effective_policy["min_auto_confidence"]),
+        retention_days=int(effective_policy["retention_days"]),
+        max_auto_notes_per_run=int(effective_policy["max_auto_notes_per_run"]),
+    )
+
+
+async def _store_global_memory_notes(
+    task_lock: TaskLock,
+    auth_token: str | None,
+    items: object,
+    extraction: _MemoryExtraction,
+) -> None:
+    if not isinstance(items, list):
+        return
+    seen: set[str] = set()
+    to_create: list[dict[str, object]] = []
+    # Loop invariants are bound once; the model can return dozens of candidates.
+    allowed_categories = extraction.allowed_categories
+    min_confidence = extraction.min_auto_confidence
+    existing_contents = extraction.existing_contents
+    max_notes = extraction.max_auto_notes_per_run
+    expires_at = _memory_expiry_iso(extraction.retention_days)
+    task_id = task_lock.current_task_id
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        content = str(item.get("content") or "").strip()
+        if not content:
+            continue
+        category = str(item.get("category") or "").strip().lower()
+        if category not in allowed_categories:
+            continue
+        confidence = _note_confidence(item, default=0.0)
+        if confidence < min_confidence:
+            continue
+        if _contains_sensitive_memory(content):
+            continue
+        norm = content.lower()
+        if norm in existing_contents or norm in seen:
+            continue
+        if len(to_create) >= max_notes:
+            break
+        seen.add(norm)
+        reason = str(item.get("reason") or "").strip()
+        note_payload = {
+            "project_id": GLOBAL_USER_CONTEXT,
+            "category": category,
+            "content": content,
+            "pinned": False,
+            "confidence": confidence,
+            "auto_generated": True,
+            "expires_at": expires_at,
+            "provenance": {
+                "source": "assistant_auto",
+                "task_id": task_id,
+                "reason": reason[:240] if reason else "",
+            },
+        }
+        to_create.append(note_payload)
+    if not to_create:
+        return
+    await create_memory_notes_batch(auth_token, to_create)
+    if task_lock.global_memory_snapshot is not None:
+        task_lock.global_memory_snapshot.extend(to_create)
+
+
+async def _generate_global_memory_notes(
+    task_lock: TaskLock,
+    provider: ProviderConfig,
+    auth_token: str | None,
+    policy: dict[str, object] | None = None,
+    extraction: _MemoryExtraction | None = None,
+) -> None:
+    # Keyed on the history length too: a later turn must not join an extraction that predates its messages.
+    await _single_flight(
+        (task_lock.project_id, "notes", len(task_lock.conversation_history)),
+        lambda: _run_global_memory_generation(task_lock, provider, auth_token, policy, extraction),
+    )
+
+
+async def _run_global_memory_generation(
+    task_lock: TaskLock,
+    provider: ProviderConfig,
+    auth_token: str | None,
+    policy: dict[str, object] | None,
+    extraction: _MemoryExtraction | None = None,
+) -> None:
+    # A prefetched extraction carries the existing notes and policy; the conversation is rendered here so it
+    # includes everything added since the prefetch.
+    if extraction is None:
+        extraction = await _prepare_global_memory_extraction(task_lock, auth_token, policy)
+    if extraction is None:
+        return
+    allowed_categories_text = ", ".join(sorted(extraction.allowed_categories))
     prompt = f"""You are the Memory Manager. Your goal is to update the `GLOBAL_USER_CONTEXT` based on the conversation that just finished.
 
 <existing_memory>
-{existing_text}
+{extraction.existing_text}
 </existing_memory>
 
 <conversation_log>
-{history_text}
+{_render_history(task_lock.conversation_history)}
 </conversation_log>
 
 <instructions>
@@ -788,64 +920,21 @@ async def _generate_global_memory_notes(
     if not response_text:
         return
     try:
-        payload = json.loads(response_text)
-    except json.JSONDecodeError:
-        return
-    if not isinstance(payload, list):
+        payload = json_loads(response_text)
+    except ValueError:
         return
-    seen = set()
-    created = 0
-    for item in payload:
-        if not isinstance(item, dict):
-            continue
-        content = str(item.get("content") or "").strip()
-        category = str(item.get("category") or "").strip().lower()
-        confidence = _note_confidence(item, default=0.0)
-        reason = str(item.get("reason") or "").strip()
-        if not content:
-            continue
-        if category not in allowed_categories:
-            continue
-        if confidence < min_auto_confidence:
-            continue
-        if _contains_sensitive_memory(content):
-            continue
-        norm = content.lower()
-        if norm in existing_contents or norm in seen:
-            continue
-        if created >= max_auto_notes_per_run:
-            break
-        seen.add(norm)
-        await create_memory_note(
-            auth_token,
-            {
-                "project_id": GLOBAL_USER_CONTEXT,
-                "category": category,
-                "content": content,
-                "pinned": False,
-                "confidence": confidence,
-                "auto_generated": True,
-                "expires_at": _memory_expiry_iso(retention_days),
-                "provenance": {
-                    "source": "assistant_auto",
-                    "task_id": task_lock.current_task_id,
-                    "reason": reason[:240] if reason else "",
-                },
-            },
-        )
-        created += 1
+    await _store_global_memory_notes(task_lock, auth_token, payload, extraction)
 
 
-async def _persist_message(
-    auth_token: str | None,
+def _build_message_payload(
     project_id: str,
     task_id: str,
     role: str,
     content: str,
     message_type: str,
     metadata: dict | None = None,
-) -> None:
-    payload = {
+) -> dict:
+    return {
         "project_id": project_id,
         "task_id": task_id,
         "role": role,
@@ -853,4 +942,16 @@ async def _persist_message(
         "message_type": message_type,
         "metadata": metadata,
     }
+
+
+async def _persist_message(
+    auth_token: str | None,
+    project_id: str,
+    task_id: str,
+    role: str,
+    content: str,
+    message_type: str,
+    metadata: dict | None = None,
+) -> None:
+    payload = _build_message_payload(project_id, task_id, role, content, message_type, metadata)
     await create_message(auth_token, payload)
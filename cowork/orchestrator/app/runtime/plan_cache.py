@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from app.runtime.config_helpers import _env_flag
+from app.runtime.workforce import TaskNode
+
+_PLAN_CACHE_MAX_ENTRIES = 256
+_PLAN_CACHE_TTL_SECONDS = 6 * 60 * 60
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_plans: OrderedDict[tuple[str, str], tuple[float, list[dict[str, str | None]]]] = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def plan_cache_enabled() -> bool:
+    return _env_flag("PLAN_CACHE_ENABLED", default=False)
+
+
+def _plan_key(question: str, project_id: str) -> tuple[str, str]:
+    normalized = _WHITESPACE_PATTERN.sub(" ", question).strip().lower()
+    return project_id, hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def lookup_plan(question: str, project_id: str, task_id: str) -> list[TaskNode] | None:
+    key = _plan_key(question, project_id)
+    with _plans_lock:
+        entry = _plans.get(key)
+        if entry is None:
+            return None
+        created_at, nodes = entry
+        if time.monotonic() - created_at > _PLAN_CACHE_TTL_SECONDS:
+            _plans.pop(key, None)
+            return None
+        _plans.move_to_end(key)
+    return [
+        TaskNode(id=f"{task_id}.{index}", content=str(node["content"]), assigned_role=node.get("assigned_role"))
+        for index, node in enumerate(nodes, start=1)
+    ]
+
+
+def store_plan(question: str, project_id: str, task_nodes: list[TaskNode]) -> None:
+    if not task_nodes:
+        return
+    nodes = [{"content": node.content, "assigned_role": node.assigned_role} for node in task_nodes]
+    key = _plan_key(question, project_id)
+    with _plans_lock:
+        _plans[key] = (time.monotonic(), nodes)
+        _plans.move_to_end(key)
+        while len(_plans) > _PLAN_CACHE_MAX_ENTRIES:
+            _plans.popitem(last=False)
+
+
+def serialize_plan(task_nodes: list[TaskNode]) -> str:
+    """Render a cached plan in the same JSON-array shape the planner streams."""
+    return json.dumps(
+        [
+            {"id": node.id, "content": node.content, "assigned_role": node.assigned_role}
+            for node in task_nodes
+        ]
+    )
+
+
+def clear_plan_cache() -> None:
+    with _plans_lock:
+        _plans.clear()
@@ -3,63 +3,54 @@ from __future__ import annotations
 import re
 from typing import Any
 
+# One alternation so a single scan finds both bare URLs and [Source: ...] markers, in text order.
+_CITATION_RE = re.compile(r"(?P<url>https?://[^\s\])>\"']+)|(?i:\[Source:\s*(?P<src>[^\]]+)\])")
+
 
 def expand_queries(question: str) -> list[str]:
     normalized = (question or "").strip()
     if not normalized:
         return []
 
+    # Substring checks (not token sets) so "papers" and "benchmarking" still count.
+    lowered = normalized.lower()
     candidates = [normalized]
-    if "paper" in normalized.lower():
+    if "paper" in lowered:
         candidates.append(f"{normalized} abstract methodology key findings")
-    if "latest" not in normalized.lower():
+    if "latest" not in lowered:
         candidates.append(f"{normalized} latest updates")
-    if "benchmark" not in normalized.lower():
+    if "benchmark" not in lowered:
         candidates.append(f"{normalized} benchmarks and results")
 
-    deduped: list[str] = []
-    seen = set()
+    deduped: dict[str, str] = {}
     for candidate in candidates:
-        key = candidate.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(candidate)
-    return deduped
+        deduped.setdefault(candidate.lower(), candidate)
+    return list(deduped.values())
 
 
 def dedupe_sources(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    deduped: list[dict[str, Any]] = []
-    seen = set()
+    # setdefault keeps the first row per key, in input order.
+    deduped: dict[str, dict[str, Any]] = {}
     for row in results:
-        url = str(row.get("url") or "").strip().lower()
-        title = str(row.get("title") or row.get("text") or "").strip().lower()
-        key = url or title
-        if not key or key in seen:
-            continue
-        seen.add(key)
-        deduped.append(row)
-    return deduped
+        key = (
+            str(row.get("url") or "").strip().lower()
+            or str(row.get("title") or row.get("text") or "").strip().lower()
+        )
+        if key:
+            deduped.setdefault(key, row)
+    return list(deduped.values())
 
 
 def extract_citations(text: str) -> list[str]:
     if not text:
         return []
-    urls = re.findall(r"https?://[^\s\])>\"']+", text)
-    bracketed = re.findall(r"\[Source:\s*([^\]]+)\]", text, re.IGNORECASE)
-    combined = urls + bracketed
-    deduped: list[str] = []
-    seen = set()
-    for item in combined:
-        normalized = item.strip()
-        if not normalized:
-            continue
-        key = normalized.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(normalized)
-    return deduped
+    # Keyed by lowercase form; setdefault keeps the first spelling and insertion order.
+    deduped: dict[str, str] = {}
+    for match in _CITATION_RE.finditer(text):
+        normalized = (match.group("url") or match.group("src")).strip()
+        if normalized:
+            deduped.setdefault(normalized.lower(), normalized)
+    return list(deduped.values())
 
 
 def should_retry_search(result_payload: Any) -> bool:
@@ -1,62 +1,172 @@
 from __future__ import annotations
 
 import re
-from pathlib import Path
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
 
 from app.clients.core_api import SkillEntry
+from app.runtime.file_naming import lowercase_suffix
 from app.runtime.skills_schema import RuntimeSkill
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover
+    ahocorasick = None  # type: ignore[assignment]
+
 _QUESTION_EXTENSION_PATTERN = re.compile(r"\.[a-zA-Z0-9]{1,8}\b")
 
 
+def _probe_payload(attachment: object) -> dict[str, Any] | None:
+    if isinstance(attachment, dict):
+        return attachment
+    if hasattr(attachment, "model_dump"):
+        return attachment.model_dump()  # type: ignore[attr-defined]
+    if hasattr(attachment, "dict"):
+        return attachment.dict()  # type: ignore[attr-defined]
+    return None
+
+
+def _payload_dumper(kind: type) -> Callable[[Any], dict[str, Any] | None]:
+    if issubclass(kind, dict):
+        return lambda attachment: attachment
+    if callable(getattr(kind, "model_dump", None)):
+        return lambda attachment: attachment.model_dump()
+    if callable(getattr(kind, "dict", None)):
+        return lambda attachment: attachment.dict()
+    # Types without class-level dump methods may still carry them per instance.
+    return _probe_payload
+
+
+_payload_dumpers: dict[type, Callable[[Any], dict[str, Any] | None]] = {}
+
+
+def attachment_payload(attachment: object) -> dict[str, Any] | None:
+    """Dict view of an attachment (dict, pydantic model or object with ``dict()``), else None."""
+    kind = type(attachment)
+    dumper = _payload_dumpers.get(kind)
+    if dumper is None:
+        dumper = _payload_dumpers[kind] = _payload_dumper(kind)
+    return dumper(attachment)
+
+
 def extensions_for_skill_detection(question: str, attachments: list[object] | None) -> set[str]:
-    question_extensions = {ext.lower() for ext in _QUESTION_EXTENSION_PATTERN.findall(question or "")}
+    question_extensions = set(map(str.lower, _QUESTION_EXTENSION_PATTERN.findall(question or "")))
     attachment_extensions: set[str] = set()
     for attachment in attachments or []:
-        payload: dict[str, object] | None = None
-        if isinstance(attachment, dict):
-            payload = attachment
-        elif hasattr(attachment, "model_dump"):
-            payload = attachment.model_dump()  # type: ignore[attr-defined]
-        elif hasattr(attachment, "dict"):
-            payload = attachment.dict()  # type: ignore[attr-defined]
+        payload = attachment_payload(attachment)
         if not payload:
             continue
         for key in ("name", "path"):
             value = payload.get(key)
             if not isinstance(value, str):
                 continue
-            suffix = Path(value).suffix.lower()
+            suffix = lowercase_suffix(value)
             if suffix:
                 attachment_extensions.add(suffix)
     return question_extensions | attachment_extensions
 
 
+@lru_cache(maxsize=1024)
+def _normalized_triggers(
+    keywords: tuple[str, ...],
+    extensions: tuple[str, ...],
+) -> tuple[tuple[str, ...], frozenset[str]]:
+    return tuple(keyword.lower() for keyword in keywords), frozenset(extension.lower() for extension in extensions)
+
+
 def catalog_skill_matches_request(
     catalog_skill: SkillEntry,
     question: str,
-    extension_set: set[str],
+    extension_set: set[str] | frozenset[str],
+    *,
+    question_lower: str | None = None,
 ) -> bool:
+    keywords = catalog_skill.trigger_keywords or []
+    extensions = catalog_skill.trigger_extensions or []
     # Backward compatibility: previously uploaded custom skills may not have
     # discovery metadata yet. Keep them eligible for runtime loading.
-    if (
-        catalog_skill.source == "custom"
-        and not (catalog_skill.trigger_keywords or [])
-        and not (catalog_skill.trigger_extensions or [])
-    ):
+    if catalog_skill.source == "custom" and not keywords and not extensions:
         return True
 
-    question_text = (question or "").lower()
-    keyword_match = any(keyword.lower() in question_text for keyword in (catalog_skill.trigger_keywords or []))
-    extension_match = any(
-        extension.lower() in extension_set for extension in (catalog_skill.trigger_extensions or [])
+    if question_lower is None:
+        question_lower = (question or "").lower()
+    lowered_keywords, lowered_extensions = _normalized_triggers(tuple(keywords), tuple(extensions))
+    if any(keyword in question_lower for keyword in lowered_keywords):
+        return True
+    return not lowered_extensions.isdisjoint(extension_set)
+
+
+class SkillMatcher:
+    """Keyword and extension index over a catalog; keywords are found in one scan of the question."""
+
+    def __init__(self, triggers: tuple[tuple[tuple[str, ...], tuple[str, ...]], ...]) -> None:
+        self._keyword_owners: dict[str, list[int]] = {}
+        self.extensions: list[frozenset[str]] = []
+        for index, (keywords, extensions) in enumerate(triggers):
+            lowered_keywords, lowered_extensions = _normalized_triggers(keywords, extensions)
+            for keyword in lowered_keywords:
+                if keyword:
+                    self._keyword_owners.setdefault(keyword, []).append(index)
+            self.extensions.append(lowered_extensions)
+        self._automaton = None
+        if ahocorasick is not None and self._keyword_owners:
+            automaton = ahocorasick.Automaton()
+            for keyword in self._keyword_owners:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def keyword_hits(self, question_lower: str) -> set[int]:
+        if self._automaton is not None:
+            found = {keyword for _, keyword in self._automaton.iter(question_lower)}
+        else:
+            # Without pyahocorasick, each distinct keyword is still scanned only once per question.
+            found = {keyword for keyword in self._keyword_owners if keyword in question_lower}
+        return {index for keyword in found for index in self._keyword_owners[keyword]}
+
+
+@lru_cache(maxsize=32)
+def _skill_matcher(triggers: tuple[tuple[tuple[str, ...], tuple[str, ...]], ...]) -> SkillMatcher:
+    return SkillMatcher(triggers)
+
+
+def match_catalog_skills(
+    question: str,
+    catalog_skills: list[SkillEntry],
+    extension_set: set[str] | frozenset[str],
+    *,
+    question_lower: str | None = None,
+) -> list[SkillEntry]:
+    triggers = tuple(
+        (tuple(entry.trigger_keywords or ()), tuple(entry.trigger_extensions or ())) for entry in catalog_skills
     )
-    return keyword_match or extension_match
+    # Rebuilt only when the catalog's triggers change.
+    matcher = _skill_matcher(triggers)
+    if question_lower is None:
+        question_lower = (question or "").lower()
+    hits = matcher.keyword_hits(question_lower)
+    matched: list[SkillEntry] = []
+    for index, entry in enumerate(catalog_skills):
+        keywords, extensions = triggers[index]
+        if (
+            index in hits
+            or not matcher.extensions[index].isdisjoint(extension_set)
+            or (entry.source == "custom" and not keywords and not extensions)
+        ):
+            matched.append(entry)
+    return matched
+
+
+def enabled_skill_ids(available_skills: list[SkillEntry]) -> frozenset[str]:
+    return frozenset(item.skill_id for item in available_skills if item.enabled and item.skill_id)
 
 
 def filter_enabled_runtime_skills(
     detected_skills: list[RuntimeSkill],
     available_skills: list[SkillEntry] | None = None,
+    *,
+    enabled_ids: frozenset[str] | None = None,
 ) -> list[RuntimeSkill]:
     if not detected_skills:
         return []
@@ -64,11 +174,8 @@ def filter_enabled_runtime_skills(
         return detected_skills
     if not available_skills:
         return []
-    enabled_ids = {
-        item.skill_id
-        for item in available_skills
-        if item.enabled and item.skill_id
-    }
+    if enabled_ids is None:
+        enabled_ids = enabled_skill_ids(available_skills)
     if not enabled_ids:
         return []
     return [skill for skill in detected_skills if skill.id in enabled_ids]
@@ -13,21 +13,29 @@ from urllib.parse import parse_qs, quote, unquote, urlparse
 
 from shared.schemas import ArtifactEvent
 
+from app.runtime.artifacts import artifact_id_digest
 from app.runtime.file_naming import (
     extract_explicit_filenames,
+    lowercase_suffix,
     normalize_filename_for_output,
     suggest_filename,
 )
 from app.runtime.research_pipeline import dedupe_sources, expand_queries
+from app.runtime.skill_catalog_matching import attachment_payload
 from app.runtime.skill_validators import SkillValidationResult, validate_skill_contract
 from app.runtime.skills_schema import RuntimeSkill, load_skill_packs
-from app.runtime.sync import fire_and_forget_artifact
+from app.runtime.sync import fire_and_forget_artifacts
 from app.runtime.tool_context import current_request_id
 
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover
+    hyperscan = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 _MAX_REFERENCED_CONTENT_CHARS = 1200
 _SEMANTIC_MIN_SCORE = 0.24
+_DETECT_CACHE_MAX_ENTRIES = 256
 _SEMANTIC_TOKEN_PATTERN = re.compile(r"[a-zA-Z0-9]{4,}")
 _SEMANTIC_STOPWORDS = {
     "this",
@@ -115,28 +123,49 @@ _SEMANTIC_EXPLICIT_TOKENS_BY_SKILL: dict[str, set[str]] = {
     "spreadsheet_v1": {"spreadsheet", "excel", "xlsx", "csv", "tsv"},
 }
 
-_FILE_DELIVERABLE_INTENT = re.compile(
-    r"\b(create|build|generate|draft|prepare|save|export|write)\b.*\b(file|document|doc|report|deck|slides?|spreadsheet|sheet|pdf|docx|pptx|xlsx)\b",
+# A deliverable verb followed later on the same line by a deliverable noun. The two halves are searched
+# separately so a non-matching question is not backtracked through with ".*".
+_DELIVERABLE_VERB_PATTERN = re.compile(
+    r"\b(?:create|build|generate|draft|prepare|save|export|write)\b",
+    re.IGNORECASE,
+)
+_DELIVERABLE_NOUN_PATTERN = re.compile(
+    r"\b(?:file|document|doc|report|deck|slides?|spreadsheet|sheet|pdf|docx|pptx|xlsx)\b",
     re.IGNORECASE,
 )
 _QUESTION_EXTENSION_PATTERN = re.compile(r"\.[a-zA-Z0-9]{2,8}\b")
-_BLOCKED_ARTIFACT_SEGMENTS = {
-    ".initial_env",
-    ".venv",
-    "venv",
-    "site-packages",
-    "dist-info",
-    "__pycache__",
-    ".git",
-    "node_modules",
-}
-_BLOCKED_ARTIFACT_METADATA_NAMES = {
-    "top_level.txt",
-    "entry_points.txt",
-    "dependency_links.txt",
-    "sources.txt",
-    "api_tests.txt",
-}
+# One pass: any run of whitespace, dashes and underscores collapses to a single underscore.
+_DENYLIST_SEPARATOR_PATTERN = re.compile(r"[\s_-]+")
+_BLOCKED_ARTIFACT_SEGMENTS = frozenset(
+    {
+        ".initial_env",
+        ".venv",
+        "venv",
+        "site-packages",
+        "dist-info",
+        "__pycache__",
+        ".git",
+        "node_modules",
+    }
+)
+# Matches a path with a blocked segment, a *.dist-info segment, or any segment containing site-packages.
+_BLOCKED_SEGMENT_PATTERN = re.compile(
+    r"site-packages|\.dist-info\s*(?:/|$)|(?:^|/)\s*(?:"
+    + "|".join(re.escape(segment) for segment in sorted(_BLOCKED_ARTIFACT_SEGMENTS))
+    + r")\s*(?:/|$)"
+)
+_BLOCKED_ARTIFACT_METADATA_NAMES = frozenset(
+    {
+        "top_level.txt",
+        "entry_points.txt",
+        "dependency_links.txt",
+        "sources.txt",
+        "api_tests.txt",
+    }
+)
+# Every blocked artifact has one of these in its raw, lowercased fields: a blocked segment, the ".txt" of a
+# metadata file name, or "%" (percent-encoding that must be decoded before the thorough check).
+_BLOCKED_ARTIFACT_HINTS = tuple(sorted(_BLOCKED_ARTIFACT_SEGMENTS | {".txt", "%"}))
 _SEARCH_UNAVAILABLE_HINTS = (
     "missing or empty required api keys",
     "missing required modules",
@@ -146,7 +175,20 @@ _SEARCH_UNAVAILABLE_HINTS = (
 )
 
 
-@dataclass
+def _has_file_deliverable_intent(text: str) -> bool:
+    pos = 0
+    while (verb := _DELIVERABLE_VERB_PATTERN.search(text, pos)) is not None:
+        line_end = text.find("\n", verb.end())
+        if line_end < 0:
+            line_end = len(text)
+        if _DELIVERABLE_NOUN_PATTERN.search(text, verb.end(), line_end) is not None:
+            return True
+        # Later verbs on this line end later, so only the next line can still match.
+        pos = line_end + 1
+    return False
+
+
+@dataclass(slots=True)
 class SkillRunState:
     task_id: str
     project_id: str
@@ -161,12 +203,21 @@ class SkillRunState:
     artifacts: list[dict[str, Any]] = field(default_factory=list)
     transcript_chunks: list[str] = field(default_factory=list)
     checkpoints: list[str] = field(default_factory=list)
+    # Logical key -> index into artifacts, and path -> number of entries with it; valid while artifacts is the
+    # indexed list at the indexed length.
+    artifacts_by_key: dict[str, int] = field(default_factory=dict, repr=False)
+    artifact_path_counts: dict[str, int] = field(default_factory=dict, repr=False)
+    indexed_artifacts: tuple[list[dict[str, Any]], int] | None = field(default=None, repr=False)
 
     def transcript(self) -> str:
         return "".join(self.transcript_chunks).strip()
 
+    def artifact_index_is_current(self) -> bool:
+        indexed = self.indexed_artifacts
+        return indexed is not None and indexed[0] is self.artifacts and indexed[1] == len(self.artifacts)
 
-@dataclass
+
+@dataclass(slots=True)
 class SkillValidationSummary:
     success: bool
     score: float
@@ -175,7 +226,7 @@ class SkillValidationSummary:
     expected_contracts: dict[str, dict[str, Any]]
 
 
-@dataclass
+@dataclass(slots=True)
 class SkillRepairOutcome:
     success: bool
     artifacts: list[dict[str, Any]] = field(default_factory=list)
@@ -188,6 +239,14 @@ class RuntimeSkillEngine:
         self.mode = (mode or os.environ.get("RUNTIME_SKILLS_V2") or "on").strip().lower()
         self.skills: list[RuntimeSkill] = []
         self.load_errors: list[str] = []
+        self._detect_cache: dict[
+            tuple[str, frozenset[str], frozenset[str]],
+            tuple[tuple[RuntimeSkill, ...], dict[str, dict[str, Any]]],
+        ] = {}
+        self._research_skill_flags: dict[str, bool] = {}
+        self._skills_by_id: dict[str, RuntimeSkill] = {}
+        self._skill_context_cache: dict[tuple[str, bool, tuple[str, ...], tuple[str, ...]], str] = {}
+        self._trigger_db: Any = None
         self.metrics: dict[str, int] = {
             "skill_runs_total": 0,
             "skill_contract_failures_total": 0,
@@ -204,10 +263,60 @@ class RuntimeSkillEngine:
         )
         self.skills = loaded.skills
         self.load_errors = loaded.errors
+        self._detect_cache.clear()
+        self._research_skill_flags = {skill.id: "research" in skill.id for skill in self.skills}
+        self._skills_by_id = {skill.id: skill for skill in self.skills}
+        self._skill_context_cache.clear()
+        self._trigger_db = self._compile_trigger_database(self.skills)
         if self.load_errors:
             for error in self.load_errors:
                 logger.warning("skillpack_load_error: %s", error)
 
+    @staticmethod
+    def _compile_trigger_database(skills: list[RuntimeSkill]) -> Any:
+        if hyperscan is None:
+            return None
+        expressions: list[bytes] = []
+        ids: list[int] = []
+        for index, skill in enumerate(skills):
+            for pattern in skill.trigger_patterns:
+                try:
+                    re.compile(pattern)
+                except re.error:
+                    continue
+                expressions.append(pattern.encode("utf-8"))
+                ids.append(index)
+        if not expressions:
+            return None
+        flags = (
+            hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        )
+        database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        try:
+            database.compile(expressions=expressions, ids=ids, elements=len(expressions), flags=[flags] * len(ids))
+        except hyperscan.error as exc:
+            # Patterns outside the Hyperscan dialect keep detection on the per-skill Python regexes.
+            logger.warning("skill_trigger_database_unavailable: %s", exc)
+            return None
+        return database
+
+    def _trigger_hits(self, question: str) -> set[int] | None:
+        if self._trigger_db is None:
+            return None
+        hits: set[int] = set()
+        if question:
+
+            def on_match(skill_index: int, start: int, end: int, flags: int, context: object) -> None:
+                hits.add(skill_index)
+
+            try:
+                self._trigger_db.scan(question.encode("utf-8"), match_event_handler=on_match)
+            except (UnicodeEncodeError, hyperscan.error) as exc:
+                # Lone surrogates and scan-time failures fall back to the per-skill Python regexes.
+                logger.warning("skill_trigger_scan_failed: %s", exc)
+                return None
+        return hits
+
     def is_enabled(self) -> bool:
         return self.mode in {"on", "shadow", "1", "true", "yes"}
 
@@ -224,18 +333,51 @@ class RuntimeSkillEngine:
             return []
 
         question = question or ""
-        question_extensions = {ext.lower() for ext in _QUESTION_EXTENSION_PATTERN.findall(question)}
+        question_extensions = {match.group(0).lower() for match in _QUESTION_EXTENSION_PATTERN.finditer(question)}
         attachment_extensions = self._extract_extensions_from_attachments(attachments)
         all_extensions = question_extensions | attachment_extensions
         semantic_tokens = self._semantic_tokens(f"{question}\n{context}")
 
+        # Retries and shadow-mode re-evaluation repeat the same inputs; the match depends only on these three.
+        cache_key = (question, frozenset(all_extensions), frozenset(semantic_tokens))
+        cached = self._detect_cache.get(cache_key)
+        if cached is None:
+            cached = self._match_skills(question, all_extensions, semantic_tokens)
+            if len(self._detect_cache) >= _DETECT_CACHE_MAX_ENTRIES:
+                self._detect_cache.pop(next(iter(self._detect_cache)), None)
+            self._detect_cache[cache_key] = cached
+        selected, explanations = cached
+
+        for skill in selected:
+            explanation = explanations.get(skill.id) or {}
+            logger.info(
+                "skill_detect_match skill_id=%s reasons=%s semantic_score=%.3f semantic_terms=%s",
+                skill.id,
+                explanation.get("reasons", []),
+                float(explanation.get("semantic_score") or 0.0),
+                explanation.get("semantic_terms", []),
+            )
+        return list(selected)
+
+    def _match_skills(
+        self,
+        question: str,
+        extensions: set[str],
+        semantic_tokens: set[str],
+    ) -> tuple[tuple[RuntimeSkill, ...], dict[str, dict[str, Any]]]:
         selected: list[RuntimeSkill] = []
         explanations: dict[str, dict[str, Any]] = {}
-        for skill in self.skills:
+        # One scan of the question covers every skill's triggers when Hyperscan is installed.
+        trigger_hits = self._trigger_hits(question)
+        for index, skill in enumerate(self.skills):
             reasons: list[str] = []
-            if skill.matches_question(question):
+            if trigger_hits is None:
+                regex_match = skill.matches_question(question)
+            else:
+                regex_match = index in trigger_hits
+            if regex_match:
                 reasons.append("regex")
-            if skill.matches_extensions(all_extensions):
+            if skill.matches_extensions(extensions):
                 reasons.append("extension")
 
             semantic_score, semantic_terms = self._semantic_skill_score(skill, semantic_tokens)
@@ -252,20 +394,8 @@ class RuntimeSkillEngine:
                     "semantic_score": semantic_score,
                     "semantic_terms": semantic_terms,
                 }
-
-        # Keep deterministic ordering by the loaded skillpack order.
-        selected_ids = {skill.id for skill in selected}
-        ordered = [skill for skill in self.skills if skill.id in selected_ids]
-        for skill in ordered:
-            explanation = explanations.get(skill.id) or {}
-            logger.info(
-                "skill_detect_match skill_id=%s reasons=%s semantic_score=%.3f semantic_terms=%s",
-                skill.id,
-                explanation.get("reasons", []),
-                float(explanation.get("semantic_score") or 0.0),
-                explanation.get("semantic_terms", []),
-            )
-        return ordered
+        # The loop walks self.skills in order, so selected is already in skillpack order.
+        return tuple(selected), explanations
 
     def prepare_plan(
         self,
@@ -283,7 +413,7 @@ class RuntimeSkillEngine:
             context=context,
         )
         query_plan: list[str] = []
-        if any("research" in skill.id for skill in hydrated_skills):
+        if any(self._is_research_skill(skill) for skill in hydrated_skills):
             query_plan = expand_queries(question)
         return SkillRunState(
             task_id=task_id,
@@ -299,41 +429,60 @@ class RuntimeSkillEngine:
     def build_runtime_skill_context(self, active_skills: list[RuntimeSkill]) -> str:
         if not active_skills:
             return ""
-        lines = ["", "<active_runtime_skills>", "These runtime skills are active for this turn:"]
-        for skill in active_skills:
-            lines.append(f"- {skill.name}: {skill.description}")
-            lines.append(f"  - Skill ID: {skill.id} v{skill.version}")
-            if skill.prompt_instructions:
-                for instruction in skill.prompt_instructions:
-                    lines.append(f"  - {instruction}")
-            if skill.policy_markdown:
-                lines.append("  - Procedural policy:")
-                lines.extend(self._format_referenced_content(skill.policy_markdown))
-            if skill.output_contract.required_artifact:
-                lines.append(
-                    "  - Output contract: create at least "
-                    f"{max(1, skill.output_contract.minimum_artifacts)} artifact(s) with extensions "
-                    f"{list(skill.output_contract.allowed_extensions)}"
-                )
-            if skill.templates:
-                lines.append("  - Referenced templates:")
-                for name, content in sorted(skill.templates.items()):
-                    lines.append(f"    - {name}")
-                    lines.extend(self._format_referenced_content(content, prefix="      "))
-            if skill.resources:
-                lines.append("  - Referenced resources:")
-                for name, content in sorted(skill.resources.items()):
-                    lines.append(f"    - {name}")
-                    lines.extend(self._format_referenced_content(content, prefix="      "))
-        lines.append("</active_runtime_skills>")
-        return "\n".join(lines) + "\n"
+        blocks = "\n".join(self._skill_context_block(skill) for skill in active_skills)
+        return (
+            "\n<active_runtime_skills>\nThese runtime skills are active for this turn:\n"
+            f"{blocks}\n</active_runtime_skills>\n"
+        )
+
+    def _skill_context_block(self, skill: RuntimeSkill) -> str:
+        cache_key = None
+        pack_skill = self._skills_by_id.get(skill.id)
+        if pack_skill is not None and pack_skill.skill_root == skill.skill_root:
+            # Skillpack files only change on reload(), so a block depends only on what was hydrated.
+            cache_key = (
+                skill.id,
+                bool(skill.policy_markdown),
+                tuple(sorted(skill.templates)),
+                tuple(sorted(skill.resources)),
+            )
+            cached = self._skill_context_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        lines = [f"- {skill.name}: {skill.description}", f"  - Skill ID: {skill.id} v{skill.version}"]
+        if skill.prompt_instructions:
+            for instruction in skill.prompt_instructions:
+                lines.append(f"  - {instruction}")
+        if skill.policy_markdown:
+            lines.append("  - Procedural policy:")
+            lines.extend(self._format_referenced_content(skill.policy_markdown))
+        if skill.output_contract.required_artifact:
+            lines.append(
+                "  - Output contract: create at least "
+                f"{max(1, skill.output_contract.minimum_artifacts)} artifact(s) with extensions "
+                f"{list(skill.output_contract.allowed_extensions)}"
+            )
+        if skill.templates:
+            lines.append("  - Referenced templates:")
+            for name, content in sorted(skill.templates.items()):
+                lines.append(f"    - {name}")
+                lines.extend(self._format_referenced_content(content, prefix="      "))
+        if skill.resources:
+            lines.append("  - Referenced resources:")
+            for name, content in sorted(skill.resources.items()):
+                lines.append(f"    - {name}")
+                lines.extend(self._format_referenced_content(content, prefix="      "))
+        block = "\n".join(lines)
+        if cache_key is not None:
+            self._skill_context_cache[cache_key] = block
+        return block
 
     def requires_complex_execution(self, question: str, active_skills: list[RuntimeSkill]) -> bool:
         if any(skill.force_complex for skill in active_skills):
             return True
         if not question:
             return False
-        return bool(_FILE_DELIVERABLE_INTENT.search(question))
+        return _has_file_deliverable_intent(question)
 
     def inject_agent_policy(
         self,
@@ -367,9 +516,12 @@ class RuntimeSkillEngine:
             target_agent = document_agent or developer_agent
             if target_agent is None:
                 continue
+            if skill.id in target_agent.injected_skill_ids:
+                continue
             skill_context = self.build_runtime_skill_context([skill]).strip()
-            if skill_context and skill_context not in target_agent.system_prompt:
+            if skill_context:
                 target_agent.system_prompt = f"{target_agent.system_prompt}\n\n{skill_context}"
+                target_agent.injected_skill_ids.add(skill.id)
 
     def on_step_event(self, run_state: SkillRunState, step: str, data: dict[str, Any]) -> None:
         if not run_state.active_skills:
@@ -386,7 +538,8 @@ class RuntimeSkillEngine:
             toolkit_name = str(event.get("toolkit") or "").lower()
             if step == "deactivate_toolkit" and "search" in toolkit_name:
                 message = data.get("message")
-                if isinstance(message, str):
+                # Only payloads that carry a results list are rewritten; skip parsing everything else.
+                if isinstance(message, str) and '"results"' in message:
                     try:
                         parsed = json.loads(message)
                     except json.JSONDecodeError:
@@ -487,6 +640,7 @@ class RuntimeSkillEngine:
         run_state: SkillRunState,
         validation: SkillValidationSummary,
         workdir: Path,
+        persist: bool = True,
     ) -> SkillRepairOutcome:
         if validation.success:
             return SkillRepairOutcome(success=True)
@@ -494,15 +648,17 @@ class RuntimeSkillEngine:
         repaired_artifacts: list[dict[str, Any]] = []
         notes: list[str] = []
 
-        run_state.artifacts = self._filter_user_artifacts(run_state.artifacts)
+        self._refilter_run_artifacts(run_state)
         normalized = self._normalize_artifact_names(run_state, list(run_state.artifacts))
         for item in normalized:
-            if not any(existing.get("path") == item.get("path") for existing in run_state.artifacts):
+            if not self._has_artifact_path(run_state, item.get("path")):
                 self._upsert_runtime_artifact(run_state, item)
                 repaired_artifacts.append(item)
 
         if any(skill.id == "doc_markdown_v1" for skill in run_state.active_skills):
-            has_markdown = any(Path(str(artifact.get("name") or "")).suffix.lower() == ".md" for artifact in run_state.artifacts)
+            has_markdown = any(
+                lowercase_suffix(str(artifact.get("name") or "")) == ".md" for artifact in run_state.artifacts
+            )
             if not has_markdown:
                 fallback = self._repair_markdown_from_transcript(run_state, workdir)
                 if fallback:
@@ -510,12 +666,15 @@ class RuntimeSkillEngine:
                     repaired_artifacts.append(fallback)
                     notes.append("Created markdown fallback artifact from transcript.")
 
-        run_state.artifacts = self._filter_user_artifacts(run_state.artifacts)
-        repaired_artifacts = self._filter_user_artifacts(repaired_artifacts)
+        if repaired_artifacts:
+            # Filtering is idempotent, so the list only needs another pass when repair added to it.
+            self._refilter_run_artifacts(run_state)
+            repaired_artifacts = self._filter_user_artifacts(repaired_artifacts)
 
         if repaired_artifacts:
             self.metrics["skill_repairs_success_total"] += 1
-            self._persist_artifacts(run_state.task_id, repaired_artifacts)
+            if persist:
+                self._persist_artifacts(run_state.task_id, repaired_artifacts)
 
         refreshed_validation = self.validate_outputs(
             run_state=run_state,
@@ -540,11 +699,20 @@ class RuntimeSkillEngine:
                 "weighted_score": 0.0,
             }
 
-        trigger_precision = 100.0 if all(skill.trigger_patterns for skill in self.skills) else 70.0
-        procedural_depth = 100.0 if all(skill.has_policy_reference() for skill in self.skills) else 65.0
-        tool_orchestration = 100.0 if all(skill.required_tools for skill in self.skills) else 60.0
-        output_contracts = 100.0 if all(skill.output_contract.description for skill in self.skills) else 65.0
-        validation_recovery = 100.0 if all(skill.validation_rules for skill in self.skills) else 55.0
+        all_triggers = all_policies = all_tools = all_contracts = all_validation = True
+        for skill in self.skills:
+            all_triggers = all_triggers and bool(skill.trigger_patterns)
+            all_policies = all_policies and skill.has_policy_reference()
+            all_tools = all_tools and bool(skill.required_tools)
+            all_contracts = all_contracts and bool(skill.output_contract.description)
+            all_validation = all_validation and bool(skill.validation_rules)
+            if not (all_triggers or all_policies or all_tools or all_contracts or all_validation):
+                break
+        trigger_precision = 100.0 if all_triggers else 70.0
+        procedural_depth = 100.0 if all_policies else 65.0
+        tool_orchestration = 100.0 if all_tools else 60.0
+        output_contracts = 100.0 if all_contracts else 65.0
+        validation_recovery = 100.0 if all_validation else 55.0
         observability = 100.0
 
         weighted = (
@@ -565,6 +733,13 @@ class RuntimeSkillEngine:
             "weighted_score": weighted,
         }
 
+    def _is_research_skill(self, skill: RuntimeSkill) -> bool:
+        flag = self._research_skill_flags.get(skill.id)
+        if flag is None:
+            # Custom catalog skills are not in the skillpack; classify them the first time they are seen.
+            flag = self._research_skill_flags[skill.id] = "research" in skill.id
+        return flag
+
     def _hydrate_triggered_skills(
         self,
         *,
@@ -679,20 +854,14 @@ class RuntimeSkillEngine:
             return set()
         extensions: set[str] = set()
         for attachment in attachments:
-            payload: dict[str, Any] | None = None
-            if isinstance(attachment, dict):
-                payload = attachment
-            elif hasattr(attachment, "model_dump"):
-                payload = attachment.model_dump()  # type: ignore[attr-defined]
-            elif hasattr(attachment, "dict"):
-                payload = attachment.dict()  # type: ignore[attr-defined]
+            payload = attachment_payload(attachment)
             if not payload:
                 continue
             for key in ("name", "path"):
                 value = payload.get(key)
                 if not isinstance(value, str):
                     continue
-                suffix = Path(value).suffix.lower()
+                suffix = lowercase_suffix(value)
                 if suffix:
                     extensions.add(suffix)
         return extensions
@@ -723,7 +892,7 @@ class RuntimeSkillEngine:
         return None
 
     @staticmethod
-    def _filter_user_artifacts(artifacts: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    def _user_artifacts_by_key(artifacts: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
         filtered: dict[str, dict[str, Any]] = {}
         for artifact in artifacts:
             if RuntimeSkillEngine._is_blocked_artifact(artifact):
@@ -732,7 +901,23 @@ class RuntimeSkillEngine:
             if not dedupe_key:
                 continue
             filtered[dedupe_key] = artifact
-        return list(filtered.values())
+        return filtered
+
+    @staticmethod
+    def _filter_user_artifacts(artifacts: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return list(RuntimeSkillEngine._user_artifacts_by_key(artifacts).values())
+
+    @staticmethod
+    def _refilter_run_artifacts(run_state: SkillRunState) -> None:
+        filtered = RuntimeSkillEngine._user_artifacts_by_key(run_state.artifacts)
+        artifacts = list(filtered.values())
+        # Filtered keys are unique and in list order, so the upsert index comes straight from the filter pass.
+        run_state.artifacts = artifacts
+        run_state.artifacts_by_key = {key: position for position, key in enumerate(filtered)}
+        run_state.artifact_path_counts = {}
+        for artifact in artifacts:
+            RuntimeSkillEngine._count_artifact_path(run_state, artifact.get("path"), 1)
+        run_state.indexed_artifacts = (artifacts, len(artifacts))
 
     @staticmethod
     def _artifact_logical_key(artifact: dict[str, Any]) -> str:
@@ -745,22 +930,60 @@ class RuntimeSkillEngine:
         dedupe_key = path or content_url or name
         return f"path:{dedupe_key}" if dedupe_key else ""
 
+    @staticmethod
+    def _count_artifact_path(run_state: SkillRunState, path: object, delta: int) -> None:
+        if not isinstance(path, str):
+            return
+        count = run_state.artifact_path_counts.get(path, 0) + delta
+        if count > 0:
+            run_state.artifact_path_counts[path] = count
+        else:
+            run_state.artifact_path_counts.pop(path, None)
+
+    @staticmethod
+    def _ensure_artifact_index(run_state: SkillRunState) -> None:
+        if run_state.artifact_index_is_current():
+            return
+        # The list was replaced or edited outside _upsert_runtime_artifact; re-index, keeping the first entry per key.
+        artifacts = run_state.artifacts
+        run_state.artifacts_by_key = {}
+        run_state.artifact_path_counts = {}
+        for position, existing in enumerate(artifacts):
+            existing_key = RuntimeSkillEngine._artifact_logical_key(existing)
+            if existing_key:
+                run_state.artifacts_by_key.setdefault(existing_key, position)
+            RuntimeSkillEngine._count_artifact_path(run_state, existing.get("path"), 1)
+        run_state.indexed_artifacts = (artifacts, len(artifacts))
+
+    @staticmethod
+    def _has_artifact_path(run_state: SkillRunState, path: object) -> bool:
+        if not isinstance(path, str):
+            return any(existing.get("path") == path for existing in run_state.artifacts)
+        RuntimeSkillEngine._ensure_artifact_index(run_state)
+        return path in run_state.artifact_path_counts
+
     @staticmethod
     def _upsert_runtime_artifact(run_state: SkillRunState, artifact: dict[str, Any]) -> None:
         key = RuntimeSkillEngine._artifact_logical_key(artifact)
         if not key:
             return
-        for index, existing in enumerate(run_state.artifacts):
-            if RuntimeSkillEngine._artifact_logical_key(existing) == key:
-                merged = {**existing, **artifact}
-                run_state.artifacts[index] = merged
-                return
-        run_state.artifacts.append(artifact)
+        RuntimeSkillEngine._ensure_artifact_index(run_state)
+        artifacts = run_state.artifacts
+        index = run_state.artifacts_by_key.get(key)
+        if index is None:
+            run_state.artifacts_by_key[key] = len(artifacts)
+            artifacts.append(artifact)
+            RuntimeSkillEngine._count_artifact_path(run_state, artifact.get("path"), 1)
+        else:
+            previous = artifacts[index]
+            artifacts[index] = {**previous, **artifact}
+            RuntimeSkillEngine._count_artifact_path(run_state, previous.get("path"), -1)
+            RuntimeSkillEngine._count_artifact_path(run_state, artifacts[index].get("path"), 1)
+        run_state.indexed_artifacts = (artifacts, len(artifacts))
 
     @staticmethod
     def _normalize_name_for_denylist(value: str) -> str:
-        normalized = re.sub(r"[\s-]+", "_", value.strip().lower())
-        return re.sub(r"_+", "_", normalized)
+        return _DENYLIST_SEPARATOR_PATTERN.sub("_", value.strip().lower())
 
     @staticmethod
     def _metadata_name_blocked(name: str) -> bool:
@@ -784,7 +1007,8 @@ class RuntimeSkillEngine:
                 candidates.append(value.strip())
 
         content_url = artifact.get("content_url")
-        if isinstance(content_url, str) and content_url.strip():
+        # Bare filesystem paths have no query string to parse.
+        if isinstance(content_url, str) and "?" in content_url:
             parsed = urlparse(content_url)
             path_values = parse_qs(parsed.query).get("path", [])
             candidates.extend(path_values)
@@ -794,18 +1018,13 @@ class RuntimeSkillEngine:
     def _has_blocked_segment(path_text: str) -> bool:
         normalized = RuntimeSkillEngine._decode_candidate(path_text)
         normalized = normalized.split("?", 1)[0].split("#", 1)[0].replace("\\", "/")
-        segments = [segment.strip().lower() for segment in normalized.split("/") if segment.strip()]
-        for segment in segments:
-            if segment in _BLOCKED_ARTIFACT_SEGMENTS:
-                return True
-            if segment.endswith(".dist-info"):
-                return True
-            if "site-packages" in segment:
-                return True
-        return False
+        return _BLOCKED_SEGMENT_PATTERN.search(normalized.lower()) is not None
 
     @staticmethod
     def _is_blocked_artifact(artifact: dict[str, Any]) -> bool:
+        raw = " ".join(str(artifact.get(key) or "") for key in ("name", "path", "content_url")).lower()
+        if not any(hint in raw for hint in _BLOCKED_ARTIFACT_HINTS):
+            return False
         name = str(artifact.get("name") or "").strip()
         if RuntimeSkillEngine._metadata_name_blocked(name):
             return True
@@ -825,6 +1044,11 @@ class RuntimeSkillEngine:
 
     @staticmethod
     def _merge_runtime_artifacts(run_state: SkillRunState, _workdir: Path) -> list[dict[str, Any]]:
+        if run_state.artifact_index_is_current():
+            # Upserts already keep one entry per non-empty logical key; only the denylist still applies.
+            return [
+                artifact for artifact in run_state.artifacts if not RuntimeSkillEngine._is_blocked_artifact(artifact)
+            ]
         return RuntimeSkillEngine._filter_user_artifacts(run_state.artifacts)
 
     @staticmethod
@@ -871,7 +1095,7 @@ class RuntimeSkillEngine:
                 if workdir.name == run_state.project_id
                 else str(target)
             )
-            artifact_id = str(artifact.get("id") or "").strip() or f"artifact-renamed-{abs(hash(str(target)))}"
+            artifact_id = str(artifact.get("id") or "").strip() or f"artifact-renamed-{artifact_id_digest(str(target))}"
             renamed.append(
                 {
                     "id": artifact_id,
@@ -885,9 +1109,12 @@ class RuntimeSkillEngine:
         return renamed
 
     def _repair_markdown_from_transcript(self, run_state: SkillRunState, workdir: Path) -> dict[str, Any] | None:
-        transcript = run_state.transcript()
-        if not transcript:
+        # Write the same text as run_state.transcript() chunk by chunk instead of joining it into one string.
+        chunks = run_state.transcript_chunks
+        content_positions = [position for position, chunk in enumerate(chunks) if chunk and not chunk.isspace()]
+        if not content_positions:
             return None
+        first, last = content_positions[0], content_positions[-1]
         filename = suggest_filename(run_state.question, ".md", fallback_stem="Summary")
         normalized_name = normalize_filename_for_output(filename, run_state.explicit_filenames)
         target = workdir / normalized_name
@@ -896,27 +1123,40 @@ class RuntimeSkillEngine:
         if target.exists():
             return None
         try:
-            target.write_text(transcript, encoding="utf-8")
+            with target.open("x", encoding="utf-8") as handle:
+                if first == last:
+                    handle.write(chunks[first].strip())
+                else:
+                    handle.write(chunks[first].lstrip())
+                    for position in range(first + 1, last):
+                        handle.write(chunks[position])
+                    handle.write(chunks[last].rstrip())
         except OSError:
             return None
         return {
-            "id": f"artifact-repair-{abs(hash(str(target)))}",
+            "id": f"artifact-repair-{artifact_id_digest(str(target))}",
             "type": "file",
             "name": target.name,
             "path": str(target),
             "content_url": self._build_generated_file_url(workdir, target),
         }
 
+    def persist_repaired_artifacts(self, task_id: str, artifacts: list[dict[str, Any]]) -> None:
+        # For repair_or_fail(persist=False) run in a worker thread: the sync client is bound to the event loop.
+        self._persist_artifacts(task_id, artifacts)
+
     @staticmethod
     def _persist_artifacts(task_id: str, artifacts: list[dict[str, Any]]) -> None:
         now = time.time()
+        request_id = current_request_id.get(None)
+        events: list[ArtifactEvent] = []
         for artifact in artifacts:
             if RuntimeSkillEngine._is_blocked_artifact(artifact):
                 continue
             action = str(artifact.get("action") or "created").lower()
             if action == "modified":
                 continue
-            fire_and_forget_artifact(
+            events.append(
                 ArtifactEvent(
                     task_id=task_id,
                     artifact_type=str(artifact.get("type") or "file"),
@@ -925,9 +1165,10 @@ class RuntimeSkillEngine:
                     created_at=now,
                     event_id=uuid.uuid4().hex,
                     idempotency_key=f"{task_id}:{artifact.get('name') or 'artifact'}:{artifact.get('content_url') or artifact.get('path') or ''}",
-                    request_id=current_request_id.get(None),
+                    request_id=request_id,
                 )
             )
+        fire_and_forget_artifacts(events)
 
 
 def resolve_validation_failure_reason(summary: SkillValidationSummary) -> str:
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field, replace
 from pathlib import Path
+import os
 import re
+from collections.abc import Iterator
 from typing import Any, Iterable
 
 try:
@@ -191,20 +193,27 @@ def _scan_template_files(pack_dir: Path) -> tuple[str, ...]:
     return tuple(names)
 
 
+def _iter_resource_parts(root: str, prefix: tuple[str, ...] = ()) -> Iterator[tuple[str, ...]]:
+    # DirEntry type checks reuse the data from the directory listing instead of a stat() per path.
+    try:
+        with os.scandir(root) as entries:
+            children = list(entries)
+    except OSError:
+        return
+    for entry in children:
+        parts = (*prefix, entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            yield from _iter_resource_parts(entry.path, parts)
+        elif entry.is_file():
+            yield parts
+
+
 def _scan_resource_files(pack_dir: Path) -> tuple[str, ...]:
     resources_dir = pack_dir / "resources"
-    if not resources_dir.exists() or not resources_dir.is_dir():
+    if not resources_dir.is_dir():
         return ()
-    files: list[str] = []
-    for resource_file in sorted(resources_dir.rglob("*")):
-        if not resource_file.is_file():
-            continue
-        try:
-            relative = resource_file.relative_to(resources_dir)
-        except ValueError:
-            continue
-        files.append(str(relative).replace("\\", "/"))
-    return tuple(files)
+    # Sorting the part tuples keeps the same order as sorting the Path objects.
+    return tuple("/".join(parts) for parts in sorted(_iter_resource_parts(str(resources_dir))))
 
 
 def load_skill_packs(
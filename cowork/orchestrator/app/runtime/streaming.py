@@ -4,22 +4,55 @@ import asyncio
 import logging
 import time
 import uuid
+from contextvars import ContextVar
 from dataclasses import dataclass
 from typing import Any, AsyncIterator, Callable
 
 from app.runtime.artifacts import _collect_tool_artifacts
 from app.runtime.events import StepEvent
 from app.runtime.memory import _usage_total
-from app.runtime.sync import fire_and_forget
+from app.runtime.stop_reasons import StopReason, build_error_end, build_error_event
+from app.runtime.sync import fire_and_forget, step_persistence_lagging
 from app.runtime.tool_context import current_project_id, current_request_id
 from app.runtime.tracing import _trace_step
 from shared.schemas import INTERACTION_CONTRACT_VERSION, AgentEvent, StepEvent as StepEventModel
 
 
 logger = logging.getLogger(__name__)
+# While step persistence lags, coalesced chunks wait this many times longer and grow this many times larger.
+_LAGGING_INTERVAL_SCALE = 4
+_LAGGING_MAX_CHARS_SCALE = 2
 
 
-def _emit(task_id: str, step: StepEvent, data: dict) -> StepEventModel:
+class _EventClock:
+    """Wall-clock timestamps derived from a monotonic reading taken once per event."""
+
+    __slots__ = ("_base_mono", "_base_wall")
+
+    def __init__(self) -> None:
+        self._base_wall = time.time()
+        self._base_mono = time.monotonic_ns()
+
+    def now(self) -> float:
+        return self._base_wall + (time.monotonic_ns() - self._base_mono) / 1e9
+
+
+# Each task loop installs its own clock, so one task re-anchoring never shifts another task's timestamps.
+current_event_clock: ContextVar[_EventClock | None] = ContextVar("event_clock", default=None)
+
+
+def _event_now() -> float:
+    clock = current_event_clock.get()
+    return clock.now() if clock is not None else time.time()
+
+
+def _emit(
+    task_id: str,
+    step: StepEvent,
+    data: dict,
+    *,
+    timestamp: float | None = None,
+) -> StepEventModel:
     if step == StepEvent.error and isinstance(data, dict):
         if "error_type" not in data:
             data = {**data, "error_type": "runtime_error"}
@@ -31,7 +64,9 @@ def _emit(task_id: str, step: StepEvent, data: dict) -> StepEventModel:
     _trace_step(task_id, step, data)
     event_id = uuid.uuid4().hex
     request_id = current_request_id.get(None)
-    payload = _attach_agent_event(task_id, step, data)
+    if timestamp is None:
+        timestamp = _event_now()
+    payload = _attach_agent_event(task_id, step, data, timestamp)
     if isinstance(payload, dict):
         payload = {
             **payload,
@@ -45,7 +80,7 @@ def _emit(task_id: str, step: StepEvent, data: dict) -> StepEventModel:
         task_id=task_id,
         step=step,
         data=payload,
-        timestamp=time.time(),
+        timestamp=timestamp,
         event_id=event_id,
         idempotency_key=event_id,
         request_id=request_id,
@@ -57,23 +92,72 @@ def _emit(task_id: str, step: StepEvent, data: dict) -> StepEventModel:
     return event
 
 
-def _attach_agent_event(task_id: str, step: StepEvent, data: dict) -> dict:
+def _failure_payloads(
+    stop_reason: StopReason,
+    message: str,
+    reason: str,
+    *,
+    error_type: str = "runtime_error",
+    extra: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    error_data = build_error_event(
+        message,
+        stop_reason=stop_reason.value,
+        error_type=error_type,
+        extra=extra,
+    )
+    end_data = build_error_end(stop_reason.value, reason, extra=extra)
+    return error_data, end_data
+
+
+def _emit_failure(
+    task_id: str,
+    stop_reason: StopReason,
+    message: str,
+    reason: str,
+    *,
+    error_type: str = "runtime_error",
+    extra: dict[str, Any] | None = None,
+) -> tuple[StepEventModel, StepEventModel]:
+    """Emit the paired error + end events that terminate a failed turn."""
+    error_data, end_data = _failure_payloads(
+        stop_reason,
+        message,
+        reason,
+        error_type=error_type,
+        extra=extra,
+    )
+    timestamp = _event_now()
+    return (
+        _emit(task_id, StepEvent.error, error_data, timestamp=timestamp),
+        _emit(task_id, StepEvent.end, end_data, timestamp=timestamp),
+    )
+
+
+def _attach_agent_event(task_id: str, step: StepEvent, data: dict, timestamp: float | None = None) -> dict:
     if not isinstance(data, dict):
         return data
     if "agent_event" in data:
         return data
-    agent_event = _build_agent_event(task_id, step, data)
+    agent_event = _build_agent_event(task_id, step, data, timestamp)
     if agent_event is None:
         return data
     return {**data, "agent_event": agent_event}
 
 
-def _build_agent_event(task_id: str, step: StepEvent, data: dict) -> dict | None:
+def _build_agent_event(
+    task_id: str,
+    step: StepEvent,
+    data: dict,
+    timestamp: float | None = None,
+) -> dict | None:
     event_type = _map_step_to_agent_event(step)
     if event_type is None:
         return None
     payload = _agent_event_payload(step, data)
-    timestamp_ms = int(time.time() * 1000)
+    if timestamp is None:
+        timestamp = _event_now()
+    timestamp_ms = int(timestamp * 1000)
     session_id = data.get("project_id") or current_project_id.get(None)
     event = AgentEvent(
         type=event_type,
@@ -182,6 +266,49 @@ class TokenTracker:
         return tokens
 
 
+class ChunkCoalescer:
+    """Batch streamed text chunks so one event carries ~40ms or 512 chars of output.
+
+    The window widens while step persistence lags behind, so a slow core API sees fewer, larger events.
+    """
+
+    __slots__ = ("_flush", "_interval", "_last_flush", "_max_chars", "_parts", "_size")
+
+    def __init__(
+        self,
+        flush: Callable[[str], None],
+        *,
+        interval: float = 0.04,
+        max_chars: int = 512,
+    ) -> None:
+        self._flush = flush
+        self._interval = interval
+        self._max_chars = max_chars
+        self._parts: list[str] = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, chunk: str) -> None:
+        self._parts.append(chunk)
+        self._size += len(chunk)
+        interval = self._interval
+        max_chars = self._max_chars
+        if step_persistence_lagging():
+            interval *= _LAGGING_INTERVAL_SCALE
+            max_chars *= _LAGGING_MAX_CHARS_SCALE
+        if self._size >= max_chars or time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._flush(text)
+
+
 class EventStream:
     def __init__(
         self,
@@ -193,15 +320,19 @@ class EventStream:
         self.loop = loop
         self.queue: asyncio.Queue[StepEventModel | None] = asyncio.Queue()
         self._step_listener = step_listener
+        # Bound at creation: emits also arrive from worker threads that do not see the task's context.
+        self._clock = current_event_clock.get() or _EventClock()
 
-    def emit(self, step: StepEvent, data: dict) -> None:
+    def emit(self, step: StepEvent, data: dict, *, timestamp: float | None = None) -> None:
         artifact_payloads: list[dict[str, Any]] = []
         if step == StepEvent.deactivate_toolkit:
             artifact_payloads = _collect_tool_artifacts(self.task_id, data)
-        event = _emit(self.task_id, step, data)
+        if timestamp is None:
+            timestamp = self._clock.now()
+        event = _emit(self.task_id, step, data, timestamp=timestamp)
         events: list[tuple[StepEvent, dict[str, Any], StepEventModel]] = [(step, data, event)]
         for artifact_payload in artifact_payloads:
-            artifact_event = _emit(self.task_id, StepEvent.artifact, artifact_payload)
+            artifact_event = _emit(self.task_id, StepEvent.artifact, artifact_payload, timestamp=self._clock.now())
             events.append((StepEvent.artifact, artifact_payload, artifact_event))
 
         def _enqueue() -> None:
@@ -218,6 +349,26 @@ class EventStream:
         else:
             _enqueue()
 
+    def emit_failure(
+        self,
+        stop_reason: StopReason,
+        message: str,
+        reason: str,
+        *,
+        error_type: str = "runtime_error",
+        extra: dict[str, Any] | None = None,
+    ) -> None:
+        error_data, end_data = _failure_payloads(
+            stop_reason,
+            message,
+            reason,
+            error_type=error_type,
+            extra=extra,
+        )
+        timestamp = self._clock.now()
+        self.emit(StepEvent.error, error_data, timestamp=timestamp)
+        self.emit(StepEvent.end, end_data, timestamp=timestamp)
+
     def close(self) -> None:
         if self.loop.is_running():
             self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
@@ -2,10 +2,13 @@ import asyncio
 import logging
 import random
 import threading
+from collections import deque
+from dataclasses import dataclass, field
 
 import httpx
 
 from app.config import settings
+from app.runtime.fast_json import json_dumps_bytes
 from shared.observability import REQUEST_ID_HEADER
 from shared.schemas import ArtifactEvent, StepEvent
 
@@ -14,6 +17,24 @@ _sync_client: httpx.AsyncClient | None = None
 _RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
 _MAX_RETRIES = 3
 _BASE_BACKOFF_SECONDS = 0.2
+# Step persistence backpressure: above the high-water mark of in-flight sends new
+# events queue in a FIFO backlog, which refills from send completions once in-flight
+# sends fall to the low-water mark. Nothing is dropped; while persistence lags, the
+# streaming coalescer widens its window so fewer events are produced.
+_STEP_HIGH_WATER = 512
+_STEP_LOW_WATER = 128
+
+
+# Backpressure state for one event loop; send callbacks hold their own pipeline, so a rebind never skews counts.
+@dataclass(slots=True)
+class _StepPipeline:
+    loop: asyncio.AbstractEventLoop
+    inflight: int = 0
+    backlog: deque[StepEvent] = field(default_factory=deque)
+    lagging: bool = False
+
+
+_step_pipeline: _StepPipeline | None = None
 
 
 def _build_headers() -> dict[str, str]:
@@ -55,9 +76,11 @@ async def _post_with_retry(
     log_name: str,
 ) -> None:
     client = _get_client()
+    content = json_dumps_bytes(payload)
+    headers = {**headers, "Content-Type": "application/json"}
     for attempt in range(1, _MAX_RETRIES + 1):
         try:
-            response = await client.post(url, json=payload, headers=headers)
+            response = await client.post(url, content=content, headers=headers)
             response.raise_for_status()
             return
         except Exception as exc:
@@ -113,28 +136,58 @@ def _run_coro_in_thread(coro) -> None:
     thread.start()
 
 
+def _on_step_sent(pipeline: _StepPipeline, task: asyncio.Task) -> None:
+    pipeline.inflight -= 1
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("fire_and_forget_step_failed", extra={"error": repr(task.exception())})
+    if pipeline.backlog and pipeline.inflight <= _STEP_LOW_WATER:
+        while pipeline.backlog and pipeline.inflight < _STEP_HIGH_WATER:
+            _spawn_send_step(pipeline, pipeline.backlog.popleft())
+    if pipeline.lagging and pipeline.inflight + len(pipeline.backlog) <= _STEP_LOW_WATER:
+        pipeline.lagging = False
+
+
+def _spawn_send_step(pipeline: _StepPipeline, event: StepEvent) -> None:
+    pipeline.inflight += 1
+    task = pipeline.loop.create_task(send_step(event))
+    task.add_done_callback(lambda done: _on_step_sent(pipeline, done))
+
+
+def _bind_step_loop(loop: asyncio.AbstractEventLoop) -> _StepPipeline:
+    """Start fresh backpressure state when events start flowing on a new loop."""
+    global _step_pipeline
+    if _step_pipeline is None or _step_pipeline.loop is not loop:
+        _step_pipeline = _StepPipeline(loop=loop)
+    return _step_pipeline
+
+
+def step_persistence_lagging() -> bool:
+    """True from when pending step sends pass the high-water mark until they fall back to the low-water mark."""
+    pipeline = _step_pipeline
+    return pipeline is not None and pipeline.lagging
+
+
 def fire_and_forget(event: StepEvent) -> None:
     """Safely fire and forget an async step event from any context.
     
     Handles both async and sync contexts by:
     1. If running in an async context, schedules the coroutine as a task
+       (or queues it in the backlog while persistence lags behind)
     2. If no event loop is running, spawns a thread with its own loop
     """
-    coro = send_step(event)
     try:
         loop = asyncio.get_running_loop()
-        # We're in an async context, create a task
-        task = loop.create_task(coro)
-        # Add done callback to log any exceptions
-        def handle_exception(t):
-            try:
-                t.result()
-            except Exception as e:
-                logger.warning(f"fire_and_forget task failed: {e}")
-        task.add_done_callback(handle_exception)
     except RuntimeError:
         # No running event loop - run in a separate thread
-        _run_coro_in_thread(coro)
+        _run_coro_in_thread(send_step(event))
+        return
+    pipeline = _bind_step_loop(loop)
+    if pipeline.backlog or pipeline.inflight >= _STEP_HIGH_WATER:
+        # Keep ordering: once a backlog exists, new events join it.
+        pipeline.backlog.append(event)
+        pipeline.lagging = True
+        return
+    _spawn_send_step(pipeline, event)
 
 
 async def send_artifact(event: ArtifactEvent) -> None:
@@ -170,3 +223,31 @@ def fire_and_forget_artifact(event: ArtifactEvent) -> None:
         task.add_done_callback(handle_exception)
     except RuntimeError:
         _run_coro_in_thread(coro)
+
+
+async def _send_artifacts(events: list[ArtifactEvent]) -> None:
+    await asyncio.gather(*(send_artifact(event) for event in events))
+
+
+def fire_and_forget_artifacts(events: list[ArtifactEvent]) -> None:
+    """Fire and forget several artifact events as one task (or one thread outside an event loop)."""
+    if not events:
+        return
+    if len(events) == 1:
+        fire_and_forget_artifact(events[0])
+        return
+    coro = _send_artifacts(events)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _run_coro_in_thread(coro)
+        return
+    task = loop.create_task(coro)
+
+    def handle_exception(t):
+        try:
+            t.result()
+        except Exception as e:
+            logger.warning(f"fire_and_forget_artifacts task failed: {e}")
+
+    task.add_done_callback(handle_exception)
@@ -134,7 +134,7 @@ async def _is_complex_task(provider: ProviderConfig, question: str, context: str
         {"role": "system", "content": "You are a classifier. Reply only \"yes\" or \"no\"."},
         {"role": "user", "content": prompt},
     ]
-    text, usage = await collect_chat_completion(provider, messages, temperature=0.0)
+    text, usage = await collect_chat_completion(provider, messages, temperature=0.0, enable_cache=True)
     normalized = "".join(ch for ch in text.strip().lower() if ch.isalpha())
     if normalized.startswith("no"):
         return False, _usage_total(usage)
@@ -16,13 +16,19 @@ class TaskLock:
     current_task_id: str | None = None
     active_agent: str = ""
     stop_requested: bool = False
+    stop_event: asyncio.Event = field(default_factory=asyncio.Event)
     conversation_history: list[dict[str, str]] = field(default_factory=list)
     last_task_result: str = ""
     last_task_summary: str = ""
     thread_summary: str = ""
+    # conversation_history[:summary_cursor] is already folded into thread_summary.
+    summary_cursor: int = 0
     memory_notes: list[dict[str, object]] = field(default_factory=list)
     global_memory_notes: list[dict[str, object]] = field(default_factory=list)
+    # Unfiltered GLOBAL_USER_CONTEXT notes from the last hydration; None until fetched.
+    global_memory_snapshot: list[dict[str, object]] | None = None
     background_tasks: set[asyncio.Task] = field(default_factory=set)
+    pending_writes: set[asyncio.Task] = field(default_factory=set)
     human_input: dict[str, asyncio.Queue[str]] = field(default_factory=dict)
     pending_approval_context: dict[str, dict[str, Any]] = field(default_factory=dict)
     remembered_approvals: set[str] = field(default_factory=set)
@@ -40,6 +46,14 @@ class TaskLock:
         self.background_tasks.add(task)
         task.add_done_callback(lambda t: self.background_tasks.discard(t))
 
+    def add_pending_write(self, task: asyncio.Task) -> None:
+        self.pending_writes.add(task)
+        task.add_done_callback(lambda t: self.pending_writes.discard(t))
+
+    async def flush_pending_writes(self) -> None:
+        if self.pending_writes:
+            await asyncio.gather(*list(self.pending_writes), return_exceptions=True)
+
     def add_conversation(self, role: str, content: str) -> None:
         self.conversation_history.append(
             {
@@ -51,3 +65,8 @@ class TaskLock:
 
     def request_stop(self) -> None:
         self.stop_requested = True
+        self.stop_event.set()
+
+    def clear_stop(self) -> None:
+        self.stop_requested = False
+        self.stop_event.clear()
@@ -33,6 +33,8 @@ class AgentProfile:
     system_prompt: str
     tools: list[str] = field(default_factory=list)
     agent_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    # Runtime skills whose context is already appended to system_prompt.
+    injected_skill_ids: set[str] = field(default_factory=set, repr=False)
 
 
 def build_default_agents() -> list[AgentProfile]:
@@ -179,9 +181,7 @@ Answer only "yes" or "no".
 Is this a complex task?"""
 
 
-def build_decomposition_prompt(question: str, context: str) -> str:
-    return f"""{context}
-You are a Task Planner. Your goal is to break the user's request into 3-7 concrete, executable subtasks for the workforce.
+_DECOMPOSITION_INSTRUCTIONS = """You are a Task Planner. Your goal is to break the user's request into 3-7 concrete, executable subtasks for the workforce.
 
 <principles>
 1. **Self-Contained**: Each subtask must be understandable *without* seeing the parent task.
@@ -200,19 +200,26 @@ You are a Task Planner. Your goal is to break the user's request into 3-7 concre
 - multi_modal_agent (Media)
 </available_roles>
 
-User Request: {question}
-
 Return ONLY a JSON array of objects. Format:
 [
-  {{
+  {
     "id": "step_1",
     "content": "Detailed instruction for the agent...",
     "assigned_role": "developer_agent"
-  }}
+  }
 ]
 """
 
 
+def build_decomposition_prompt(question: str, context: str) -> tuple[str, str]:
+    """Return ``(fixed_prefix, variable_suffix)``.
+
+    The prefix is identical for every request so it can sit in the system message and stay
+    prompt-cacheable; only the conversation context and question vary.
+    """
+    return _DECOMPOSITION_INSTRUCTIONS, f"{context}\nUser Request: {question}\n"
+
+
 def build_summary_prompt(question: str, tasks: list[TaskNode]) -> str:
     task_list = "\n".join(f"- {task.content}" for task in tasks)
     return f"""The user just completed a task. Generate a short label and summary for the UI history list.
@@ -269,6 +276,88 @@ def parse_subtasks(raw_text: str, fallback_id_prefix: str) -> list[TaskNode]:
     return _fallback_subtasks(raw_text, fallback_id_prefix)
 
 
+class IncrementalSubtaskParser:
+    """Parse planner output as it streams, yielding each top-level array object once it closes.
+
+    ``finalize`` returns the same nodes ``parse_subtasks`` would produce for the full text.
+    """
+
+    def __init__(self, fallback_id_prefix: str) -> None:
+        self._fallback_id_prefix = fallback_id_prefix
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._array_closed = False
+        self._malformed = False
+        self._object_chars: list[str] = []
+        self._item_count = 0
+        self.tasks: list[TaskNode] = []
+
+    def feed(self, chunk: str) -> list[TaskNode]:
+        completed: list[TaskNode] = []
+        if self._array_closed:
+            return completed
+        for char in chunk:
+            if self._depth >= 2:
+                self._object_chars.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                if self._depth >= 1:
+                    self._in_string = True
+            elif char in "[{":
+                if self._depth == 0 and char == "{":
+                    continue
+                self._depth += 1
+                if self._depth == 2:
+                    self._object_chars = [char]
+            elif char in "]}":
+                if self._depth == 0:
+                    continue
+                self._depth -= 1
+                if self._depth == 1:
+                    node = self._complete_item("".join(self._object_chars))
+                    self._object_chars = []
+                    if node is not None:
+                        completed.append(node)
+                elif self._depth == 0:
+                    self._array_closed = True
+                    break
+        return completed
+
+    def finalize(self, raw_text: str) -> list[TaskNode]:
+        if self._array_closed and self.tasks and not self._malformed:
+            return self.tasks
+        return parse_subtasks(raw_text, self._fallback_id_prefix)
+
+    def _complete_item(self, text: str) -> TaskNode | None:
+        self._item_count += 1
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            self._malformed = True
+            return None
+        if not isinstance(item, dict):
+            self._malformed = True
+            return None
+        content = str(item.get("content") or "").strip()
+        if not content:
+            return None
+        node = TaskNode(
+            id=str(item.get("id") or f"{self._fallback_id_prefix}.{self._item_count}"),
+            content=content,
+            assigned_role=str(item.get("assigned_role") or "").strip() or None,
+        )
+        self.tasks.append(node)
+        return node
+
+
 def _extract_json_array(raw_text: str) -> list[dict] | None:
     cleaned = raw_text.strip()
     fence_match = re.search(r"```(?:json)?\s*(\[[\s\S]*?\])\s*```", cleaned, re.IGNORECASE)
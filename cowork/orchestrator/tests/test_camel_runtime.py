@@ -5,6 +5,7 @@ from pathlib import Path
 import pytest
 from camel.tasks.task import TaskState
 
+from app.runtime import agents as runtime_agents
 from app.runtime import camel_runtime as cr
 from app.runtime import executor as runtime_executor
 from app.runtime import artifacts as runtime_artifacts
@@ -31,6 +32,84 @@ async def test_event_stream_round_trip():
     assert steps == [StepEvent.confirmed.value, StepEvent.end.value]
 
 
+def test_emit_shares_one_timestamp_between_event_and_agent_event(monkeypatch):
+    monkeypatch.setattr(runtime_streaming, "fire_and_forget", lambda event: None)
+
+    first = runtime_streaming._emit("task-clock", StepEvent.streaming, {"chunk": "a"})
+    second = runtime_streaming._emit("task-clock", StepEvent.streaming, {"chunk": "b"})
+
+    assert first.data["agent_event"]["timestamp_ms"] == int(first.timestamp * 1000)
+    assert second.timestamp >= first.timestamp
+
+
+@pytest.mark.asyncio
+async def test_event_clock_is_scoped_to_each_task(monkeypatch):
+    monkeypatch.setattr(runtime_streaming, "fire_and_forget", lambda event: None)
+
+    async def emit_on_own_clock(base_wall: float) -> float:
+        clock = runtime_streaming._EventClock()
+        clock._base_wall = base_wall
+        runtime_streaming.current_event_clock.set(clock)
+        await asyncio.sleep(0)
+        return runtime_streaming._emit("task-clock", StepEvent.streaming, {"chunk": "a"}).timestamp
+
+    first, second = await asyncio.gather(emit_on_own_clock(1000.0), emit_on_own_clock(5000.0))
+
+    assert 1000.0 <= first < 1060.0
+    assert 5000.0 <= second < 5060.0
+    assert runtime_streaming.current_event_clock.get() is None
+
+
+def test_emit_failure_builds_error_and_end_pair(monkeypatch):
+    monkeypatch.setattr(runtime_streaming, "fire_and_forget", lambda event: None)
+
+    error_event, end_event = runtime_streaming._emit_failure(
+        "task-failure",
+        cr.StopReason.model_call_failed,
+        "boom",
+        "Model call failed",
+    )
+
+    assert [error_event.step, end_event.step] == [StepEvent.error.value, StepEvent.end.value]
+    assert error_event.timestamp == end_event.timestamp
+    assert error_event.data["stop_reason"] == "model_call_failed"
+    assert error_event.data["error"] == "boom"
+    assert end_event.data["status"] == "error"
+    assert end_event.data["reason"] == "Model call failed"
+
+
+def test_chunk_coalescer_batches_until_size_or_flush():
+    flushed = []
+    coalescer = runtime_streaming.ChunkCoalescer(flushed.append, interval=60.0, max_chars=6)
+
+    coalescer.add("ab")
+    coalescer.add("cd")
+    assert flushed == []
+    coalescer.add("ef")
+    assert flushed == ["abcdef"]
+    coalescer.add("g")
+    coalescer.flush()
+    coalescer.flush()
+
+    assert flushed == ["abcdef", "g"]
+
+
+def test_chunk_coalescer_widens_window_while_persistence_lags(monkeypatch):
+    lagging = {"value": True}
+    monkeypatch.setattr(runtime_streaming, "step_persistence_lagging", lambda: lagging["value"])
+    flushed = []
+    coalescer = runtime_streaming.ChunkCoalescer(flushed.append, interval=60.0, max_chars=4)
+
+    coalescer.add("abcd")
+    assert flushed == []
+    coalescer.add("efgh")
+    assert flushed == ["abcdefgh"]
+
+    lagging["value"] = False
+    coalescer.add("ijkl")
+    assert flushed == ["abcdefgh", "ijkl"]
+
+
 @pytest.mark.asyncio
 async def test_event_stream_emits_artifact_after_tool_deactivation(monkeypatch, tmp_path: Path):
     loop = asyncio.get_running_loop()
@@ -78,7 +157,10 @@ async def test_camel_complex_flow_emits_expected_steps(monkeypatch):
     async def fake_is_complex(provider, question, context):
         return True, 1
 
+    stream_calls = []
+
     async def fake_stream_chat(provider, messages, temperature=0.2, extra_params=None):
+        stream_calls.append(messages[0]["content"].splitlines()[0])
         payload = '[{"id":"t1","content":"First task"},{"id":"t2","content":"Second task"}]'
         yield payload, {"total_tokens": 2}
 
@@ -96,13 +178,28 @@ async def test_camel_complex_flow_emits_expected_steps(monkeypatch):
     async def fake_update_history(auth_header, history_id, payload):
         updates.append(payload)
 
+    async def fake_finalize_task(auth_header, *, history_id, history_patch, **kwargs):
+        updates.append(history_patch)
+        finalized.append(kwargs)
+
     async def fake_fetch_configs(auth_header, group=None):
         return []
 
     async def fake_fetch_mcp_users(auth_header):
         return []
 
-    def fake_build_agent(provider, system_prompt, agent_id, stream=False, tools=None, extra_params=None):
+    prefetched_extraction = object()
+
+    async def fake_prepare_global_memory_extraction(task_lock, auth_token, policy=None):
+        return prefetched_extraction
+
+    async def fake_generate_global_memory_notes(task_lock, provider, auth_token, policy=None, extraction=None):
+        assert extraction is prefetched_extraction
+        memory_inputs.append(dict(task_lock.conversation_history[-1]))
+
+    def fake_build_agent(
+        provider, system_prompt, agent_id, stream=False, tools=None, extra_params=None, model_cache=None
+    ):
         return types.SimpleNamespace(agent_id=agent_id, agent_name="agent")
 
     class FakeWorkforce:
@@ -194,6 +291,10 @@ async def test_camel_complex_flow_emits_expected_steps(monkeypatch):
             return None
 
     updates = []
+    finalized = []
+    memory_inputs = []
+    monkeypatch.setattr(runtime_executor, "_prepare_global_memory_extraction", fake_prepare_global_memory_extraction)
+    monkeypatch.setattr(runtime_executor, "_generate_global_memory_notes", fake_generate_global_memory_notes)
     monkeypatch.setattr(cr, "_is_complex_task", fake_is_complex)
     monkeypatch.setattr(cr, "stream_chat", fake_stream_chat)
     monkeypatch.setattr(cr, "collect_chat_completion", fake_collect)
@@ -202,6 +303,7 @@ async def test_camel_complex_flow_emits_expected_steps(monkeypatch):
     monkeypatch.setattr(cr, "create_history", fake_create_history)
     monkeypatch.setattr(cr, "update_history", fake_update_history)
     monkeypatch.setattr(runtime_executor, "update_history", fake_update_history)
+    monkeypatch.setattr(runtime_executor, "finalize_task", fake_finalize_task)
     monkeypatch.setattr(cr, "fetch_configs", fake_fetch_configs)
     monkeypatch.setattr(runtime_mcp_config, "fetch_mcp_users", fake_fetch_mcp_users)
     monkeypatch.setattr(cr, "build_agent_tools", lambda *args, **kwargs: [])
@@ -245,6 +347,14 @@ async def test_camel_complex_flow_emits_expected_steps(monkeypatch):
     assert StepEvent.task_state.value in steps
     assert steps[-1] == StepEvent.end.value
     assert updates and any("tokens" in payload for payload in updates)
+    assert finalized and finalized[-1]["message"]["message_type"] == "task_result"
+    # Two short sub-task results are streamed directly without a results-summary LLM pass.
+    assert stream_calls == ["You are a task planner. Return only valid JSON."]
+    # Global memory extraction runs once, after the task result joined the conversation.
+    assert not task_lock.background_tasks
+    assert len(memory_inputs) == 1
+    assert memory_inputs and memory_inputs[0]["role"] == "assistant"
+    assert "Result for First task" in memory_inputs[0]["content"]
 
 
 @pytest.mark.asyncio
@@ -276,7 +386,9 @@ async def test_camel_complex_flow_create_agent_uses_selected_tools(monkeypatch):
     async def fake_fetch_mcp_users(auth_header):
         return []
 
-    def fake_build_agent(provider, system_prompt, agent_id, stream=False, tools=None, extra_params=None):
+    def fake_build_agent(
+        provider, system_prompt, agent_id, stream=False, tools=None, extra_params=None, model_cache=None
+    ):
         return types.SimpleNamespace(agent_id=agent_id, agent_name="agent")
 
     class FakeWorkforce:
@@ -383,6 +495,58 @@ async def test_camel_complex_flow_create_agent_uses_selected_tools(monkeypatch):
     assert all(payload.get("tools") == ["file"] for payload in create_agent_payloads)
 
 
+def test_environment_context_is_cached_per_project_and_day():
+    first = runtime_executor._build_environment_context("/tmp/proj-cache", "proj-cache")
+    second = runtime_executor._build_environment_context("/tmp/proj-cache", "proj-cache")
+
+    assert first is second
+    assert runtime_executor._OS_INFO in first
+    assert "`/tmp/proj-cache`" in first
+
+
+def test_agent_system_prompt_keeps_static_prefix_across_projects():
+    first = runtime_executor._compose_agent_system_prompt(
+        "You are the developer agent.",
+        runtime_executor._build_environment_context("/tmp/proj-a", "proj-a"),
+    )
+    second = runtime_executor._compose_agent_system_prompt(
+        "You are the developer agent.",
+        runtime_executor._build_environment_context("/tmp/proj-b", "proj-b"),
+    )
+
+    static_prefix = "You are the developer agent.\n\n" + runtime_executor._GLOBAL_BASE_RULES
+    assert first.startswith(static_prefix)
+    assert second.startswith(static_prefix)
+    assert first.index("<operating_environment>") > first.index("</user_interaction_protocol>")
+
+
+def test_build_agent_shares_model_backend_per_config(monkeypatch):
+    created = []
+
+    def fake_create(**kwargs):
+        created.append(kwargs["model_config_dict"])
+        return object()
+
+    monkeypatch.setattr(runtime_agents.ModelFactory, "create", fake_create)
+    monkeypatch.setattr(runtime_agents, "CoworkChatAgent", lambda **kwargs: types.SimpleNamespace(**kwargs))
+    provider = types.SimpleNamespace(
+        provider_name="openai",
+        model_type="gpt-4o-mini",
+        api_key="test-key",
+        endpoint_url=None,
+        encrypted_config=None,
+    )
+    model_cache = {}
+
+    first = runtime_agents._build_agent(provider, "Persona A", "a1", model_cache=model_cache)
+    second = runtime_agents._build_agent(provider, "Persona B", "a2", model_cache=model_cache)
+    streaming = runtime_agents._build_agent(provider, "Planner", "a3", stream=True, model_cache=model_cache)
+
+    assert first.model is second.model
+    assert streaming.model is not first.model
+    assert created == [None, {"stream": True}]
+
+
 def test_extract_file_artifact_from_write_file_result(monkeypatch, tmp_path: Path):
     task_id = "task-artifact-file"
     project_ctx = current_project_id.set("proj-artifacts")
@@ -471,6 +635,20 @@ def test_runtime_skills_force_complex_and_upgrade_tools():
     assert "terminal" in document_agent.tools
 
 
+def test_runtime_skills_inject_each_skill_context_once():
+    question = "Create a detailed .xlsx spreadsheet with formulas and save it as an output file"
+    active_skills = cr.detect_runtime_skills(question, attachments=None)
+    agent_specs = cr._merge_agent_specs(cr.build_default_agents(), None)
+
+    cr.apply_runtime_skills(agent_specs, active_skills)
+    document_agent = next(agent for agent in agent_specs if agent.name == "document_agent")
+    prompt_after_first = document_agent.system_prompt
+    cr.apply_runtime_skills(agent_specs, active_skills)
+
+    assert document_agent.system_prompt == prompt_after_first
+    assert document_agent.injected_skill_ids == {skill.id for skill in active_skills}
+
+
 def test_runtime_skills_respect_blocked_search_tools():
     question = "Research latest Python web frameworks and compare their benchmarks"
     active_skills = cr.detect_runtime_skills(question, attachments=None)
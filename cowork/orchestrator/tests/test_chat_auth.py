@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import json
 
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
@@ -147,7 +148,7 @@ def test_start_chat_with_valid_token_streams_events(monkeypatch):
         )
 
     assert response.status_code == 200
-    assert "\"step\": \"end\"" in response.text
+    assert "\"step\":\"end\"" in response.text
 
 
 def test_improve_chat_accepts_access_token_cookie(monkeypatch):
@@ -394,3 +395,21 @@ def test_submit_permission_decision_rejects_duplicate_submission(monkeypatch):
     assert second.status_code == 409
     assert response_queue.get_nowait() == "approve"
     remove(project_id)
+
+
+def test_format_sse_encodes_event_as_json_bytes():
+    event = StepEventModel(
+        task_id="task-sse",
+        step="streaming",
+        data={"chunk": "héllo", 1: "int-key"},
+        timestamp=2.5,
+        event_id="evt-1",
+    )
+
+    frame = chat_api.format_sse(event)
+
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    payload = json.loads(frame[len(b"data: ") : -2])
+    assert payload["step"] == "streaming"
+    assert payload["data"] == {"chunk": "héllo", "1": "int-key"}
+    assert payload["event_id"] == "evt-1"
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+import app.clients.core_api as core_api
+
+
+@pytest.mark.asyncio
+async def test_finalize_task_falls_back_to_individual_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests: list[tuple[str, str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        if request.url.path.endswith("/finalize"):
+            return httpx.Response(404)
+        if request.url.path == "/memory/task-summary":
+            return httpx.Response(
+                200,
+                json={
+                    "id": 1,
+                    "task_id": "task-1",
+                    "project_id": "project-1",
+                    "summary": "Done",
+                    "created_at": "2026-01-01T00:00:00Z",
+                    "updated_at": "2026-01-01T00:00:00Z",
+                },
+            )
+        return httpx.Response(200, json={})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(core_api, "_get_client", lambda: client)
+    monkeypatch.setattr(core_api.settings, "core_api_url", "http://core.test")
+
+    await core_api.finalize_task(
+        "Bearer token",
+        history_id=7,
+        history_patch={"status": 2},
+        task_id="task-1",
+        project_id="project-1",
+        summary="Done",
+        message={"project_id": "project-1", "task_id": "task-1", "role": "assistant", "content": "Done"},
+    )
+    await client.aclose()
+
+    assert requests[0] == ("POST", "/chat/history/7/finalize")
+    assert sorted(requests[1:]) == [
+        ("POST", "/chat/messages"),
+        ("PUT", "/chat/history/7"),
+        ("PUT", "/memory/task-summary"),
+    ]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import math
 
+import httpx
 import pytest
 
 import app.runtime.llm_client as llm_client
@@ -55,3 +57,239 @@ def test_estimate_text_tokens_applies_fallback_headroom_without_tiktoken(
     actual = estimate_text_tokens(text, provider_name="openrouter")
 
     assert actual == int(math.ceil(base * 1.5))
+
+
+@pytest.mark.asyncio
+async def test_iter_sse_data_splits_events_across_chunk_boundaries() -> None:
+    async def byte_chunks():
+        yield b'data: {"a": 1}\n\nda'
+        yield b'ta: {"b": 2}\r\n\n: keep-alive\n\n'
+        yield b"data: [DONE]"
+
+    payloads = [payload async for payload in llm_client._iter_sse_data(byte_chunks())]
+
+    assert payloads == [b'{"a": 1}', b'{"b": 2}', b"[DONE]"]
+    assert llm_client.json_loads(payloads[1]) == {"b": 2}
+
+
+def test_split_anthropic_system_hoists_cacheable_system_block() -> None:
+    system_blocks, chat_messages = llm_client._split_anthropic_system(
+        [
+            {"role": "system", "content": "You are a task planner."},
+            {"role": "user", "content": "Plan it."},
+        ]
+    )
+
+    assert system_blocks == [
+        {"type": "text", "text": "You are a task planner.", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert chat_messages == [{"role": "user", "content": "Plan it."}]
+
+
+@pytest.mark.asyncio
+async def test_collect_chat_completion_replays_cached_response(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[list[dict[str, str]]] = []
+
+    async def fake_stream_chat(provider, messages, temperature=0.2, extra_params=None):
+        calls.append(messages)
+        yield "cached answer", None
+        yield None, {"total_tokens": 7}
+
+    monkeypatch.setattr(llm_client, "stream_chat", fake_stream_chat)
+    monkeypatch.setattr(llm_client, "_response_cache", {})
+    provider = llm_client.ProviderConfig(id=1, provider_name="openai", model_type="gpt-4o-mini", api_key="k")
+    messages = [{"role": "user", "content": "Is this complex?"}]
+
+    first = await llm_client.collect_chat_completion(provider, messages, temperature=0.0, enable_cache=True)
+    chunks: list[str] = []
+    second = await llm_client.collect_chat_completion(
+        provider, messages, temperature=0.0, on_chunk=chunks.append, enable_cache=True
+    )
+    await llm_client.collect_chat_completion(provider, messages, temperature=0.0)
+    other_tenant = provider.model_copy(update={"api_key": "other-key"})
+    await llm_client.collect_chat_completion(other_tenant, messages, temperature=0.0, enable_cache=True)
+
+    assert first == ("cached answer", {"total_tokens": 7})
+    assert second == ("cached answer", None)
+    assert "".join(chunks) == "cached answer"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_coalesces_text_and_forwards_usage(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_openai_chat(provider, messages, temperature=0.2, extra_params=None):
+        for _ in range(300):
+            yield "a", None
+        yield None, {"total_tokens": 3}
+        yield "tail", None
+
+    monkeypatch.setattr(llm_client, "stream_openai_chat", fake_openai_chat)
+    monkeypatch.setattr(llm_client.time, "monotonic", lambda: 0.0)
+    provider = llm_client.ProviderConfig(id=1, provider_name="openai", model_type="gpt-4o-mini", api_key="k")
+
+    events = [event async for event in llm_client.stream_chat(provider, [])]
+    raw = [event async for event in llm_client.stream_chat(provider, [], coalesce=False)]
+
+    assert events == [("a" * 256, None), ("a" * 44, None), (None, {"total_tokens": 3}), ("tail", None)]
+    assert len(raw) == 302
+
+
+@pytest.mark.asyncio
+async def test_post_stream_retries_throttled_requests_and_honours_retry_after() -> None:
+    statuses = iter([429, 503, 200])
+    seen: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert llm_client.json_loads(request.content) == {"a": 1}
+        status = next(statuses)
+        seen.append(status)
+        return httpx.Response(status, headers={"retry-after": "0"}, content=b"data: {}\n\n")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        async with llm_client._post_stream(client, "https://llm.test/v1", {"a": 1}, {}) as response:
+            body = await response.aread()
+
+    assert seen == [429, 503, 200]
+    assert body == b"data: {}\n\n"
+
+
+@pytest.mark.asyncio
+async def test_stream_anthropic_chat_dispatches_events_to_text_and_usage(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = (
+        b'event: message_start\ndata: {"type": "message_start", "message": {"usage": {"input_tokens": 11}}}\n\n'
+        b'data: {"type": "ping"}\n\n'
+        b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hel"}}\n\n'
+        b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "lo"}}\n\n'
+        b'data: {"type": "message_delta", "usage": {"output_tokens": 2}}\n\n'
+    )
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    provider = llm_client.ProviderConfig(id=1, provider_name="anthropic", model_type="claude", api_key="k")
+
+    events = [event async for event in llm_client.stream_anthropic_chat(provider, [{"role": "user", "content": "hi"}])]
+    await client.aclose()
+
+    assert events == [
+        ("Hel", None),
+        ("lo", None),
+        (None, {"prompt_tokens": 11, "completion_tokens": 2, "total_tokens": 13}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_anthropic_chat_yields_deltas_before_stream_ends(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = asyncio.Event()
+
+    async def body():
+        yield b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hel"}}\n\n'
+        await release.wait()
+        yield b'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "lo"}}\n\n'
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    provider = llm_client.ProviderConfig(id=1, provider_name="anthropic", model_type="claude", api_key="k")
+
+    stream = llm_client.stream_anthropic_chat(provider, [{"role": "user", "content": "hi"}])
+    # The second delta is only sent once the first one has reached the caller.
+    first = await asyncio.wait_for(stream.__anext__(), timeout=2)
+    release.set()
+    rest = [event async for event in stream]
+    await client.aclose()
+
+    assert first == ("Hel", None)
+    assert rest[0] == ("lo", None)
+
+
+@pytest.mark.asyncio
+async def test_stream_gemini_chat_streams_sse_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = (
+        b'data: {"candidates": [{"content": {"parts": [{"text": "Hi "}]}}]}\r\n\r\n'
+        b'data: {"candidates": [{"content": {"parts": [{"text": "there"}]}}],'
+        b' "usageMetadata": {"promptTokenCount": 4, "candidatesTokenCount": 2}}\r\n\r\n'
+    )
+    urls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        urls.append(str(request.url))
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    provider = llm_client.ProviderConfig(id=1, provider_name="gemini", model_type="gemini-2.0-flash", api_key="k")
+
+    events = [event async for event in llm_client.stream_gemini_chat(provider, [{"role": "user", "content": "hi"}])]
+    await client.aclose()
+
+    assert urls == [
+        "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse"
+    ]
+    assert events == [
+        ("Hi ", None),
+        ("there", None),
+        (None, {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_openai_chat_locks_onto_first_content_shape(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = (
+        b'data: {"choices": [{"delta": {"role": "assistant", "content": ""}}]}\n\n'
+        b'data: {"choices": [{"text": "Hel"}]}\n\n'
+        b'data: {"choices": [{"text": "lo", "delta": {"content": "ignored"}}]}\n\n'
+        b'data: {"choices": [], "usage": {"total_tokens": 4}}\n\n'
+        b"data: [DONE]\n\n"
+    )
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    provider = llm_client.ProviderConfig(id=1, provider_name="vllm", model_type="m", api_key="k")
+
+    events = [event async for event in llm_client.stream_openai_chat(provider, [{"role": "user", "content": "hi"}])]
+    await client.aclose()
+
+    assert events == [("Hel", None), ("lo", None), (None, {"total_tokens": 4})]
+
+
+@pytest.mark.asyncio
+async def test_stream_openai_chat_yields_final_usage_once_unless_streaming_usage(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    body = (
+        b'data: {"choices": [{"delta": {"content": "Hi"}}], "usage": {"total_tokens": 1}}\n\n'
+        b'data: {"choices": [], "usage": {"total_tokens": 3}}\n\n'
+        b"data: [DONE]\n\n"
+    )
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    provider = llm_client.ProviderConfig(id=1, provider_name="openai", model_type="m", api_key="k")
+    messages = [{"role": "user", "content": "hi"}]
+
+    final_only = [event async for event in llm_client.stream_openai_chat(provider, messages)]
+    streamed = [event async for event in llm_client.stream_openai_chat(provider, messages, stream_usage=True)]
+    await client.aclose()
+
+    assert final_only == [("Hi", None), (None, {"total_tokens": 3})]
+    assert streamed == [("Hi", None), (None, {"total_tokens": 1}), (None, {"total_tokens": 3})]
+
+
+@pytest.mark.asyncio
+async def test_stream_openai_responses_sends_structured_input(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent: list[dict] = []
+    body = (
+        b'data: {"type": "response.output_text.delta", "delta": "ok"}\n\n'
+        b'data: {"type": "response.completed", "response": {"usage": {"total_tokens": 5}}}\n\n'
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(llm_client.json_loads(request.content))
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    provider = llm_client.ProviderConfig(id=1, provider_name="openai", model_type="gpt-4.1", api_key="k")
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "hi"}]
+
+    events = [event async for event in llm_client.stream_openai_responses(provider, messages)]
+    await client.aclose()
+
+    assert sent[0]["input"] == messages
+    assert events == [("ok", None), (None, {"total_tokens": 5})]
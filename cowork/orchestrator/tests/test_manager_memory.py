@@ -1,4 +1,9 @@
-from app.runtime.manager import get_or_create, remove
+import asyncio
+
+import pytest
+
+from app.runtime.manager import flush_pending_writes, get_or_create, remove
+from app.runtime.task_lock import TaskLock
 
 
 def test_remembered_approvals_restore_after_remove_for_same_project() -> None:
@@ -30,3 +35,39 @@ def test_remembered_approvals_snapshot_updates_when_next_lock_clears_memory() ->
     third = get_or_create(project_id)
     assert third.remembered_approvals == set()
     remove(project_id)
+
+
+@pytest.mark.asyncio
+async def test_flush_pending_writes_awaits_outstanding_history_updates() -> None:
+    project_id = "proj-manager-pending-writes"
+    remove(project_id)
+    lock = get_or_create(project_id)
+    written: list[int] = []
+
+    async def fake_write(value: int) -> None:
+        await asyncio.sleep(0)
+        written.append(value)
+
+    lock.add_pending_write(asyncio.create_task(fake_write(1)))
+    lock.add_pending_write(asyncio.create_task(fake_write(2)))
+    await flush_pending_writes()
+
+    assert sorted(written) == [1, 2]
+    assert lock.pending_writes == set()
+    remove(project_id)
+
+
+@pytest.mark.asyncio
+async def test_request_stop_wakes_stop_event_waiters() -> None:
+    lock = TaskLock(project_id="proj-stop-event")
+    waiter = asyncio.create_task(lock.stop_event.wait())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    lock.request_stop()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert lock.stop_requested
+
+    lock.clear_stop()
+    assert not lock.stop_requested
+    assert not lock.stop_event.is_set()
@@ -0,0 +1,93 @@
+import asyncio
+from typing import ClassVar
+
+import pytest
+
+from app.runtime import mcp_config
+
+
+class _FakeToolkit:
+    instances: ClassVar[list["_FakeToolkit"]] = []
+
+    def __init__(self, config_dict, timeout):
+        self.config_dict = config_dict
+        self.is_connected = False
+        self.disconnects = 0
+        _FakeToolkit.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+        self.disconnects += 1
+
+    def get_tools(self):
+        return ["tool"]
+
+
+@pytest.mark.asyncio
+async def test_load_mcp_tools_reuses_connected_toolkit_until_evicted(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_fetch_mcp_users(auth_token):
+        return [{"mcp_key": "files", "command": "npx", "args": '["-y", "server-files"]', "env": {}}]
+
+    _FakeToolkit.instances = []
+    monkeypatch.setattr(mcp_config, "MCPToolkit", _FakeToolkit)
+    monkeypatch.setattr(mcp_config, "fetch_mcp_users", fake_fetch_mcp_users)
+    monkeypatch.setattr(mcp_config, "_config_cache", {})
+    monkeypatch.setattr(mcp_config, "_toolkit_cache", {})
+    monkeypatch.setattr(mcp_config, "_live_toolkits", {})
+
+    first, tools = await mcp_config._load_mcp_tools("Bearer a")
+    second, _ = await mcp_config._load_mcp_tools("Bearer a")
+    assert first is second
+    assert tools == ["tool"]
+    assert first.config_dict["mcpServers"]["files"]["args"] == ["-y", "server-files"]
+
+    await mcp_config.release_mcp_toolkit(first)
+    monkeypatch.setattr(mcp_config, "_TOOLKIT_TTL_SECONDS", 0.0)
+    replacement, _ = await mcp_config._load_mcp_tools("Bearer a")
+    assert replacement is not first
+    assert first.disconnects == 0
+
+    await mcp_config.release_mcp_toolkit(second)
+    assert first.disconnects == 1
+
+    await mcp_config.close_mcp_toolkits()
+    assert replacement.disconnects == 1
+
+
+@pytest.mark.asyncio
+async def test_load_mcp_tools_shares_concurrent_connects_and_reaps_idle_toolkits(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def fake_fetch_mcp_users(auth_token):
+        await asyncio.sleep(0)
+        return [{"mcp_key": "files", "command": "npx", "args": '["-y", "server-files"]', "env": {}}]
+
+    _FakeToolkit.instances = []
+    monkeypatch.setattr(mcp_config, "MCPToolkit", _FakeToolkit)
+    monkeypatch.setattr(mcp_config, "fetch_mcp_users", fake_fetch_mcp_users)
+    monkeypatch.setattr(mcp_config, "_config_cache", {})
+    monkeypatch.setattr(mcp_config, "_toolkit_cache", {})
+    monkeypatch.setattr(mcp_config, "_live_toolkits", {})
+    monkeypatch.setattr(mcp_config, "_toolkit_connects", {})
+    monkeypatch.setattr(mcp_config, "_TOOLKIT_TTL_SECONDS", 0.05)
+
+    (first, _), (second, _) = await asyncio.gather(
+        mcp_config._load_mcp_tools("Bearer a"),
+        mcp_config._load_mcp_tools("Bearer a"),
+    )
+    assert first is second
+    assert len(_FakeToolkit.instances) == 1
+
+    await mcp_config.release_mcp_toolkit(first)
+    await mcp_config.release_mcp_toolkit(second)
+    assert first.disconnects == 0
+
+    # No further request for this key arrives; the TTL timer alone disconnects the idle toolkit.
+    await asyncio.sleep(0.1)
+    await asyncio.sleep(0)
+    assert first.disconnects == 1
+    assert mcp_config._toolkit_cache == {}
+    assert mcp_config._live_toolkits == {}
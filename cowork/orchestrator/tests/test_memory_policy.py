@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import json
 
 import pytest
 
 from app.clients.core_api import ProviderConfig
+from app.runtime import memory as memory_module
 from app.runtime.memory import (
     _apply_memory_read_policy,
     _build_context,
+    _cached_text_tokens,
     _compact_context,
     _context_budget_snapshot,
     _generate_global_memory_notes,
+    _prepare_global_memory_extraction,
+    _render_history,
+    _store_global_memory_notes,
 )
 from app.runtime.task_lock import TaskLock
 
@@ -318,13 +324,13 @@ async def test_generate_global_memory_notes_applies_governance_rules(
 
     created_payloads: list[dict[str, object]] = []
 
-    async def fake_create_memory_note(_auth_header, payload):
-        created_payloads.append(payload)
-        return None
+    async def fake_create_memory_notes_batch(_auth_header, payloads):
+        created_payloads.extend(payloads)
+        return []
 
     monkeypatch.setattr("app.runtime.memory.fetch_memory_notes", fake_fetch_memory_notes)
     monkeypatch.setattr("app.runtime.memory.collect_chat_completion", fake_collect_chat_completion)
-    monkeypatch.setattr("app.runtime.memory.create_memory_note", fake_create_memory_note)
+    monkeypatch.setattr("app.runtime.memory.create_memory_notes_batch", fake_create_memory_notes_batch)
 
     await _generate_global_memory_notes(
         lock,
@@ -349,3 +355,166 @@ async def test_generate_global_memory_notes_applies_governance_rules(
         assert provenance.get("source") == "assistant_auto"
         assert provenance.get("task_id") == "task-memory-governance"
         assert payload.get("expires_at")
+
+
+@pytest.mark.asyncio
+async def test_compact_context_only_summarizes_messages_since_last_compaction(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    lock = TaskLock(project_id="proj-memory-incremental")
+    lock.conversation_history = [{"role": "user", "content": f"first-{i}"} for i in range(20)]
+    structured = """
+Goal: keep the thread short
+Decisions: summarize incrementally
+Outputs: rolling summary
+Open Questions: none
+Next Steps: continue
+""".strip()
+    prompts: list[str] = []
+
+    async def fake_collect(_provider, messages, **_kwargs):
+        prompts.append(messages[0]["content"])
+        return (structured, {"total_tokens": 10})
+
+    async def fake_upsert(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr("app.runtime.memory.collect_chat_completion", fake_collect)
+    monkeypatch.setattr("app.runtime.memory.upsert_thread_summary", fake_upsert)
+
+    assert await _compact_context(lock, _provider(), "Bearer token", "proj-memory-incremental") is True
+    assert lock.summary_cursor == len(lock.conversation_history) == 12
+    assert "first-0" in prompts[0]
+
+    lock.add_conversation("user", "second-0")
+    assert await _compact_context(lock, _provider(), "Bearer token", "proj-memory-incremental") is True
+
+    assert "second-0" in prompts[1]
+    assert "first-" not in prompts[1]
+    assert lock.summary_cursor == len(lock.conversation_history)
+    assert await _compact_context(lock, _provider(), "Bearer token", "proj-memory-incremental") is False
+
+
+@pytest.mark.asyncio
+async def test_global_memory_extraction_reuses_hydrated_snapshot(monkeypatch: pytest.MonkeyPatch) -> None:
+    lock = TaskLock(project_id="proj-memory-snapshot")
+    lock.conversation_history = [{"role": "user", "content": "I deploy on Fridays."}]
+    lock.global_memory_snapshot = [{"category": "work_context", "content": "User deploys on Fridays."}]
+
+    async def fail_fetch_memory_notes(*_args, **_kwargs):
+        raise AssertionError("global notes should come from the hydrated snapshot")
+
+    async def fake_create_memory_notes_batch(_auth_header, payloads):
+        return []
+
+    monkeypatch.setattr("app.runtime.memory.fetch_memory_notes", fail_fetch_memory_notes)
+    monkeypatch.setattr("app.runtime.memory.create_memory_notes_batch", fake_create_memory_notes_batch)
+
+    extraction = await _prepare_global_memory_extraction(lock, "Bearer token")
+    assert extraction is not None
+    assert "user deploys on fridays." in extraction.existing_contents
+
+    await _store_global_memory_notes(
+        lock,
+        "Bearer token",
+        [{"category": "tech_stack", "content": "User prefers Go.", "confidence": 0.95}],
+        extraction,
+    )
+    assert [note["content"] for note in lock.global_memory_snapshot] == [
+        "User deploys on Fridays.",
+        "User prefers Go.",
+    ]
+
+
+def test_render_history_formats_role_and_content() -> None:
+    history = [{"role": "user", "content": "hello"}, {"role": "", "content": "hi there"}, {"role": "user"}]
+
+    assert _render_history(history) == "user: hello\nassistant: hi there\nuser: "
+
+
+
+@pytest.mark.asyncio
+async def test_overlapping_compactions_share_one_summary_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    lock = TaskLock(project_id="proj-memory-single-flight")
+    lock.conversation_history = [{"role": "user", "content": f"turn-{i}"} for i in range(20)]
+    structured = """
+Goal: keep the thread short
+Decisions: summarize once
+Outputs: rolling summary
+Open Questions: none
+Next Steps: continue
+""".strip()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fake_collect(_provider, _messages, **_kwargs):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return (structured, {"total_tokens": 10})
+
+    async def fake_upsert(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr("app.runtime.memory.collect_chat_completion", fake_collect)
+    monkeypatch.setattr("app.runtime.memory.upsert_thread_summary", fake_upsert)
+
+    first = asyncio.create_task(_compact_context(lock, _provider(), "Bearer token", lock.project_id))
+    second = asyncio.create_task(_compact_context(lock, _provider(), "Bearer token", lock.project_id))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(first, second) == [True, True]
+    assert calls == 1
+
+
+def test_cached_text_tokens_stores_bounded_digests(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    def fake_estimate(text: str, model_name: str | None = None, provider_name: str | None = None) -> int:
+        calls.append(text)
+        return len(text)
+
+    monkeypatch.setattr(memory_module, "estimate_text_tokens", fake_estimate)
+    monkeypatch.setattr(memory_module, "_token_count_cache", {})
+    monkeypatch.setattr(memory_module, "_TOKEN_COUNT_CACHE_MAX_ENTRIES", 2)
+    large = "x" * 50_000
+
+    assert _cached_text_tokens(large, "gpt-4o-mini", "openai") == 50_000
+    assert _cached_text_tokens(large, "gpt-4o-mini", "openai") == 50_000
+    assert calls == [large]
+    assert all(large not in key for key in memory_module._token_count_cache)
+
+    _cached_text_tokens("a", "gpt-4o-mini", "openai")
+    _cached_text_tokens("b", "gpt-4o-mini", "openai")
+    assert len(memory_module._token_count_cache) == 2
+    _cached_text_tokens(large, "gpt-4o-mini", "openai")
+    assert calls == [large, "a", "b", large]
+
+
+@pytest.mark.asyncio
+async def test_global_memory_generation_joins_only_flights_covering_the_same_history(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    release = asyncio.Event()
+    runs: list[str] = []
+
+    async def fake_run(task_lock, provider, auth_token, policy, extraction=None):
+        runs.append(task_lock.project_id)
+        await release.wait()
+
+    monkeypatch.setattr(memory_module, "_run_global_memory_generation", fake_run)
+    lock = TaskLock(project_id="proj-memory-flight")
+    lock.conversation_history = [{"role": "user", "content": "I deploy on Fridays."}]
+
+    first = asyncio.create_task(_generate_global_memory_notes(lock, _provider(), "Bearer token"))
+    joined = asyncio.create_task(_generate_global_memory_notes(lock, _provider(), "Bearer token"))
+    await asyncio.sleep(0)
+    lock.add_conversation("assistant", "Noted.")
+    later = asyncio.create_task(_generate_global_memory_notes(lock, _provider(), "Bearer token"))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, joined, later)
+
+    # The second call shared the first flight; the call after the new message started its own.
+    assert len(runs) == 2
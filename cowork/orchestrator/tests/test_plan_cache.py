@@ -0,0 +1,32 @@
+from app.runtime.plan_cache import clear_plan_cache, lookup_plan, serialize_plan, store_plan
+from app.runtime.workforce import TaskNode, parse_subtasks
+
+
+def test_plan_cache_round_trips_plan_for_same_question_and_project() -> None:
+    clear_plan_cache()
+    store_plan(
+        "Build a  landing page",
+        "proj-1",
+        [
+            TaskNode(id="step_1", content="Draft copy", assigned_role="document_agent"),
+            TaskNode(id="step_2", content="Write HTML", assigned_role="developer_agent"),
+        ],
+    )
+
+    cached = lookup_plan("build a landing page ", "proj-1", "task-2")
+
+    assert cached is not None
+    assert [(node.id, node.content, node.assigned_role) for node in cached] == [
+        ("task-2.1", "Draft copy", "document_agent"),
+        ("task-2.2", "Write HTML", "developer_agent"),
+    ]
+    assert lookup_plan("build a landing page", "proj-other", "task-3") is None
+    clear_plan_cache()
+
+
+def test_serialized_plan_parses_back_into_task_nodes() -> None:
+    nodes = [TaskNode(id="t.1", content="Research vendors", assigned_role="search_agent")]
+
+    parsed = parse_subtasks(serialize_plan(nodes), "t")
+
+    assert [(node.content, node.assigned_role) for node in parsed] == [("Research vendors", "search_agent")]
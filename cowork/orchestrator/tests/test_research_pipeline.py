@@ -0,0 +1,27 @@
+from app.runtime.research_pipeline import dedupe_sources, expand_queries, extract_citations
+
+
+def test_expand_queries_dedupes_case_insensitively_keeping_first_spelling() -> None:
+    assert expand_queries("Latest Benchmark papers") == [
+        "Latest Benchmark papers",
+        "Latest Benchmark papers abstract methodology key findings",
+    ]
+    assert expand_queries("   ") == []
+
+
+def test_dedupe_sources_keeps_first_row_per_url_or_title() -> None:
+    rows = [
+        {"url": "https://A.example/x", "title": "first"},
+        {"url": "https://a.example/x ", "title": "second"},
+        {"title": "Only Title"},
+        {"text": "only title"},
+        {"url": "", "title": ""},
+    ]
+
+    assert dedupe_sources(rows) == [rows[0], rows[2]]
+
+
+def test_extract_citations_returns_urls_and_sources_in_text_order() -> None:
+    text = "See [source: Nature 2024], then https://a.example/x and [Source: https://A.example/x]."
+
+    assert extract_citations(text) == ["Nature 2024", "https://a.example/x"]
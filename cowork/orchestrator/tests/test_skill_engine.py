@@ -2,18 +2,27 @@ from pathlib import Path
 from datetime import datetime, timezone
 import logging
 
+from pydantic import BaseModel
+
 from app.clients.core_api import SkillEntry
 from app.runtime.skill_catalog_matching import (
+    attachment_payload,
     catalog_skill_matches_request,
+    extensions_for_skill_detection,
     filter_enabled_runtime_skills,
+    match_catalog_skills,
 )
 from app.runtime.file_naming import (
     extract_explicit_filenames,
+    humanize_filename,
+    lowercase_suffix,
     normalize_filename_for_output,
+    suggest_filename,
 )
 from app.runtime.research_pipeline import should_retry_search
 from app.runtime.skill_engine import RuntimeSkillEngine, resolve_validation_failure_reason
 from app.runtime.skills_schema import load_skill_packs
+from app.runtime import skill_engine as skill_engine_module
 
 
 def test_skillpacks_load_required_domains():
@@ -177,6 +186,22 @@ def test_filename_normalization_respects_explicit_names():
     assert normalized_implicit == "AI Learnings RAG And Instructgpt.md"
 
 
+def test_humanize_filename_collapses_mixed_separators():
+    assert humanize_filename("__quarterly-- report _ml__.pdf") == "Quarterly Report ML.pdf"
+    assert humanize_filename("___.md") == "Output.md"
+
+
+def test_lowercase_suffix_matches_pathlib():
+    for value in ("Report.PDF", "a/b.tar.gz", "dir/.bashrc", "notes.", "a.b/c", "out/final.MD/", "", "..", "plain"):
+        assert lowercase_suffix(value) == Path(value).suffix.lower()
+
+
+def test_suggest_filename_drops_stopwords_and_caps_at_six_tokens():
+    question = "Write a report on the RAG and ai pipelines for the team with charts from sales by region"
+    assert suggest_filename(question, "md") == "Write Report RAG AI Pipelines Team.md"
+    assert suggest_filename("the of and", ".pdf") == "Output.pdf"
+
+
 def test_markdown_contract_validation_and_repair(tmp_path: Path):
     engine = RuntimeSkillEngine(mode="on")
     skills = engine.detect("Create a markdown report summarizing this topic")
@@ -201,6 +226,28 @@ def test_markdown_contract_validation_and_repair(tmp_path: Path):
     assert all(".initial_env" not in str(artifact.get("path") or "") for artifact in run_state.artifacts)
 
 
+def test_repair_in_worker_thread_defers_persistence_to_caller(tmp_path: Path, monkeypatch):
+    captured = []
+    monkeypatch.setattr("app.runtime.skill_engine.fire_and_forget_artifacts", captured.extend)
+    engine = RuntimeSkillEngine(mode="on")
+    skills = engine.detect("Create a markdown report summarizing this topic")
+    run_state = engine.prepare_plan(
+        task_id="task-deferred",
+        project_id="proj-deferred",
+        question="Create a markdown report summarizing this topic",
+        context="",
+        active_skills=skills,
+    )
+    validation = engine.validate_outputs(run_state=run_state, workdir=tmp_path, transcript="# Summary\n\nFindings.")
+
+    repair = engine.repair_or_fail(run_state=run_state, validation=validation, workdir=tmp_path, persist=False)
+    assert repair.artifacts
+    assert captured == []
+
+    engine.persist_repaired_artifacts(run_state.task_id, repair.artifacts)
+    assert [event.name for event in captured] == [artifact["name"] for artifact in repair.artifacts]
+
+
 def test_research_validation_reports_search_backend_unavailable(tmp_path: Path):
     engine = RuntimeSkillEngine(mode="on")
     skills = engine.detect("Research the latest Python web frameworks and benchmark performance")
@@ -271,6 +318,55 @@ def test_validate_outputs_filters_blocked_system_artifacts(tmp_path: Path):
     assert merged[0]["name"] == "Llama Research Report.md"
 
 
+def test_upsert_runtime_artifact_merges_by_logical_key_after_list_edits():
+    engine = RuntimeSkillEngine(mode="on")
+    run_state = engine.prepare_plan(
+        task_id="task-upsert",
+        project_id="proj-upsert",
+        question="Create a markdown report",
+        context="",
+        active_skills=[],
+    )
+
+    engine._upsert_runtime_artifact(run_state, {"path": "/tmp/a.md", "action": "created"})
+    engine._upsert_runtime_artifact(run_state, {"path": "/tmp/b.md", "action": "created"})
+    engine._upsert_runtime_artifact(run_state, {"path": "/tmp/a.md", "action": "modified"})
+    assert [(item["path"], item["action"]) for item in run_state.artifacts] == [
+        ("/tmp/a.md", "modified"),
+        ("/tmp/b.md", "created"),
+    ]
+
+    run_state.artifacts = [{"path": "/tmp/b.md", "action": "created"}]
+    engine._upsert_runtime_artifact(run_state, {"path": "/tmp/b.md", "action": "modified"})
+    engine._upsert_runtime_artifact(run_state, {"path": "/tmp/a.md", "action": "created"})
+    assert [(item["path"], item["action"]) for item in run_state.artifacts] == [
+        ("/tmp/b.md", "modified"),
+        ("/tmp/a.md", "created"),
+    ]
+
+
+def test_has_artifact_path_tracks_renames_and_list_replacement():
+    engine = RuntimeSkillEngine(mode="on")
+    run_state = engine.prepare_plan(
+        task_id="task-paths",
+        project_id="proj-paths",
+        question="Create a markdown report",
+        context="",
+        active_skills=[],
+    )
+
+    engine._upsert_runtime_artifact(run_state, {"id": "a1", "path": "/tmp/draft.md"})
+    assert engine._has_artifact_path(run_state, "/tmp/draft.md")
+
+    engine._upsert_runtime_artifact(run_state, {"id": "a1", "path": "/tmp/Final Report.md"})
+    assert not engine._has_artifact_path(run_state, "/tmp/draft.md")
+    assert engine._has_artifact_path(run_state, "/tmp/Final Report.md")
+
+    run_state.artifacts = [{"path": "/tmp/other.md"}]
+    assert not engine._has_artifact_path(run_state, "/tmp/Final Report.md")
+    assert engine._has_artifact_path(run_state, "/tmp/other.md")
+
+
 def test_normalize_artifact_names_skips_blocked_system_paths(tmp_path: Path):
     engine = RuntimeSkillEngine(mode="on")
     skills = engine.detect("Create a markdown report summarizing this topic")
@@ -340,7 +436,7 @@ def test_normalize_artifact_names_preserves_logical_id_with_modified_action(tmp_
 
 def test_persist_artifacts_skips_modified_updates(monkeypatch):
     captured = []
-    monkeypatch.setattr("app.runtime.skill_engine.fire_and_forget_artifact", lambda event: captured.append(event))
+    monkeypatch.setattr("app.runtime.skill_engine.fire_and_forget_artifacts", captured.extend)
 
     RuntimeSkillEngine._persist_artifacts(
         "task-persist",
@@ -396,6 +492,32 @@ def test_repair_does_not_discover_existing_workdir_files(tmp_path: Path):
     assert all(".initial_env" not in str(artifact.get("path") or "") for artifact in repair.artifacts)
 
 
+def test_repair_without_changes_leaves_filtered_artifacts_indexed(tmp_path: Path):
+    engine = RuntimeSkillEngine(mode="on")
+    skills = engine.detect("Build a spreadsheet of quarterly sales")
+    run_state = engine.prepare_plan(
+        task_id="task-noop-repair",
+        project_id="proj-noop-repair",
+        question="Build a spreadsheet of quarterly sales",
+        context="",
+        active_skills=skills,
+    )
+    run_state.artifacts = [
+        {"name": "notes.md", "path": str(tmp_path / "notes.md")},
+        {"name": "entry_points.txt", "path": str(tmp_path / "pkg.dist-info" / "entry_points.txt")},
+        {"name": "notes.md", "path": str(tmp_path / "notes.md"), "action": "modified"},
+    ]
+
+    validation = engine.validate_outputs(run_state=run_state, workdir=tmp_path, transcript="No spreadsheet yet.")
+    assert validation.success is False
+
+    repair = engine.repair_or_fail(run_state=run_state, validation=validation, workdir=tmp_path)
+
+    assert repair.artifacts == []
+    assert run_state.artifacts == [{"name": "notes.md", "path": str(tmp_path / "notes.md"), "action": "modified"}]
+    assert run_state.artifact_index_is_current()
+
+
 def test_research_retry_helper():
     assert should_retry_search({"error": "network"}) is True
     assert should_retry_search({"results": []}) is True
@@ -410,6 +532,21 @@ def test_mixed_task_detects_research_and_document_skills():
     assert "doc_markdown_v1" in skill_ids
 
 
+def test_detect_reuses_matches_for_repeated_inputs(monkeypatch):
+    engine = RuntimeSkillEngine(mode="on")
+    question = "Research this topic and create a detailed markdown document with citations"
+    first = engine.detect(question)
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("matching should come from the detect cache")
+
+    monkeypatch.setattr(engine, "_match_skills", fail)
+    second = engine.detect(question)
+
+    assert [skill.id for skill in second] == [skill.id for skill in first]
+    assert second is not first
+
+
 def test_filter_enabled_runtime_skills_blocks_disabled_examples():
     engine = RuntimeSkillEngine(mode="on")
     detected = engine.detect("Please research this topic on the web")
@@ -426,6 +563,38 @@ def test_filter_enabled_runtime_skills_blocks_disabled_examples():
     ]
     filtered = filter_enabled_runtime_skills(detected, catalog)
     assert all(skill.id != "research_web_v1" for skill in filtered)
+    assert filter_enabled_runtime_skills(detected, catalog, enabled_ids=frozenset()) == []
+    assert filter_enabled_runtime_skills(detected, catalog, enabled_ids=frozenset({"research_web_v1"})) == [
+        skill for skill in detected if skill.id == "research_web_v1"
+    ]
+
+
+def test_extensions_for_skill_detection_reads_question_and_attachments():
+    attachments = [
+        {"name": "Report.PDF"},
+        {"path": "uploads/archive.tar.gz"},
+        {"path": "home/.bashrc"},
+        {"name": "notes."},
+        {"path": 42},
+    ]
+
+    extensions = extensions_for_skill_detection("Summarize data.CSV please", attachments)
+
+    assert extensions == {".csv", ".pdf", ".gz"}
+
+
+def test_attachment_payload_dumps_dicts_and_models():
+    class LegacyAttachment:
+        def dict(self):
+            return {"name": "legacy.docx"}
+
+    class UploadedFile(BaseModel):
+        name: str
+
+    assert attachment_payload({"path": "a.pdf"}) == {"path": "a.pdf"}
+    assert attachment_payload(LegacyAttachment()) == {"name": "legacy.docx"}
+    assert attachment_payload(UploadedFile(name="data.csv")) == {"name": "data.csv"}
+    assert attachment_payload("report.pdf") is None
 
 
 def test_catalog_skill_matches_request_by_keyword_and_extension():
@@ -460,3 +629,90 @@ def test_catalog_skill_matches_request_allows_custom_without_metadata():
     )
 
     assert catalog_skill_matches_request(entry, "Unrelated prompt", set()) is True
+
+
+def test_match_catalog_skills_matches_mixed_case_triggers_in_one_pass():
+    def entry(skill_id: str, keywords: list[str], extensions: list[str]) -> SkillEntry:
+        return SkillEntry(
+            skill_id=skill_id,
+            name=skill_id,
+            description="",
+            source="custom",
+            trigger_keywords=keywords,
+            trigger_extensions=extensions,
+            enabled=True,
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+
+    catalog = [
+        entry("slides", ["Pitch Deck"], []),
+        entry("sheets", [], [".XLSX"]),
+        entry("docs", ["memo"], [".docx"]),
+    ]
+
+    matched = match_catalog_skills("Build a PITCH deck from the numbers", catalog, {".xlsx"})
+
+    assert [item.skill_id for item in matched] == ["slides", "sheets"]
+    question = "Write the launch MEMO"
+    matched = match_catalog_skills(question, catalog, set(), question_lower=question.lower())
+    assert [item.skill_id for item in matched] == ["docs"]
+
+
+class _StubTriggerDatabase:
+    """Stands in for a compiled Hyperscan database by reporting each skill's regex matches."""
+
+    def __init__(self, skills, error: Exception | None = None):
+        self.skills = skills
+        self.error = error
+        self.scans = 0
+
+    def scan(self, data: bytes, match_event_handler) -> None:
+        self.scans += 1
+        if self.error is not None:
+            raise self.error
+        question = data.decode("utf-8")
+        for index, skill in enumerate(self.skills):
+            if skill.matches_question(question):
+                match_event_handler(index, 0, len(data), 0, None)
+
+
+def test_detect_trigger_database_matches_regex_path():
+    questions = [
+        "Create a polished Word document from this research",
+        "Summarize the PDF report",
+        "Research the latest chip export rules and cite sources",
+        "hello there",
+    ]
+    regex_engine = RuntimeSkillEngine(mode="on")
+    regex_engine._trigger_db = None
+    scan_engine = RuntimeSkillEngine(mode="on")
+    database = _StubTriggerDatabase(scan_engine.skills)
+    scan_engine._trigger_db = database
+
+    for question in questions:
+        expected = [skill.id for skill in regex_engine.detect(question)]
+        assert [skill.id for skill in scan_engine.detect(question)] == expected
+    assert database.scans == len(questions)
+
+
+def test_detect_falls_back_to_regexes_when_trigger_scan_fails(monkeypatch):
+    class ScanError(Exception):
+        pass
+
+    regex_engine = RuntimeSkillEngine(mode="on")
+    regex_engine._trigger_db = None
+    question = "Create a polished Word document from this research"
+    expected = [skill.id for skill in regex_engine.detect(question)]
+    assert "doc_docx_v1" in expected
+
+    engine = RuntimeSkillEngine(mode="on")
+    monkeypatch.setattr(skill_engine_module, "hyperscan", type("hyperscan", (), {"error": ScanError}))
+    engine._trigger_db = _StubTriggerDatabase(engine.skills, error=ScanError("scratch space exhausted"))
+    assert [skill.id for skill in engine.detect(question)] == expected
+
+    surrogate_question = f"{question} \udcff"
+    engine._trigger_db = _StubTriggerDatabase(engine.skills)
+    assert [skill.id for skill in engine.detect(surrogate_question)] == [
+        skill.id for skill in regex_engine.detect(surrogate_question)
+    ]
@@ -0,0 +1,35 @@
+from app.runtime.workforce import IncrementalSubtaskParser, parse_subtasks
+
+
+def _feed_in_chunks(parser: IncrementalSubtaskParser, text: str, size: int) -> list[list[str]]:
+    batches = []
+    for start in range(0, len(text), size):
+        completed = parser.feed(text[start : start + size])
+        if completed:
+            batches.append([node.id for node in completed])
+    return batches
+
+
+def test_incremental_parser_emits_each_subtask_when_its_object_closes() -> None:
+    raw = (
+        'Plan:\n```json\n[{"id": "step_1", "content": "Read {config} \\"files\\"", "assigned_role": "developer_agent"},'
+        ' {"content": "Write [summary] report"}]\n```'
+    )
+    parser = IncrementalSubtaskParser("task-9")
+
+    batches = _feed_in_chunks(parser, raw, 7)
+    nodes = parser.finalize(raw)
+
+    assert batches == [["step_1"], ["task-9.2"]]
+    expected = parse_subtasks(raw, "task-9")
+    assert [(node.id, node.content, node.assigned_role) for node in nodes] == [
+        (node.id, node.content, node.assigned_role) for node in expected
+    ]
+
+
+def test_incremental_parser_falls_back_for_non_json_plans() -> None:
+    raw = "- Gather requirements\n- Draft the document"
+    parser = IncrementalSubtaskParser("task-3")
+
+    assert parser.feed(raw) == []
+    assert [node.content for node in parser.finalize(raw)] == ["Gather requirements", "Draft the document"]
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from shared.schemas import ArtifactEvent
+from shared.schemas import StepEvent as StepEventModel
+
+from app.runtime import sync as runtime_sync
+
+
+@pytest.mark.asyncio
+async def test_fire_and_forget_queues_steps_above_high_water(monkeypatch):
+    sent: list[str] = []
+    release = asyncio.Event()
+
+    async def fake_send_step(event):
+        await release.wait()
+        sent.append(event.event_id)
+
+    monkeypatch.setattr(runtime_sync, "send_step", fake_send_step)
+    monkeypatch.setattr(runtime_sync, "_STEP_HIGH_WATER", 2)
+    monkeypatch.setattr(runtime_sync, "_STEP_LOW_WATER", 1)
+
+    for index in range(5):
+        runtime_sync.fire_and_forget(
+            StepEventModel(task_id="task-bp", step="streaming", data={}, event_id=str(index))
+        )
+
+    pipeline = runtime_sync._step_pipeline
+    assert pipeline.inflight == 2
+    assert [event.event_id for event in pipeline.backlog] == ["2", "3", "4"]
+
+    release.set()
+    for _ in range(50):
+        if len(sent) == 5 and pipeline.inflight == 0:
+            break
+        await asyncio.sleep(0)
+
+    assert sent == ["0", "1", "2", "3", "4"]
+    assert not pipeline.backlog
+    assert pipeline.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_fire_and_forget_keeps_every_step_and_flags_lag(monkeypatch):
+    release = asyncio.Event()
+    sent: list[str] = []
+
+    async def fake_send_step(event):
+        await release.wait()
+        sent.append(event.event_id)
+
+    monkeypatch.setattr(runtime_sync, "send_step", fake_send_step)
+    monkeypatch.setattr(runtime_sync, "_STEP_HIGH_WATER", 1)
+    monkeypatch.setattr(runtime_sync, "_STEP_LOW_WATER", 0)
+
+    steps = ["streaming"] * 5 + ["end"]
+    for index, step in enumerate(steps):
+        runtime_sync.fire_and_forget(StepEventModel(task_id="task-lag", step=step, data={}, event_id=str(index)))
+
+    pipeline = runtime_sync._step_pipeline
+    assert [event.event_id for event in pipeline.backlog] == ["1", "2", "3", "4", "5"]
+    assert runtime_sync.step_persistence_lagging()
+
+    release.set()
+    for _ in range(50):
+        if len(sent) == len(steps) and pipeline.inflight == 0:
+            break
+        await asyncio.sleep(0)
+    assert sent == ["0", "1", "2", "3", "4", "5"]
+    assert not runtime_sync.step_persistence_lagging()
+
+
+def test_step_pipeline_counts_stay_per_loop(monkeypatch):
+    async def fake_send_step(event):
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(runtime_sync, "send_step", fake_send_step)
+
+    async def emit_and_leave_pending():
+        runtime_sync.fire_and_forget(StepEventModel(task_id="task-loop", step="streaming", data={}))
+        return runtime_sync._step_pipeline
+
+    first_loop = asyncio.new_event_loop()
+    second_loop = asyncio.new_event_loop()
+    try:
+        first = first_loop.run_until_complete(emit_and_leave_pending())
+        second = second_loop.run_until_complete(emit_and_leave_pending())
+        # The first loop's send finishes after the second loop took over the module state.
+        first_loop.run_until_complete(asyncio.sleep(0.01))
+        assert second.inflight == 1
+        second_loop.run_until_complete(asyncio.sleep(0.01))
+    finally:
+        first_loop.close()
+        second_loop.close()
+
+    assert first is not second
+    assert first.inflight == 0
+    assert second.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_fire_and_forget_artifacts_sends_batch_from_one_task(monkeypatch):
+    sent: list[str] = []
+
+    async def fake_send_artifact(event):
+        sent.append(event.name)
+
+    monkeypatch.setattr(runtime_sync, "send_artifact", fake_send_artifact)
+    tasks_before = len(asyncio.all_tasks())
+
+    runtime_sync.fire_and_forget_artifacts(
+        [ArtifactEvent(task_id="task-batch", artifact_type="file", name=name) for name in ("a.md", "b.md", "c.md")]
+    )
+
+    assert len(asyncio.all_tasks()) == tasks_before + 1
+    for _ in range(10):
+        if len(sent) == 3:
+            break
+        await asyncio.sleep(0)
+    assert sent == ["a.md", "b.md", "c.md"]